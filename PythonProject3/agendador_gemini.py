@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+# ============================================
+# AGENDADOR GLOBAL DE COTA DO GEMINI
+# ============================================
+# Controla requisições/min e tokens/min do deployment inteiro (todas as rotas
+# e todos os alunos). Quem passa da cota espera numa fila justa: os alunos são
+# atendidos em rodízio (round-robin), um pedido por vez de cada um, então quem
+# manda muitas mensagens seguidas não trava os outros. A espera é limitada.
+JANELA_SEGUNDOS = 60
+
+
+class CotaExcedida(Exception):
+    """A chamada esperou mais que espera_maxima na fila"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Cota do Gemini esgotada; tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+
+
+def estimar_tokens(texto):
+    """Aproximação usada pela própria documentação do Gemini: ~4 caracteres por token"""
+    return max(1, len(texto or '') // 4)
+
+
+class AgendadorGemini:
+    def __init__(self, rpm=15, tpm=250000, espera_maxima=20.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.espera_maxima = espera_maxima
+
+        self._cond = threading.Condition()
+        self._uso = deque()              # (instante, requisicoes, tokens) dentro da janela
+        self._filas = OrderedDict()      # usuario -> deque de senhas (ordem = rodízio)
+        self._proxima_senha = 0
+
+        self._esperas_ms = deque(maxlen=500)
+        self.admitidas = 0
+        self.rejeitadas = 0
+
+    # ---------- janela deslizante ----------
+    def _limpar_janela(self, agora):
+        while self._uso and agora - self._uso[0][0] >= JANELA_SEGUNDOS:
+            self._uso.popleft()
+
+    def _uso_atual(self):
+        return sum(u[1] for u in self._uso), sum(u[2] for u in self._uso)
+
+    def _tempo_ate_caber(self, tokens, agora):
+        """0 se cabe agora; senão, quantos segundos até a entrada mais antiga sair da janela"""
+        requisicoes, tokens_usados = self._uso_atual()
+        cabe = requisicoes < self.rpm and (tokens_usados + tokens <= self.tpm or not self._uso)
+        if cabe:
+            return 0
+        return max(0.05, self._uso[0][0] + JANELA_SEGUNDOS - agora)
+
+    # ---------- fila justa ----------
+    def _e_a_vez(self, usuario, senha):
+        """A vez é do primeiro pedido do primeiro aluno do rodízio"""
+        if not self._filas:
+            return False
+        primeiro_usuario, fila = next(iter(self._filas.items()))
+        return primeiro_usuario == usuario and fila[0] == senha
+
+    def _sair_da_fila(self, usuario, senha, atendido):
+        fila = self._filas.get(usuario)
+        if fila is None:
+            return
+        try:
+            fila.remove(senha)
+        except ValueError:
+            pass
+        if not fila:
+            del self._filas[usuario]
+        elif atendido:
+            # Atendido: o aluno vai para o fim do rodízio
+            self._filas.move_to_end(usuario)
+
+    def admitir(self, usuario, tokens_estimados=1):
+        """
+        Bloqueia até a chamada caber na cota global (respeitando a fila justa).
+        Levanta CotaExcedida se a espera passar de espera_maxima.
+        """
+        usuario = usuario if usuario is not None else 'anonimo'
+        inicio = time.time()
+        limite = inicio + self.espera_maxima
+
+        with self._cond:
+            senha = self._proxima_senha
+            self._proxima_senha += 1
+            self._filas.setdefault(usuario, deque()).append(senha)
+
+            while True:
+                agora = time.time()
+                self._limpar_janela(agora)
+
+                if self._e_a_vez(usuario, senha):
+                    espera = self._tempo_ate_caber(tokens_estimados, agora)
+                    if espera == 0:
+                        self._uso.append((agora, 1, tokens_estimados))
+                        self._sair_da_fila(usuario, senha, atendido=True)
+                        self.admitidas += 1
+                        self._esperas_ms.append(int((agora - inicio) * 1000))
+                        self._cond.notify_all()
+                        return
+                else:
+                    espera = limite - agora
+
+                if agora >= limite:
+                    self._sair_da_fila(usuario, senha, atendido=False)
+                    self.rejeitadas += 1
+                    self._cond.notify_all()
+                    retry = int(self._tempo_ate_caber(tokens_estimados, agora)) + 1
+                    raise CotaExcedida(retry)
+
+                self._cond.wait(timeout=min(espera, limite - agora))
+
+    def tamanho_fila(self):
+        with self._cond:
+            return sum(len(f) for f in self._filas.values())
+
+    def registrar_tokens(self, tokens):
+        """Soma à janela os tokens de saída (conhecidos só depois da resposta)"""
+        if tokens <= 0:
+            return
+        with self._cond:
+            self._uso.append((time.time(), 0, tokens))
+
+    def estatisticas(self):
+        with self._cond:
+            self._limpar_janela(time.time())
+            requisicoes, tokens = self._uso_atual()
+            esperas = sorted(self._esperas_ms)
+            return {
+                'requisicoes_ultimo_minuto': requisicoes,
+                'tokens_ultimo_minuto': tokens,
+                'limite_rpm': self.rpm,
+                'limite_tpm': self.tpm,
+                'fila': sum(len(f) for f in self._filas.values()),
+                'usuarios_na_fila': len(self._filas),
+                'admitidas': self.admitidas,
+                'rejeitadas': self.rejeitadas,
+                'espera_media_ms': int(sum(esperas) / len(esperas)) if esperas else 0,
+                'espera_p95_ms': esperas[int(len(esperas) * 0.95) - 1] if esperas else 0,
+            }
@@ -0,0 +1,65 @@
+from parsers_lyceum import normalizar_disciplina
+
+# ============================================
+# ALTERAÇÕES ENTRE SINCRONIZAÇÕES DO LYCEUM
+# ============================================
+# Compara o que estava salvo com o que acabou de ser extraído, disciplina a
+# disciplina (dicionários por normalizar_disciplina, uma passada em cada
+# lista). Cada alteração vira um registro em alteracoes_lyceum e uma
+# notificação para o aluno.
+
+CAMPOS_VA = ('va1', 'va2', 'va3')
+
+# Avisos de frequência: ao cair abaixo de cada limite (o último é o mínimo para aprovação)
+LIMITES_FREQUENCIA = (80.0, 75.0)
+
+
+def por_disciplina(registros):
+    return {normalizar_disciplina(r['disciplina']): r for r in registros}
+
+
+def comparar_notas(anteriores, novas):
+    """VAs que apareceram (0 -> nota) ou mudaram; uma nota que zerou é ignorada (falha de leitura)"""
+    salvas = por_disciplina(anteriores)
+    alteracoes = []
+    for nota in novas:
+        anterior = salvas.get(normalizar_disciplina(nota['disciplina']), {})
+        for campo in CAMPOS_VA:
+            valor_anterior = anterior.get(campo) or 0.0
+            valor_novo = nota.get(campo) or 0.0
+            if not valor_novo or valor_novo == valor_anterior:
+                continue
+            tipo = 'nota_nova' if not valor_anterior else 'nota_alterada'
+            alteracoes.append({
+                'disciplina': nota['disciplina'], 'tipo': tipo, 'campo': campo,
+                'anterior': valor_anterior, 'novo': valor_novo,
+            })
+    return alteracoes
+
+
+def comparar_frequencia(anteriores, novas, limites=LIMITES_FREQUENCIA):
+    """Disciplinas cuja presença cruzou para baixo algum limite (registra só o mais baixo cruzado)"""
+    salvas = por_disciplina(anteriores)
+    alteracoes = []
+    for falta in novas:
+        anterior = salvas.get(normalizar_disciplina(falta['disciplina']))
+        valor_anterior = anterior['percentual_presenca'] if anterior else 100.0
+        valor_novo = falta['percentual_presenca']
+        cruzados = [limite for limite in limites if valor_anterior >= limite > valor_novo]
+        if cruzados:
+            alteracoes.append({
+                'disciplina': falta['disciplina'], 'tipo': 'frequencia_baixa', 'campo': 'percentual_presenca',
+                'anterior': valor_anterior, 'novo': valor_novo, 'limite': min(cruzados),
+            })
+    return alteracoes
+
+
+def mensagem_alteracao(alteracao):
+    disciplina = alteracao['disciplina']
+    if alteracao['tipo'] == 'frequencia_baixa':
+        return (f"⚠️ Sua frequência em {disciplina} caiu para {alteracao['novo']:.1f}% "
+                f"(abaixo de {alteracao['limite']:.0f}%)")
+    va = alteracao['campo'].upper()
+    if alteracao['tipo'] == 'nota_nova':
+        return f"📝 Nova nota em {disciplina}: {va} = {alteracao['novo']:g}"
+    return f"📝 Nota alterada em {disciplina}: {va} {alteracao['anterior']:g} → {alteracao['novo']:g}"
@@ -1,7 +1,6 @@
-from flask import render_template, request, jsonify, session, redirect, url_for, flash, send_file
+from flask import render_template, request, jsonify, session, redirect, url_for, flash, send_file, Response, stream_with_context
 from flask.app import Flask as FlaskApp
 from typing import Any, cast
-import google.generativeai as genai
 import os
 from datetime import datetime, timedelta
 import sqlite3
@@ -13,82 +12,88 @@ import json
 from flask_mail import Mail, Message
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 import threading
+import queue
 import re
 import bleach
-from functools import lru_cache
+import hashlib
+from urllib.parse import quote
 import io
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
+import logging
+
+from log_estruturado import configurar_logs, correlacao, novo_id_correlacao, CORRELACAO
 
 # ============================================
-# 🆕 V5.1: IMPORTAR SCRAPER AVA COM NOVAS FUNÇÕES
+# CARREGAR VARIÁVEIS DE AMBIENTE E LOGS
 # ============================================
-try:
-    from scraper_ava import (
-        sincronizar_dados_ava,
-        obter_ultima_sincronizacao,
-        usuario_tem_cache
-    )
-
-    SCRAPER_DISPONIVEL = True
-    print("✅ Scraper V5.1 carregado com sucesso!")
-except ImportError as e:
-    print(f"⚠️ AVISO: Scraper não disponível. Erro: {e}")
-    SCRAPER_DISPONIVEL = False
-
-
-    def sincronizar_dados_ava(user_id: int, *args, **kwargs) -> None:
-        print("Scraper não disponível.")
-        return None
-
-
-    def obter_ultima_sincronizacao(user_id: int) -> datetime | None:
-        return None
-
-
-    def usuario_tem_cache(user_id: int) -> bool:
-        return False
+# Antes dos demais imports: LOG_LEVEL/LOG_FORMATO/LOG_ARQUIVO podem vir do .env
+# e alguns módulos já logam ao serem importados
+load_dotenv()
+configurar_logs()
+logger = logging.getLogger(__name__)
+
+from carregamento_tardio import ModuloTardio, ObjetoTardio, modulo_disponivel
+from cache import CacheLRU
+from rate_limit import criar_rate_limiter
+from agendador_gemini import AgendadorGemini, CotaExcedida, estimar_tokens
+from lembretes import AgendadorLembretes
+from atualizacao_agendada import AtualizacaoAgendada, ler_janela
+from exportacao_notas import ExportacoesEmLote, GERADORES, descrever_erro_geracao
+from calendario_academico import CALENDARIO_ACADEMICO, DADOS_ACADEMICOS, HORARIOS_AULAS
+from migrar_banco_lyceum_v8 import migrar_tabelas_lyceum
+from telemetria import resumir_fases
+from metricas import (
+    REQUISICAO, ConexaoMedida, iniciar_requisicao, finalizar_requisicao, medir_externo, exportar_prometheus
+)
+from matchers import MATCHER_CALENDARIO, MATCHER_HORARIOS, RE_SEMANA, matcher_palavras_mensagem, remover_acentos
 
 # ============================================
-# 🆕 IMPORTAR SCRAPER LYCEUM V5.1
+# SCRAPERS AVA / LYCEUM (CARREGADOS SOB DEMANDA)
 # ============================================
-try:
-    from scraper_lyceum import (
-        sincronizar_dados_lyceum,
-        sincronizar_dados_lyceum_v2,
-        obter_ultima_sincronizacao_lyceum,
-        usuario_tem_cache_lyceum
-    )
-
-    LYCEUM_DISPONIVEL = True
-    print("✅ Scraper Lyceum V5.1 carregado com sucesso!")
-except ImportError as e:
-    print(f"⚠️ AVISO: Scraper Lyceum não disponível. Erro: {e}")
-    LYCEUM_DISPONIVEL = False
-
-
-    def sincronizar_dados_lyceum(user_id: int, *args, **kwargs) -> None:
-        print("Scraper Lyceum não disponível.")
+# Os scrapers importam Selenium e webdriver_manager, então só são carregados
+# quando uma sincronização começa. As consultas de estado (tem cache? última
+# sync?) vêm de estado_sincronizacao, que só usa sqlite.
+from estado_sincronizacao import (
+    usuario_tem_cache,
+    obter_ultima_sincronizacao,
+    usuario_tem_cache_lyceum,
+    obter_ultima_sincronizacao_lyceum
+)
+
+scraper_ava = ModuloTardio('scraper_ava')
+scraper_lyceum = ModuloTardio('scraper_lyceum')
+
+SCRAPER_DISPONIVEL = modulo_disponivel('scraper_ava', 'selenium', 'webdriver_manager', 'bs4', 'requests')
+LYCEUM_DISPONIVEL = modulo_disponivel('scraper_lyceum', 'selenium', 'webdriver_manager')
+if not SCRAPER_DISPONIVEL:
+    logger.warning("⚠️ AVISO: Scraper não disponível (dependências não instaladas)")
+if not LYCEUM_DISPONIVEL:
+    logger.warning("⚠️ AVISO: Scraper Lyceum não disponível (dependências não instaladas)")
+
+
+def sincronizar_dados_ava(user_id: int, *args, **kwargs) -> None:
+    if not SCRAPER_DISPONIVEL:
+        logger.warning("Scraper não disponível.")
         return None
+    return scraper_ava.sincronizar_dados_ava(user_id, *args, **kwargs)
+
 
-    def sincronizar_dados_lyceum_v2(user_id: int, *args, **kwargs) -> None:
-        print("Scraper Lyceum V2 não disponível.")
+def sincronizar_dados_lyceum(user_id: int, *args, **kwargs) -> Any:
+    if not LYCEUM_DISPONIVEL:
+        logger.warning("Scraper Lyceum não disponível.")
         return None
+    return scraper_lyceum.sincronizar_dados_lyceum(user_id, *args, **kwargs)
 
 
-    def obter_ultima_sincronizacao_lyceum(user_id: int) -> datetime | None:
+def sincronizar_dados_lyceum_v2(user_id: int, *args, **kwargs) -> Any:
+    if not LYCEUM_DISPONIVEL:
+        logger.warning("Scraper Lyceum V2 não disponível.")
         return None
+    return scraper_lyceum.sincronizar_dados_lyceum_v2(user_id, *args, **kwargs)
 
 
-    def usuario_tem_cache_lyceum(user_id: int) -> bool:
-        return False
-
 # ============================================
-# CARREGAR VARIÁVEIS DE AMBIENTE
+# APP FLASK
 # ============================================
-load_dotenv()
 app = FlaskApp(__name__)
 
 # ============================================
@@ -124,14 +129,16 @@ mail.init_app(cast(Any, app))
 s = URLSafeTimedSerializer(app.secret_key or 'chave_desenvolvimento_segura')
 
 if not GEMINI_API_KEY:
-    print("⚠️ AVISO: GEMINI_API_KEY não configurada no arquivo .env")
+    logger.warning("⚠️ AVISO: GEMINI_API_KEY não configurada no arquivo .env")
 
 # ============================================
 # CONFIGURAR GEMINI API
 # ============================================
+# O SDK só é importado (e configurado, uma única vez) na primeira chamada
+genai = ModuloTardio('google.generativeai', ao_carregar=lambda m: m.configure(api_key=GEMINI_API_KEY))
+
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-2.5-flash')
+    model = ObjetoTardio(lambda: genai.GenerativeModel('models/gemini-2.5-flash'))
     generation_config = {
         'temperature': 0.7,
         'top_p': 0.95,
@@ -141,44 +148,42 @@ if GEMINI_API_KEY:
 else:
     model = None
 
-# ============================================
-# CONTROLE DE RATE LIMITING
-# ============================================
-last_request_time = {}
-request_count = {}
+# Cota global (todas as rotas e alunos) do projeto no Gemini
+agendador_gemini = AgendadorGemini(
+    rpm=int(os.getenv('GEMINI_RPM', 15)),
+    tpm=int(os.getenv('GEMINI_TPM', 250000)),
+    espera_maxima=float(os.getenv('GEMINI_ESPERA_MAXIMA', 20))
+)
+MENSAGEM_COTA_GEMINI = "⏳ O assistente está com muita demanda agora. Tente novamente em {espera}s."
 
 
-def can_make_request(user_id, min_seconds=4, max_requests_per_minute=15):
-    current_time = time.time()
-    if user_id not in last_request_time:
-        last_request_time[user_id] = current_time
-        request_count[user_id] = {'count': 1, 'window_start': current_time}
-        return True
+def gerar_conteudo_gemini(modelo, prompt, usuario_id=None, **kwargs):
+    """generate_content passando antes pela fila/cota global do agendador_gemini"""
+    agendador_gemini.admitir(usuario_id, estimar_tokens(prompt))
+    with medir_externo('gemini'):
+        response = modelo.generate_content(prompt, **kwargs)
+    if not kwargs.get('stream') and response.parts:
+        agendador_gemini.registrar_tokens(estimar_tokens(response.text))
+    return response
 
-    time_diff = current_time - last_request_time[user_id]
-    if time_diff < min_seconds:
-        return False
+# ============================================
+# CONTROLE DE RATE LIMITING
+# ============================================
+rate_limiter = criar_rate_limiter(DATABASE)
 
-    if user_id in request_count:
-        window_elapsed = current_time - request_count[user_id]['window_start']
-        if window_elapsed > 60:
-            request_count[user_id] = {'count': 1, 'window_start': current_time}
-        else:
-            if request_count[user_id]['count'] >= max_requests_per_minute:
-                return False
-            request_count[user_id]['count'] += 1
 
-    last_request_time[user_id] = current_time
-    return True
+def resposta_rate_limit(espera, status=429, **campos):
+    """429 com Retry-After, mantendo as chaves que o front já entende (rate_limited / wait_time)"""
+    corpo = {'response': f'⏳ Aguarde {espera}s.', 'wait_time': espera, 'rate_limited': True}
+    corpo.update(campos)
+    resposta = jsonify(corpo)
+    resposta.status_code = status
+    resposta.headers['Retry-After'] = str(espera)
+    return resposta
 
 
-def get_wait_time(user_id):
-    if user_id not in last_request_time:
-        return 0
-    current_time = time.time()
-    time_diff = current_time - last_request_time[user_id]
-    wait_time = max(0, 4 - time_diff)
-    return int(wait_time)
+def identificador_rate_limit():
+    return session.get('user_id') or request.remote_addr
 
 
 # ============================================
@@ -195,8 +200,8 @@ def sanitizar_html(texto):
 # BANCO DE DADOS
 # ============================================
 def get_db_connection():
-    """Retorna uma conexão com o banco de dados."""
-    conn = sqlite3.connect(DATABASE)
+    """Retorna uma conexão com o banco de dados (consultas contadas nas métricas da requisição)."""
+    conn = sqlite3.connect(DATABASE, factory=ConexaoMedida)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -279,6 +284,15 @@ def init_db():
             ) 
         ''')
 
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS memoria_chat (
+                usuario_id INTEGER PRIMARY KEY,
+                resumo TEXT NOT NULL,
+                atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+            )
+        ''')
+
         c.execute(''' 
             CREATE TABLE IF NOT EXISTS eventos_calendario ( 
                 id INTEGER PRIMARY KEY AUTOINCREMENT, 
@@ -335,6 +349,33 @@ def init_db():
             ) 
         ''')
 
+        # Telemetria das sincronizações: uma linha por fase (ver telemetria.py)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS metricas_sync (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sync_id TEXT NOT NULL,
+                usuario_id INTEGER,
+                fonte TEXT NOT NULL,
+                fase TEXT NOT NULL,
+                duracao_ms REAL NOT NULL,
+                ok INTEGER DEFAULT 1,
+                memoria_mb REAL,
+                cpu_s REAL,
+                criado_em TEXT NOT NULL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_metricas_sync_fonte '
+                  'ON metricas_sync (fonte, criado_em)')
+
+        # Atualização agendada: uma linha por janela, reservada pelo processo que a executa
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS janelas_atualizacao (
+                inicio TEXT PRIMARY KEY,
+                processo TEXT NOT NULL,
+                reservado_em TEXT NOT NULL
+            )
+        ''')
+
         try:
             c.execute("SELECT tags FROM posts LIMIT 1")
         except sqlite3.OperationalError:
@@ -355,8 +396,50 @@ def init_db():
         except sqlite3.OperationalError:
             c.execute("ALTER TABLE usuarios ADD COLUMN senha_lyceum TEXT")
 
+        try:
+            c.execute("SELECT coordenador FROM usuarios LIMIT 1")
+        except sqlite3.OperationalError:
+            c.execute("ALTER TABLE usuarios ADD COLUMN coordenador INTEGER DEFAULT 0")
+
+        try:
+            c.execute("SELECT versao_dados_lyceum FROM usuarios LIMIT 1")
+        except sqlite3.OperationalError:
+            c.execute("ALTER TABLE usuarios ADD COLUMN versao_dados_lyceum INTEGER DEFAULT 0")
+
+        try:
+            c.execute("SELECT ultimo_acesso FROM usuarios LIMIT 1")
+        except sqlite3.OperationalError:
+            c.execute("ALTER TABLE usuarios ADD COLUMN ultimo_acesso TEXT")
+
+        try:
+            c.execute("SELECT ultima_atualizacao FROM conteudos_ava LIMIT 1")
+        except sqlite3.OperationalError:
+            c.execute("ALTER TABLE conteudos_ava ADD COLUMN ultima_atualizacao TEXT")
+
+        try:
+            c.execute("SELECT alerta_em FROM eventos_calendario LIMIT 1")
+        except sqlite3.OperationalError:
+            c.execute("ALTER TABLE eventos_calendario ADD COLUMN alerta_em TEXT")
+            c.execute("ALTER TABLE eventos_calendario ADD COLUMN alerta_enviado INTEGER DEFAULT 0")
+            # Eventos antigos: calcula o horário do alerta uma vez
+            c.execute('''
+                UPDATE eventos_calendario
+                SET alerta_em = datetime(data_evento || ' ' || COALESCE(NULLIF(hora_evento, ''), '08:00'),
+                                         printf('-%d minutes', COALESCE(minutos_antes_alerta, 0)))
+                WHERE alerta = 1
+            ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_eventos_calendario_alerta '
+                  'ON eventos_calendario (alerta_enviado, alerta_em)')
+
+        # Índices para as consultas por intervalo do calendário
+        c.execute('CREATE INDEX IF NOT EXISTS idx_eventos_calendario_usuario_data '
+                  'ON eventos_calendario (usuario_id, data_evento)')
+
         conn.commit()
-    print("✅ Banco de dados inicializado/verificado com sucesso!")
+
+        # Tabelas do Lyceum e índices únicos usados pelos UPSERTs da sincronização
+        migrar_tabelas_lyceum(conn)
+    logger.info("✅ Banco de dados inicializado/verificado com sucesso!")
 
 
 # ============================================
@@ -366,13 +449,16 @@ def criar_notificacao(usuario_id, tipo, mensagem, link=None):
     """Cria uma notificação para o usuário"""
     try:
         with get_db_connection() as conn:
-            conn.execute('''
+            cursor = conn.execute('''
                 INSERT INTO notificacoes (usuario_id, tipo, mensagem, link, lida)
                 VALUES (?, ?, ?, ?, 0)
             ''', (usuario_id, tipo, mensagem, link))
             conn.commit()
+        publicar_notificacao(usuario_id, {
+            'id': cursor.lastrowid, 'tipo': tipo, 'mensagem': mensagem, 'link': link
+        })
     except Exception as e:
-        print(f"[ERROR] Erro ao criar notificacao: {e}")
+        logger.error(f"[ERROR] Erro ao criar notificacao: {e}")
 
 
 @app.route('/api/notificacoes')
@@ -419,6 +505,14 @@ def buscar_notificacoes():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/notificacoes/stream')
+def stream_notificacoes():
+    """Envia as novas notificações do usuário via SSE assim que são criadas"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    return resposta_sse(transmitir_notificacoes(session['user_id']))
+
+
 @app.route('/api/notificacoes/marcar_lida', methods=['POST'])
 def marcar_notificacao_lida():
     """Marca notificação como lida"""
@@ -454,193 +548,389 @@ def marcar_todas_lidas():
 
 
 # ============================================
-# CACHE DE DADOS
+# PUSH DE NOTIFICAÇÕES (SSE)
+# ============================================
+# Cada aba aberta do dashboard assina /api/notificacoes/stream e recebe as
+# notificações na hora; o polling de 30s do front fica só como reserva.
+assinantes_notificacoes = {}  # usuario_id -> set de queue.Queue
+assinantes_lock = threading.Lock()
+
+
+def publicar_notificacao(usuario_id, dados):
+    with assinantes_lock:
+        filas = list(assinantes_notificacoes.get(usuario_id, ()))
+    for fila in filas:
+        fila.put(dados)
+
+
+def transmitir_notificacoes(usuario_id):
+    fila = queue.Queue()
+    with assinantes_lock:
+        assinantes_notificacoes.setdefault(usuario_id, set()).add(fila)
+    try:
+        yield ": conectado\n\n"
+        while True:
+            try:
+                yield formatar_evento_sse(fila.get(timeout=25))
+            except queue.Empty:
+                yield ": ping\n\n"  # mantém a conexão viva atrás de proxies
+    finally:
+        with assinantes_lock:
+            filas = assinantes_notificacoes.get(usuario_id)
+            if filas is not None:
+                filas.discard(fila)
+                if not filas:
+                    del assinantes_notificacoes[usuario_id]
+
+
+# ============================================
+# LEMBRETES DE EVENTOS (ALERTAS)
 # ============================================
-@lru_cache(maxsize=128)
-def get_eventos_cache_key(user_id, timestamp):
-    """Cache de eventos com invalidação por timestamp"""
+HORA_PADRAO_ALERTA = '08:00'  # eventos de dia inteiro avisam a partir deste horário
+ATRASO_MAXIMO_ALERTA = timedelta(days=1)  # alertas perdidos (servidor fora) mais velhos que isso são ignorados
+
+
+def calcular_alerta_em(data_evento, hora_evento, minutos_antes):
+    """Momento do disparo (datetime) ou None se a data/hora for inválida"""
+    try:
+        inicio = datetime.strptime(f"{data_evento} {hora_evento or HORA_PADRAO_ALERTA}"[:16], '%Y-%m-%d %H:%M')
+    except ValueError:
+        return None
+    return inicio - timedelta(minutes=int(minutos_antes or 0))
+
+
+def carregar_alertas_pendentes(desde, ate):
+    """Alertas ainda não enviados com desde < alerta_em <= ate (consulta indexada)"""
+    if desde is None:
+        desde = datetime.now() - ATRASO_MAXIMO_ALERTA
     with get_db_connection() as conn:
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta
+        rows = conn.execute('''
+            SELECT id, usuario_id, titulo, data_evento, hora_evento, alerta_em
             FROM eventos_calendario
-            WHERE usuario_id = ?
-            ORDER BY data_evento ASC
-        ''', (user_id,))
-        return c.fetchall()
+            WHERE alerta_enviado = 0 AND alerta = 1
+              AND alerta_em > ? AND alerta_em <= ?
+        ''', (desde.strftime('%Y-%m-%d %H:%M:%S'), ate.strftime('%Y-%m-%d %H:%M:%S'))).fetchall()
+    return [{
+        'evento_id': row['id'],
+        'usuario_id': row['usuario_id'],
+        'titulo': row['titulo'],
+        'data_evento': row['data_evento'],
+        'hora_evento': row['hora_evento'],
+        'quando': datetime.strptime(row['alerta_em'], '%Y-%m-%d %H:%M:%S')
+    } for row in rows]
+
+
+def disparar_lembrete(alerta):
+    """Marca o alerta como enviado (só uma vez, mesmo com vários processos) e notifica o aluno"""
+    with get_db_connection() as conn:
+        cursor = conn.execute(
+            'UPDATE eventos_calendario SET alerta_enviado = 1 WHERE id = ? AND alerta_enviado = 0',
+            (alerta['evento_id'],)
+        )
+        conn.commit()
+    if cursor.rowcount != 1:
+        return
 
+    data_br = datetime.strptime(alerta['data_evento'], '%Y-%m-%d').strftime('%d/%m')
+    quando = f"{data_br} às {alerta['hora_evento']}" if alerta['hora_evento'] else data_br
+    criar_notificacao(alerta['usuario_id'], 'lembrete', f"⏰ Lembrete: {alerta['titulo']} ({quando})", "/dashboard")
+    logger.info(f"[LEMBRETES] Alerta enviado: evento {alerta['evento_id']} (user {alerta['usuario_id']})")
 
-def limpar_cache_eventos():
-    """Limpa o cache de eventos"""
-    get_eventos_cache_key.cache_clear()
+
+agendador_lembretes = AgendadorLembretes(carregar_alertas_pendentes, disparar_lembrete)
 
 
 # ============================================
-# DADOS ACADÊMICOS
+# TAREFAS EM SEGUNDO PLANO (UMA VEZ POR PROCESSO)
 # ============================================
-DADOS_ACADEMICOS = """ 
-INFORMAÇÕES DA UNIEVANGELICA - CURSO DE INTELIGÊNCIA ARTIFICIAL 
-Data de Atualização: 2025 
+# Lembretes e atualização agendada são iniciados na primeira requisição de
+# cada processo que atende o app, seja no `python app.py` (só o filho do
+# reloader recebe requisições) ou em cada worker de um servidor WSGI. Nada se
+# perde até lá: a primeira carga do agendador inclui os alertas atrasados. Com
+# vários workers, cada alerta é marcado no banco só uma vez e cada janela de
+# atualização é reservada por um só processo (reservar_janela_atualizacao).
+_tarefas_iniciadas = False
+_tarefas_lock = threading.Lock()
+
+
+def iniciar_tarefas_segundo_plano():
+    global _tarefas_iniciadas
+    with _tarefas_lock:
+        if _tarefas_iniciadas:
+            return
+        _tarefas_iniciadas = True
+    try:
+        agendador_lembretes.iniciar()
+        if os.getenv('ATUALIZACAO_AGENDADA', '1') != '0' and (SCRAPER_DISPONIVEL or LYCEUM_DISPONIVEL):
+            atualizacao_agendada.iniciar()
+    except Exception as e:
+        logger.error(f"[TAREFAS] Erro ao iniciar as tarefas em segundo plano: {e}")
 
-HORÁRIOS DAS AULAS - SEMESTRE 2025.2 
-SEGUNDA-FEIRA: 
-• 19:00 - 20:40: Cidadania ética e espiritualidade 
-• 21:00 - 22:40: Fundamentos matemáticos para computação 
 
-TERÇA-FEIRA: 
-• 19:00 - 22:40: Introdução a engenharia de soluções 
+@app.before_request
+def garantir_tarefas_segundo_plano():
+    if not _tarefas_iniciadas:
+        iniciar_tarefas_segundo_plano()
 
-QUARTA-FEIRA: 
-• 19:00 - 22:40: Fundamentos matemáticos para computação 
 
-QUINTA-FEIRA: 
-• 19:00 - 22:40: Fundamentos de computação e infraestrutura 
+# ============================================
+# CACHE DE DADOS
+# ============================================
+# Calendário já serializado (JSON pronto + ETag) por (usuário, início, fim).
+# Criar/excluir evento ou sincronizar o Lyceum invalida só o usuário afetado.
+cache_calendario = CacheLRU(max_itens=2000, max_bytes=32 * 1024 * 1024, ttl=3600)
+
 
-SEXTA-FEIRA: 
-• 19:00 - 22:40: Fundamento de engenharia de dados 
+def limpar_cache_eventos(user_id):
+    """Descarta todos os intervalos em cache do calendário de um usuário"""
+    cache_calendario.invalidar_onde(lambda chave, _: chave[0] == user_id)
 
-EAD: 
-• Introdução a língua portuguesa (modalidade online) 
 
-DISCIPLINAS DO CURSO: 
-1. Cidadania ética e espiritualidade 
-2. Introdução a engenharia de soluções 
-3. Fundamentos matemáticos para computação 
-4. Fundamentos de computação e infraestrutura 
-5. Fundamentos de engenharia de dados 
-6. Leitura e interpretação de texto 
+# ============================================
+# CACHE DE RESPOSTAS DO CHAT
+# ============================================
+# Só perguntas de calendário/grade que não citam o AVA nem a conversa anterior
+# são cacheáveis, e para elas o chat monta um prompt geral, sem nenhum dado do
+# aluno (nome, curso, resumo, histórico, AVA): a resposta vale para qualquer
+# aluno que pergunte o mesmo. Chave = pergunta normalizada + hash das seções
+# compartilhadas; se o calendário ou a grade mudam, o hash muda e a entrada
+# antiga deixa de ser encontrada (e expira pelo TTL / LRU).
+CACHE_RESPOSTAS_TTL = int(os.getenv('CACHE_RESPOSTAS_TTL', 6 * 3600))
+CACHE_RESPOSTAS_MAX_PERGUNTA = 200
+cache_respostas_chat = CacheLRU(max_itens=1000, max_bytes=8 * 1024 * 1024, ttl=CACHE_RESPOSTAS_TTL)
+
+
+def normalizar_pergunta(texto):
+    """Minúsculas, sem acentos, sem pontuação e com espaços colapsados"""
+    texto = remover_acentos(texto.lower())
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def chave_cache_resposta(mensagem, contexto):
+    """Retorna a chave do cache ou None se a pergunta não deve ser cacheada"""
+    if not contexto.get('cacheavel') or len(mensagem) > CACHE_RESPOSTAS_MAX_PERGUNTA:
+        return None
+    pergunta = normalizar_pergunta(mensagem)
+    if not pergunta:
+        return None
+    digest = hashlib.sha1('\x1f'.join(contexto['secoes']).encode('utf-8')).hexdigest()
+    return (pergunta, digest)
 
-CORPO DOCENTE: 
-• Coordenadora: Natasha Sophie Campos 
-• Prof. Holehon Santos Campos - Cidadania ética 
-• Prof. Eder José Almeida da Silva - Eng. de soluções 
-• Prof. Henrique Valle de Lima - Fundamentos matemáticos 
-• Prof. Jeferson Silva Araújo - Computação e infraestrutura 
-• Prof. Fábio Pereira Botelho - Engenharia de dados 
-• Prof. Leonardo Rodrigues de Souza - Leitura e interpretação 
 
-CALENDÁRIO DE PROVAS 2025.2: 
-• 1ª VA: 15 a 20 de Setembro 
-• 2ª VA: 27 de Outubro a 01 de Novembro 
-• 3ª VA: 08 a 13 de Dezembro 
-• Substitutivas 1ª e 2ª VA: 11 e 12 de Novembro 
-• Substitutivas 3ª VA: 16 e 17 de Dezembro 
-"""
+def buscar_resposta_cache(chave):
+    if chave is None:
+        return None
+    resposta = cache_respostas_chat.get(chave)
+    if resposta is not None:
+        logger.debug(f"[CACHE CHAT] Hit para '{chave[0][:40]}' ({cache_respostas_chat.estatisticas()['hit_rate']:.0%} hit rate)")
+    return resposta
 
-HORARIOS_AULAS = {
-    'Segunda-feira': [
-        {'horario': '19:00 - 20:40', 'disciplina': 'Cidadania ética e espiritualidade',
-         'professor': 'Holehon Santos Campos'},
-        {'horario': '21:00 - 22:40', 'disciplina': 'Fundamentos matemáticos para computação',
-         'professor': 'Henrique Valle de Lima'}
-    ],
-    'Terça-feira': [
-        {'horario': '19:00 - 22:40', 'disciplina': 'Introdução a engenharia de soluções',
-         'professor': 'Eder José Almeida da Silva'}
-    ],
-    'Quarta-feira': [
-        {'horario': '19:00 - 22:40', 'disciplina': 'Fundamentos matemáticos para computação',
-         'professor': 'Henrique Valle de Lima'}
-    ],
-    'Quinta-feira': [
-        {'horario': '19:00 - 22:40', 'disciplina': 'Fundamentos de computação e infraestrutura',
-         'professor': 'Jeferson Silva Araújo'}
-    ],
-    'Sexta-feira': [
-        {'horario': '19:00 - 22:40', 'disciplina': 'Fundamento de engenharia de dados',
-         'professor': 'Fábio Pereira Botelho'}
-    ],
-    'EAD': [
-        {'horario': 'Online', 'disciplina': 'Leitura e interpretação de texto',
-         'professor': 'Leonardo Rodrigues de Souza'}
-    ]
-}
 
-EVENTOS_ACADEMICOS = [
-    {'title': '🎉 Feriado Municipal', 'start': '2025-07-26', 'color': '#e63946', 'tipo': 'feriado', 'allDay': True},
-    {'title': '🎓 Colação de Grau Unificada', 'start': '2025-07-30', 'color': '#4a90e2', 'tipo': 'evento',
-     'allDay': True},
-    {'title': '🎂 Aniversário de Anápolis', 'start': '2025-07-31', 'color': '#e63946', 'tipo': 'feriado',
-     'allDay': True},
-    {'title': '📚 INÍCIO DAS AULAS', 'start': '2025-08-04', 'color': '#28a745', 'tipo': 'importante', 'allDay': True},
-    {'title': '🎓 Dia do Estudante', 'start': '2025-08-11', 'color': '#ffc107', 'tipo': 'comemorativo', 'allDay': True},
-    {'title': '🏆 Prêmio Mérito Científico', 'start': '2025-08-19', 'color': '#4a90e2', 'tipo': 'evento',
-     'allDay': True},
-    {'title': '⚠️ Inclusão/Exclusão Disciplinas', 'start': '2025-08-29', 'color': '#ff6b6b', 'tipo': 'prazo',
-     'allDay': True},
-    {'title': '🇧🇷 Independência do Brasil', 'start': '2025-09-07', 'color': '#e63946', 'tipo': 'feriado',
-     'allDay': True},
-    {'title': '📝 INÍCIO 1ª VA', 'start': '2025-09-15', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 1ª VA', 'start': '2025-09-16', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 1ª VA', 'start': '2025-09-17', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 1ª VA', 'start': '2025-09-18', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 1ª VA', 'start': '2025-09-19', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 FIM 1ª VA', 'start': '2025-09-20', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '⏰ Lançamento notas 1ª VA', 'start': '2025-10-03', 'color': '#ff6b6b', 'tipo': 'prazo', 'allDay': True},
-    {'title': '🇧🇷 Nossa Senhora Aparecida', 'start': '2025-10-12', 'color': '#e63946', 'tipo': 'feriado',
-     'allDay': True},
-    {'title': '👨‍🏫 Dia do Professor', 'start': '2025-10-15', 'color': '#ffc107', 'tipo': 'comemorativo',
-     'allDay': True},
-    {'title': '📝 INÍCIO 2ª VA', 'start': '2025-10-27', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 2ª VA', 'start': '2025-10-28', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 2ª VA', 'start': '2025-10-29', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 2ª VA', 'start': '2025-10-30', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '⚠️ Trancamento de Matrícula', 'start': '2025-10-31', 'color': '#ff6b6b', 'tipo': 'prazo',
-     'allDay': True},
-    {'title': '📝 FIM 2ª VA', 'start': '2025-11-01', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🕯️ Finados', 'start': '2025-11-02', 'color': '#e63946', 'tipo': 'feriado', 'allDay': True},
-    {'title': '🔄 Substitutivas 1ª e 2ª VA', 'start': '2025-11-11', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🔄 Substitutivas 1ª e 2ª VA', 'start': '2025-11-12', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🇧🇷 Proclamação da República', 'start': '2025-11-15', 'color': '#e63946', 'tipo': 'feriado',
-     'allDay': True},
-    {'title': '✊ Consciência Negra', 'start': '2025-11-20', 'color': '#e63946', 'tipo': 'feriado', 'allDay': True},
-    {'title': '📝 INÍCIO 3ª VA', 'start': '2025-12-08', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 3ª VA', 'start': '2025-12-09', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 3ª VA', 'start': '2025-12-10', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 3ª VA', 'start': '2025-12-11', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 3ª VA', 'start': '2025-12-12', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '📝 FIM 3ª VA', 'start': '2025-12-13', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🔄 Substitutivas 3ª VA', 'start': '2025-12-16', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🔄 Substitutivas 3ª VA', 'start': '2025-12-17', 'color': '#dc3545', 'tipo': 'prova', 'allDay': True},
-    {'title': '🎄 Natal', 'start': '2025-12-25', 'color': '#e63946', 'tipo': 'feriado', 'allDay': True},
-    {'title': '🎆 Ano Novo', 'start': '2026-01-01', 'color': '#e63946', 'tipo': 'feriado', 'allDay': True},
-]
+def guardar_resposta_cache(chave, resposta):
+    if chave is None or not resposta:
+        return
+    cache_respostas_chat.set(chave, resposta)
 
 
 def executar_sincronizacao_monitorada(user_id, matricula, cpf, forcar=False):
     """V5.1: Sincronização AVA em thread"""
-    try:
-        print(f"[SYNC AVA] Iniciando sync para ID {user_id}")
-        status_sincronizacao[user_id] = 'em_andamento'
-        sincronizacoes_em_andamento[user_id] = True
+    with correlacao():
+        try:
+            logger.info(f"[SYNC AVA] Iniciando sync para ID {user_id}")
+            status_sincronizacao[user_id] = 'em_andamento'
+            sincronizacoes_em_andamento[user_id] = True
 
-        sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=forcar)
+            sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=forcar)
+            invalidar_contexto_chat(user_id)
+
+            logger.info(f"[SYNC AVA] Sync finalizado para ID {user_id}")
+            status_sincronizacao[user_id] = 'concluido'
+            sincronizacoes_em_andamento[user_id] = False
+        except Exception as e:
+            logger.exception(f"[ERROR AVA] Erro no sync: {e}")
+            status_sincronizacao[user_id] = 'erro'
+            sincronizacoes_em_andamento[user_id] = False
 
-        print(f"[SYNC AVA] Sync finalizado para ID {user_id}")
-        status_sincronizacao[user_id] = 'concluido'
-        sincronizacoes_em_andamento[user_id] = False
-    except Exception as e:
-        print(f"[ERROR AVA] Erro no sync: {e}")
-        status_sincronizacao[user_id] = 'erro'
-        sincronizacoes_em_andamento[user_id] = False
+
+def notificar_alteracoes_lyceum(user_id, resumo):
+    """Uma notificação por nota nova/alterada ou frequência abaixo do limite (ver alteracoes_lyceum.py)"""
+    for alteracao in (resumo or {}).get('alteracoes', []):
+        tipo = 'frequencia' if alteracao['tipo'] == 'frequencia_baixa' else 'nota'
+        criar_notificacao(user_id, tipo, alteracao['mensagem'], '/dashboard')
 
 
 def executar_sincronizacao_monitorada_lyceum(user_id, matricula, senha_lyceum, forcar=False):
     """V5.1: Sincronização Lyceum em thread"""
+    with correlacao():
+        try:
+            logger.info(f"[SYNC LYCEUM] Iniciando sync para ID {user_id}")
+            status_sincronizacao_lyceum[user_id] = 'em_andamento'
+            sincronizacoes_em_andamento_lyceum[user_id] = True
+
+            resumo = sincronizar_dados_lyceum_v2(user_id, matricula, senha_lyceum, forcar_atualizacao=forcar)
+            notificar_alteracoes_lyceum(user_id, resumo)
+            invalidar_contexto_chat(user_id)
+            limpar_cache_eventos(user_id)
+            cache_exportacoes.invalidar_onde(lambda chave, _: chave[0] == user_id)
+
+            logger.info(f"[SYNC LYCEUM] Sync finalizado para ID {user_id}")
+            status_sincronizacao_lyceum[user_id] = 'concluido'
+            sincronizacoes_em_andamento_lyceum[user_id] = False
+        except Exception as e:
+            logger.exception(f"[ERROR LYCEUM] Erro no sync: {e}")
+            status_sincronizacao_lyceum[user_id] = 'erro'
+            sincronizacoes_em_andamento_lyceum[user_id] = False
+
+
+# ============================================
+# LOGS E MÉTRICAS POR REQUISIÇÃO
+# ============================================
+# Cada requisição ganha um id de correlação (logs) e uma medição: tempo
+# total, consultas SQL (via get_db_connection) e chamadas externas, somados
+# nos histogramas de metricas.py e expostos em /metrics para o Prometheus.
+@app.before_request
+def iniciar_metricas_requisicao():
+    iniciar_requisicao()
+
+
+@app.before_request
+def definir_correlacao():
+    """Id da requisição nos logs (reaproveita o X-Request-ID do proxy, se houver)"""
+    CORRELACAO.set(request.headers.get('X-Request-ID') or novo_id_correlacao())
+
+
+@app.after_request
+def devolver_correlacao(resposta):
+    resposta.headers['X-Request-ID'] = CORRELACAO.get()
+    return resposta
+
+
+@app.after_request
+def registrar_metricas_requisicao(resposta):
+    rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+    if resposta.is_streamed:
+        # SSE e arquivos: o tempo (e o Gemini chamado dentro do gerador) só
+        # termina quando o corpo acaba de ser enviado ou o cliente desconecta
+        medicao = REQUISICAO.get()
+        if medicao is not None:
+            metodo, status = request.method, resposta.status_code
+            resposta.call_on_close(lambda: finalizar_requisicao(rota, metodo, status, medicao))
+        return resposta
+    finalizar_requisicao(rota, request.method, resposta.status_code)
+    return resposta
+
+
+@app.route('/metrics')
+def metrics():
+    """Formato texto do Prometheus; só para quem acessa da própria máquina (sem proxy no meio)"""
+    if request.remote_addr not in ('127.0.0.1', '::1') or request.headers.get('X-Forwarded-For'):
+        return jsonify({'error': 'Não encontrado'}), 404
+    return Response(exportar_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ============================================
+# ATUALIZAÇÃO AGENDADA (LYCEUM / AVA)
+# ============================================
+# Sincroniza de madrugada quem tem dados velhos (ver atualizacao_agendada.py),
+# para o pico de cliques depois de uma publicação de notas encontrar os
+# dados já atualizados. Reaproveita as mesmas funções do botão de sincronizar.
+INTERVALO_REGISTRO_ACESSO = 3600  # grava usuarios.ultimo_acesso no máximo 1x por hora
+# Quem já teve o acesso gravado nesta hora; a entrada expira com o intervalo e,
+# se o LRU descartar alguém antes, o custo é só um UPDATE a mais
+acessos_registrados = CacheLRU(max_itens=5000, ttl=INTERVALO_REGISTRO_ACESSO)
+
+
+def data_ou_none(valor):
     try:
-        print(f"[SYNC LYCEUM] Iniciando sync para ID {user_id}")
-        status_sincronizacao_lyceum[user_id] = 'em_andamento'
-        sincronizacoes_em_andamento_lyceum[user_id] = True
+        return datetime.fromisoformat(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
 
-        sincronizar_dados_lyceum_v2(user_id, matricula, senha_lyceum, forcar_atualizacao=forcar)
 
-        print(f"[SYNC LYCEUM] Sync finalizado para ID {user_id}")
-        status_sincronizacao_lyceum[user_id] = 'concluido'
-        sincronizacoes_em_andamento_lyceum[user_id] = False
+def registrar_acesso(user_id):
+    if acessos_registrados.get(user_id):
+        return
+    acessos_registrados.set(user_id, True)
+    try:
+        with get_db_connection() as conn:
+            conn.execute('UPDATE usuarios SET ultimo_acesso = ? WHERE id = ?', (datetime.now().isoformat(), user_id))
+            conn.commit()
     except Exception as e:
-        print(f"[ERROR LYCEUM] Erro no sync: {e}")
-        status_sincronizacao_lyceum[user_id] = 'erro'
-        sincronizacoes_em_andamento_lyceum[user_id] = False
+        logger.error(f"[ERROR] Erro ao registrar acesso: {e}")
+
+
+@app.before_request
+def registrar_ultimo_acesso():
+    if 'user_id' in session:
+        registrar_acesso(session['user_id'])
+
+
+def listar_candidatos_atualizacao():
+    with get_db_connection() as conn:
+        rows = conn.execute('''
+            SELECT u.id, u.matricula, u.cpf, u.senha_lyceum, u.ultimo_acesso, u.ultima_atualizacao_lyceum,
+                   (SELECT MAX(ultima_atualizacao) FROM conteudos_ava WHERE usuario_id = u.id) AS ultima_ava
+            FROM usuarios u
+            WHERE u.ultimo_acesso IS NOT NULL AND u.matricula IS NOT NULL
+              AND (u.cpf IS NOT NULL OR u.senha_lyceum IS NOT NULL)
+        ''').fetchall()
+    candidatos = []
+    for row in rows:
+        fontes = []
+        if LYCEUM_DISPONIVEL and (row['senha_lyceum'] or row['cpf']):
+            fontes.append('lyceum')
+        if SCRAPER_DISPONIVEL and row['cpf']:
+            fontes.append('ava')
+        candidatos.append({
+            'usuario_id': row['id'],
+            'matricula': row['matricula'],
+            'cpf': row['cpf'],
+            'senha_lyceum': row['senha_lyceum'] or row['cpf'],
+            'ultimo_acesso': data_ou_none(row['ultimo_acesso']),
+            'ultima_lyceum': data_ou_none(row['ultima_atualizacao_lyceum']),
+            'ultima_ava': data_ou_none(row['ultima_ava']),
+            'fontes': tuple(fontes),
+        })
+    return candidatos
+
+
+def atualizar_usuario_agendado(candidato, fonte):
+    user_id = candidato['usuario_id']
+    if fonte == 'lyceum':
+        if sincronizacoes_em_andamento_lyceum.get(user_id):
+            return
+        executar_sincronizacao_monitorada_lyceum(user_id, candidato['matricula'], candidato['senha_lyceum'], True)
+    else:
+        if sincronizacoes_em_andamento.get(user_id):
+            return
+        executar_sincronizacao_monitorada(user_id, candidato['matricula'], candidato['cpf'], True)
+
+
+def reservar_janela_atualizacao(inicio):
+    """Só um processo (worker) executa cada janela: o primeiro a inserir a linha dela"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO janelas_atualizacao (inicio, processo, reservado_em) VALUES (?, ?, ?)',
+                (inicio.isoformat(), f"pid {os.getpid()}", datetime.now().isoformat())
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+    except sqlite3.OperationalError as e:
+        logger.error(f"[ATUALIZAÇÃO] Não foi possível reservar a janela: {e}")
+        return False
+
+
+atualizacao_agendada = AtualizacaoAgendada(
+    listar_candidatos_atualizacao,
+    atualizar_usuario_agendado,
+    janela=ler_janela(os.getenv('ATUALIZACAO_JANELA', '2-6')),
+    simultaneas=int(os.getenv('ATUALIZACAO_SIMULTANEAS', 2)),
+    intervalo_minimo=timedelta(hours=float(os.getenv('ATUALIZACAO_INTERVALO_HORAS', 20))),
+    dias_inativo=int(os.getenv('ATUALIZACAO_DIAS_INATIVO', 14)),
+    reservar_janela=reservar_janela_atualizacao,
+)
 
 
 def gerar_notas_ficticias(usuario_id):
@@ -703,9 +993,108 @@ def salvar_historico_chat(usuario_id, mensagem, resposta):
                 INSERT INTO historico_chat (usuario_id, mensagem, resposta) 
                 VALUES (?, ?, ?) 
             ''', (usuario_id, mensagem, resposta))
+            historico_id = c.lastrowid
             conn.commit()
+        registrar_turno_contexto(usuario_id, mensagem, resposta)
+        agendar_atualizacao_memoria(usuario_id, historico_id, mensagem, resposta)
+    except Exception as e:
+        logger.error(f"[ERROR] Erro ao salvar historico: {e}")
+
+
+# ============================================
+# MEMÓRIA RESUMIDA DA CONVERSA
+# ============================================
+# O prompt leva um resumo curto de toda a conversa + só as últimas trocas na
+# íntegra. O resumo é refeito em segundo plano depois de cada resposta. A
+# gravação só acontece se a troca que originou o resumo ainda estiver no
+# histórico: se o aluno limpou a conversa enquanto o Gemini resumia, o resumo
+# antigo é descartado em vez de voltar para memoria_chat.
+MEMORIA_MAX_CARACTERES = 1200
+_locks_memoria = {}
+_locks_memoria_guard = threading.Lock()
+
+
+def _lock_memoria(usuario_id):
+    with _locks_memoria_guard:
+        return _locks_memoria.setdefault(usuario_id, threading.Lock())
+
+
+def obter_resumo_conversa(usuario_id):
+    with get_db_connection() as conn:
+        row = conn.execute('SELECT resumo FROM memoria_chat WHERE usuario_id = ?', (usuario_id,)).fetchone()
+    return row['resumo'] if row else ''
+
+
+def resumo_basico(turnos):
+    """Resumo sem IA: só as perguntas (truncadas), da mais antiga para a mais recente"""
+    perguntas = [f"- {t['mensagem'][:150]}" for t in turnos if t.get('mensagem')]
+    if not perguntas:
+        return ''
+    return ("Perguntas anteriores do aluno:\n" + '\n'.join(perguntas))[-MEMORIA_MAX_CARACTERES:]
+
+
+def resumir_conversa(usuario_id, resumo_atual, mensagem, resposta):
+    """Incorpora a última troca ao resumo usando o Gemini (ou resumo_basico sem modelo)"""
+    if not model:
+        linhas = [l for l in (resumo_atual or '').split('\n') if l.startswith('- ')]
+        turnos = [{'mensagem': l[2:]} for l in linhas] + [{'mensagem': mensagem}]
+        return resumo_basico(turnos)
+
+    prompt = f"""
+Atualize o resumo de uma conversa entre um aluno e um assistente acadêmico.
+
+RESUMO ATUAL:
+{resumo_atual or '(vazio)'}
+
+NOVA TROCA:
+Aluno: {mensagem[:1000]}
+Assistente: {resposta[:2000]}
+
+Escreva o novo resumo em português, em no máximo 120 palavras, com tópicos curtos:
+assuntos e disciplinas tratados, dúvidas em aberto, preferências e combinados do aluno.
+Não inclua saudações nem repita respostas longas. Responda apenas com o resumo.
+"""
+    # Resumo é tarefa de fundo: com alunos esperando na fila, não disputa a cota
+    if agendador_gemini.tamanho_fila() > 0:
+        return resumo_atual
+    response = gerar_conteudo_gemini(model, prompt, usuario_id, safety_settings=SAFETY_SETTINGS)
+    if not response.parts:
+        return resumo_atual
+    return response.text.strip()[:MEMORIA_MAX_CARACTERES]
+
+
+def atualizar_memoria_chat(usuario_id, historico_id, mensagem, resposta):
+    """Roda em thread: recalcula o resumo e grava em memoria_chat (e no snapshot em cache)"""
+    try:
+        with _lock_memoria(usuario_id):
+            novo_resumo = resumir_conversa(usuario_id, obter_resumo_conversa(usuario_id), mensagem, resposta)
+            if not novo_resumo:
+                return
+
+            with get_db_connection() as conn:
+                # Condição e escrita no mesmo comando: não há janela para o DELETE de limpar_historico
+                gravado = conn.execute('''
+                    INSERT INTO memoria_chat (usuario_id, resumo, atualizado_em)
+                    SELECT ?, ?, CURRENT_TIMESTAMP
+                    WHERE EXISTS (SELECT 1 FROM historico_chat WHERE id = ? AND usuario_id = ?)
+                    ON CONFLICT(usuario_id) DO UPDATE SET
+                        resumo = excluded.resumo,
+                        atualizado_em = excluded.atualizado_em
+                ''', (usuario_id, novo_resumo, historico_id, usuario_id)).rowcount
+                conn.commit()
+            if not gravado:
+                logger.debug(f"[MEMORIA] Histórico do user {usuario_id} foi limpo; resumo descartado")
+                return
+
+            cache_contexto_chat.atualizar(usuario_id, lambda s: dict(s, resumo=novo_resumo))
     except Exception as e:
-        print(f"[ERROR] Erro ao salvar historico: {e}")
+        logger.error(f"[MEMORIA] Erro ao atualizar resumo do user {usuario_id}: {e}")
+
+
+def agendar_atualizacao_memoria(usuario_id, historico_id, mensagem, resposta):
+    thread = threading.Thread(target=atualizar_memoria_chat, args=(usuario_id, historico_id, mensagem, resposta))
+    thread.daemon = True
+    thread.start()
 
 
 def montar_contexto_comunidade(limite_posts=6):
@@ -754,7 +1143,7 @@ def montar_contexto_comunidade(limite_posts=6):
 
             return "\n".join(bloco)
     except Exception as e:
-        print(f"[ERROR] Erro ao montar contexto: {e}")
+        logger.error(f"[ERROR] Erro ao montar contexto: {e}")
         return "Não foi possível carregar dúvidas."
 
 
@@ -791,17 +1180,214 @@ def criar_evento_rapido_via_chat(usuario_id, mensagem):
             ''', (usuario_id, titulo, 'Criado via chat', data_evento, hora_evento, 'pessoal', '#4a90e2', 0, 30))
             conn.commit()
 
-        limpar_cache_eventos()
+        limpar_cache_eventos(usuario_id)
 
         if hora_evento:
             return f"[OK] Evento criado: **{titulo}** em **{data_evento} as {hora_evento}**."
         else:
             return f"[OK] Evento criado: **{titulo}** em **{data_evento}**."
     except Exception as e:
-        print(f"[ERROR] Erro ao criar evento: {e}")
+        logger.error(f"[ERROR] Erro ao criar evento: {e}")
         return "[ERROR] Erro ao criar evento."
 
 
+# ============================================
+# RESPOSTAS DIRETAS (SEM IA)
+# ============================================
+# Perguntas estruturadas sobre aulas, VAs e feriados são respondidas direto
+# do banco / calendário. Só perguntas abertas seguem para o Gemini.
+DIAS_SEMANA = {
+    'segunda': (1, 'Segunda-feira'),
+    'terca': (2, 'Terça-feira'),
+    'quarta': (3, 'Quarta-feira'),
+    'quinta': (4, 'Quinta-feira'),
+    'sexta': (5, 'Sexta-feira'),
+    'sabado': (6, 'Sábado'),
+    'domingo': (7, 'Domingo'),
+}
+NOMES_DIAS = {num: nome for num, nome in DIAS_SEMANA.values()}
+INTENCAO_MAX_CARACTERES = 80
+
+# Dia da semana só como referência a um dia: "na segunda", "segunda feira" ou
+# no fim da pergunta ("tenho aula quinta"); nunca como ordinal ("segunda va",
+# "segunda chamada", "na segunda aula")
+DIA_SEMANA = r'(segunda|terca|quarta|quinta|sexta|sabado|domingo)'
+NAO_ORDINAL = r'(?!\s+(?:a\s+)?(?:va|chamada|prova|verificacao|avaliacao|etapa|fase|semana|unidade|parte|aula|vez)\b)'
+RE_INTENCAO_AULA = re.compile(
+    r'\b(?:aula|aulas|materia|materias|disciplina|disciplinas)\b.*?'
+    r'(?:\b(hoje|amanha)\b'
+    r'|\b(?:na|no|nesta|neste|nessa|nesse|esta|essa|proxima|proximo|toda|todo)\s+' + DIA_SEMANA +
+    r'(?:\s+feira)?\b' + NAO_ORDINAL +
+    r'|\b' + DIA_SEMANA + r'\s+feira\b' + NAO_ORDINAL +
+    r'|\b' + DIA_SEMANA + r'$)'
+)
+# "2ª VA", "2 va", "VA2", "va 2" (a mesma grafia que matchers.RE_VA aceita)
+RE_INTENCAO_VA = re.compile(r'\b(?:([123])\s*(?:a|o)?\s*va|va\s*([123]))\b')
+RE_INTENCAO_SUBSTITUTIVA = re.compile(r'\bsubstitutiva')
+RE_INTENCAO_FERIADO = re.compile(r'\b(?:proximo|quando|qual)\b.*\bferiado\b')
+# Só pedidos explícitos de data: "qual" sozinho também abre "qual minha nota..."
+RE_PERGUNTA_DATA = re.compile(
+    r'\b(?:quando|que dia|em que dia|qual (?:a |e a |sera a )?data|quais (?:as |sao as )?datas'
+    r'|datas? d[aeo]s?|comeca|termina)\b'
+)
+# Nota, conteúdo ou resumo: a resposta depende do aluno ou do AVA, vai para o Gemini
+RE_PERGUNTA_ABERTA = re.compile(
+    r'\b(?:nota|notas|media|medias|conteudo|conteudos|visto|vista|vimos|resum\w*|explic\w*|estud\w*)\b'
+)
+
+
+def formatar_data_br(data_iso):
+    return datetime.strptime(data_iso, '%Y-%m-%d').strftime('%d/%m/%Y')
+
+
+def aulas_do_dia(user_id, dia_num):
+    """Aulas do aluno em um dia da semana (1 = segunda): horarios_aluno com fallback em HORARIOS_AULAS"""
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('''
+                SELECT disciplina, horario_inicio, horario_fim, local, professor
+                FROM horarios_aluno
+                WHERE usuario_id = ? AND dia_semana = ?
+                ORDER BY horario_inicio
+            ''', (user_id, dia_num)).fetchall()
+            tem_grade = rows or conn.execute(
+                'SELECT 1 FROM horarios_aluno WHERE usuario_id = ? LIMIT 1', (user_id,)
+            ).fetchone()
+    except sqlite3.OperationalError:
+        # Tabela ainda não criada pelo scraper
+        rows, tem_grade = [], None
+
+    if tem_grade:
+        return [{
+            'horario': f"{r['horario_inicio']} - {r['horario_fim']}" if r['horario_inicio'] and r['horario_fim'] else "A definir",
+            'disciplina': r['disciplina'],
+            'professor': r['professor'] or '',
+            'local': r['local'] or ''
+        } for r in rows]
+
+    return HORARIOS_AULAS.get(NOMES_DIAS.get(dia_num, ''), [])
+
+
+def feriados_do_aluno(user_id):
+    """Feriados (data ISO, título) do calendario_lyceum somados aos do calendário acadêmico fixo"""
+    feriados = {e['start']: e['title'] for e in CALENDARIO_ACADEMICO.do_tipo('feriado')}
+    try:
+        with get_db_connection() as conn:
+            for row in conn.execute('''
+                SELECT titulo, data_evento FROM calendario_lyceum
+                WHERE usuario_id = ? AND tipo = 'feriado'
+            ''', (user_id,)):
+                feriados.setdefault(row['data_evento'], row['titulo'])
+    except sqlite3.OperationalError:
+        pass
+    return sorted(feriados.items())
+
+
+def responder_aula_dia(user_id, termo_dia):
+    hoje = datetime.now()
+    if termo_dia in ('hoje', 'amanha'):
+        data = hoje + timedelta(days=1 if termo_dia == 'amanha' else 0)
+        dia_num = data.isoweekday()
+        rotulo = f"{'Hoje' if termo_dia == 'hoje' else 'Amanhã'} ({NOMES_DIAS[dia_num].lower()}, {data.strftime('%d/%m')})"
+    else:
+        dia_num, nome_dia = DIAS_SEMANA[termo_dia]
+        rotulo = f"Na {nome_dia.lower()}" if dia_num < 6 else f"No {nome_dia.lower()}"
+
+    aulas = aulas_do_dia(user_id, dia_num)
+    if not aulas:
+        return f"📅 {rotulo} você **não tem aulas** presenciais."
+
+    linhas = [f"📅 {rotulo} você tem:"]
+    for aula in aulas:
+        linha = f"- **{aula['horario']}** — {aula['disciplina']}"
+        if aula.get('professor'):
+            linha += f" (Prof. {aula['professor']})"
+        if aula.get('local'):
+            linha += f" — {aula['local']}"
+        linhas.append(linha)
+    return '\n'.join(linhas)
+
+
+def responder_periodo_provas(titulo, eventos):
+    """Resume um período de provas (primeira e última data) a partir dos eventos do calendário"""
+    datas = sorted(e['start'] for e in eventos)
+    if not datas:
+        return None
+    if datas[0] == datas[-1]:
+        return f"📝 **{titulo}**: {formatar_data_br(datas[0])}."
+    return f"📝 **{titulo}**: de {formatar_data_br(datas[0])} a {formatar_data_br(datas[-1])}."
+
+
+def classificar_intencao(mensagem):
+    """
+    (intenção, argumento) de uma pergunta que o roteador responde sem IA, ou None:
+    ('aula', dia), ('substitutiva', nº da VA ou None), ('va', nº) ou ('feriado', None)
+    """
+    if not mensagem or len(mensagem) > INTENCAO_MAX_CARACTERES:
+        return None
+    texto = normalizar_pergunta(mensagem)
+    if RE_PERGUNTA_ABERTA.search(texto):
+        return None
+
+    match_aula = RE_INTENCAO_AULA.search(texto)
+    if match_aula:
+        return 'aula', next(dia for dia in match_aula.groups() if dia)
+
+    match_va = RE_INTENCAO_VA.search(texto)
+    numero_va = (match_va.group(1) or match_va.group(2)) if match_va else None
+    pede_data = RE_PERGUNTA_DATA.search(texto)
+    if RE_INTENCAO_SUBSTITUTIVA.search(texto) and pede_data:
+        return 'substitutiva', numero_va
+    if numero_va and pede_data:
+        return 'va', numero_va
+
+    if RE_INTENCAO_FERIADO.search(texto):
+        return 'feriado', None
+    return None
+
+
+def responder_intencao_estruturada(user_id, mensagem):
+    """
+    Roteador de intenções: responde sem IA perguntas curtas sobre aulas do dia,
+    datas das VAs/substitutivas e próximo feriado. Retorna None para cair no Gemini.
+    """
+    intencao = classificar_intencao(mensagem)
+    if intencao is None:
+        return None
+    tipo, argumento = intencao
+
+    try:
+        if tipo == 'aula':
+            return responder_aula_dia(user_id, argumento)
+
+        if tipo == 'substitutiva':
+            eventos = [e for e in CALENDARIO_ACADEMICO.do_tipo('prova') if 'Substitutiva' in e['title']]
+            if argumento:
+                eventos = [e for e in eventos if f"{argumento}ª" in e['title']]
+            titulo = f"Substitutiva da {argumento}ª VA" if argumento else "Substitutivas"
+            return responder_periodo_provas(titulo, eventos)
+
+        if tipo == 'va':
+            n = argumento
+            eventos = [e for e in CALENDARIO_ACADEMICO.do_tipo('prova')
+                       if f"{n}ª VA" in e['title'] and 'Substitutiva' not in e['title']]
+            return responder_periodo_provas(f"{n}ª VA", eventos)
+
+        if tipo == 'feriado':
+            hoje = datetime.now().strftime('%Y-%m-%d')
+            proximos = [(d, t) for d, t in feriados_do_aluno(user_id) if d >= hoje]
+            if not proximos:
+                return "🎉 Não há mais feriados cadastrados no calendário deste semestre."
+            data, titulo = proximos[0]
+            dias = (datetime.strptime(data, '%Y-%m-%d').date() - datetime.now().date()).days
+            quando = "hoje" if dias == 0 else "amanhã" if dias == 1 else f"daqui a {dias} dias"
+            return f"🎉 Próximo feriado: **{titulo}** em {formatar_data_br(data)} ({quando})."
+    except Exception as e:
+        logger.error(f"[INTENCAO] Erro ao responder direto, usando IA: {e}")
+
+    return None
+
+
 # ============================================
 # ROTAS
 # ============================================
@@ -889,7 +1475,7 @@ def login():
         session['matricula'] = usuario['matricula']
         session['cpf'] = usuario['cpf']
 
-        print(f"[LOGIN] Login bem-sucedido: {usuario['nome']} (ID: {usuario['id']})")
+        logger.info(f"[LOGIN] Login bem-sucedido: {usuario['nome']} (ID: {usuario['id']})")
 
         # ============================================
         # DECISÃO: SCRAPING AUTOMÁTICO OU LOGIN RÁPIDO?
@@ -903,10 +1489,10 @@ def login():
                 # ============================================
                 ultima_sync = obter_ultima_sincronizacao(usuario['id'])
                 if ultima_sync:
-                    print(f"[LOGIN] Login rápido (Cache válido)")
-                    print(f"[LOGIN] Última sincronização: {ultima_sync.strftime('%d/%m/%Y às %H:%M')}")
+                    logger.info(f"[LOGIN] Login rápido (cache válido, última sincronização: "
+                                f"{ultima_sync.strftime('%d/%m/%Y às %H:%M')})")
                 else:
-                    print(f"[LOGIN] Login rápido (Dados existem)")
+                    logger.info(f"[LOGIN] Login rápido (Dados existem)")
 
                 status_sincronizacao[usuario['id']] = 'concluido'
                 gerar_notas_ficticias(usuario['id'])
@@ -981,11 +1567,12 @@ def esqueci_senha():
                 msg = Message('Recuperação de Senha - IAUniev', recipients=[email] if email else None)
                 msg.body = f'Clique no link: {link}\n\nExpira em 1 hora.'
                 msg.html = f"""<p>Clique no botão:</p><a href="{link}" style="background:#0056b3; color:white; padding:10px 20px; text-decoration:none; border-radius:5px;">Redefinir Senha</a>"""
-                mail.send(msg)
+                with medir_externo('smtp'):
+                    mail.send(msg)
                 flash('E-mail enviado!', 'success')
             except Exception as e:
-                print(f"Erro: {e}")
-                print(f"🔗 LINK (DEV): {link}")
+                logger.error(f"Erro: {e}")
+                logger.info(f"🔗 LINK (DEV): {link}")
                 flash('Erro ao enviar. (Veja console)', 'warning')
         else:
             flash('E-mail não encontrado.', 'error')
@@ -1121,14 +1708,14 @@ def dashboard():
                         'local': row['local'] or ''
                     })
                 
-                print(f"[DASHBOARD] Usando {len(horarios_rows)} horários do scraper")
+                logger.debug(f"[DASHBOARD] Usando {len(horarios_rows)} horários do scraper")
             else:
                 # Fallback para dados fixos se não houver dados scraped
                 horarios_aulas_dinamicos = HORARIOS_AULAS
-                print("[DASHBOARD] Usando horários fixos (fallback)")
+                logger.debug("[DASHBOARD] Usando horários fixos (fallback)")
                 
         except Exception as e:
-            print(f"[DASHBOARD] Erro ao buscar horários: {e}")
+            logger.error(f"[DASHBOARD] Erro ao buscar horários: {e}")
             horarios_aulas_dinamicos = HORARIOS_AULAS
 
     return render_template(
@@ -1140,7 +1727,7 @@ def dashboard():
         posts_ads=posts_por_curso.get('ads', []),
         posts_es=posts_por_curso.get('es', []),
         horarios_aulas=horarios_aulas_dinamicos,
-        eventos_academicos=json.dumps(EVENTOS_ACADEMICOS),
+        eventos_academicos=CALENDARIO_ACADEMICO.json_eventos,
         notas=notas,
         faltas=faltas
     )
@@ -1152,74 +1739,146 @@ def dashboard():
 # ============================================
 # ROTA DO CHAT
 # ============================================
-@app.route('/chat', methods=['POST'])
-def chat():
-    if 'user_id' not in session:
-        return jsonify({'error': 'Não autorizado'}), 401
-    user_id = session['user_id']
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
+]
 
-    if not can_make_request(user_id):
-        wait_time = get_wait_time(user_id)
-        return jsonify({
-            'response': f'⏳ Aguarde {wait_time}s.',
-            'wait_time': wait_time,
-            'rate_limited': True
-        })
 
-    data = request.get_json(silent=True) or {}
-    mensagem_usuario = sanitizar_html(data.get('message', '').strip())
+# ============================================
+# SNAPSHOT DE CONTEXTO DO CHAT (POR USUÁRIO)
+# ============================================
+# Dados do aluno usados no prompt (cadastro, resumo e últimas conversas, conteúdos
+# do AVA), lidos do banco só uma vez por conversa. O histórico é atualizado no lugar
+# por salvar_historico_chat; o snapshot inteiro cai quando uma sincronização termina.
+HISTORICO_PROMPT_LIMITE = 2  # trocas na íntegra; o restante vai pelo resumo (memoria_chat)
+HISTORICO_SEM_RESUMO_LIMITE = 6
+cache_contexto_chat = CacheLRU(max_itens=500, max_bytes=64 * 1024 * 1024, ttl=30 * 60)
 
-    resposta_evento = criar_evento_rapido_via_chat(user_id, mensagem_usuario)
-    if resposta_evento is not None:
-        salvar_historico_chat(user_id, mensagem_usuario, resposta_evento)
-        return jsonify({'response': resposta_evento})
+
+def montar_texto_grade(horarios):
+    texto = "\n--- GRADE DE HORÁRIOS ---\n"
+    for dia, aulas in horarios.items():
+        texto += f"\n{dia}:\n"
+        for aula in aulas:
+            texto += f"  • {aula['horario']} - {aula['disciplina']}\n"
+            texto += f"    Professor: {aula['professor']}\n"
+    return texto + "\n"
+
+
+CONTEXTO_GRADE_HORARIOS = montar_texto_grade(HORARIOS_AULAS)
+
+
+def carregar_contexto_chat(user_id):
+    """Retorna o snapshot de contexto do aluno, consultando o banco apenas no miss"""
+    snapshot = cache_contexto_chat.get(user_id)
+    if snapshot is not None:
+        return snapshot
 
     with get_db_connection() as conn:
         c = conn.cursor()
         c.execute('SELECT nome, matricula, email, curso FROM usuarios WHERE id = ?', (user_id,))
-        usuario_dados = c.fetchone()
+        usuario = c.fetchone()
 
-        c.execute(''' 
-            SELECT mensagem, resposta  
-            FROM historico_chat  
-            WHERE usuario_id = ?  
-            ORDER BY data_hora DESC  
-            LIMIT 6 
-        ''', (user_id,))
-        historico_recente = c.fetchall()
+        c.execute('''
+            SELECT mensagem, resposta
+            FROM historico_chat
+            WHERE usuario_id = ?
+            ORDER BY data_hora DESC
+            LIMIT ?
+        ''', (user_id, HISTORICO_SEM_RESUMO_LIMITE))
+        historico = [dict(h) for h in c.fetchall()]
+
+        c.execute('SELECT resumo FROM memoria_chat WHERE usuario_id = ?', (user_id,))
+        memoria = c.fetchone()
 
         c.execute('SELECT disciplina, conteudo_texto FROM conteudos_ava WHERE usuario_id=?', (user_id,))
-        conteudos_ava = c.fetchall()
+        conteudos_ava = [dict(item) for item in c.fetchall()]
+
+    # Conversas antigas sem resumo ainda: usa as perguntas anteriores como resumo básico
+    resumo = memoria['resumo'] if memoria else resumo_basico(reversed(historico[HISTORICO_PROMPT_LIMITE:]))
+
+    snapshot = {
+        'usuario': dict(usuario) if usuario else None,
+        'resumo': resumo,
+        'historico': historico[:HISTORICO_PROMPT_LIMITE],
+        'conteudos_ava': conteudos_ava,
+        'resumo_ava': ''.join(
+            f"## {item['disciplina']}:\n{item['conteudo_texto'][:500]}...\n" for item in conteudos_ava
+        )
+    }
+    cache_contexto_chat.set(user_id, snapshot)
+    return snapshot
+
+
+def registrar_turno_contexto(user_id, mensagem, resposta):
+    """Coloca a nova conversa no topo do histórico do snapshot (se ele estiver em cache)"""
+    def com_turno(snapshot):
+        historico = [{'mensagem': mensagem, 'resposta': resposta}] + snapshot['historico']
+        return dict(snapshot, historico=historico[:HISTORICO_PROMPT_LIMITE])
+
+    cache_contexto_chat.atualizar(user_id, com_turno)
+
+
+def invalidar_contexto_chat(user_id):
+    cache_contexto_chat.invalidar(user_id)
+
+
+# "e na quarta?", "explica isso melhor": dependem da conversa, não vão para o prompt geral
+RE_PERGUNTA_CONTINUACAO = re.compile(
+    r'^(?:e|mas|entao|tipo)\b|\b(?:isso|disso|nisso|esse|essa|esses|essas|anterior|acima|antes)\b'
+)
+
+
+def montar_prompt_geral(mensagem_usuario, secoes):
+    """Prompt das perguntas cacheáveis: só calendário e grade, nada do aluno nem da conversa"""
+    contexto_cal, contexto_horarios = secoes
+    return f"""
+Você é o **IAUniev Professor**, assistente acadêmico da UniEvangélica.
+
+{contexto_cal}
+{contexto_horarios}
+
+PERGUNTA:
+\"\"\"{mensagem_usuario}\"\"\"
+
+### DIRETRIZES DE RESPOSTA ###
+1. Responda apenas com base no calendário e na grade acima, de forma direta.
+2. Não cite o nome do aluno nem conversas anteriores: a mesma resposta é reaproveitada para outros alunos.
+3. Se a informação não estiver acima, diga que não consta no calendário.
+"""
+
+
+def montar_prompt_chat(user_id, mensagem_usuario):
+    """
+    Monta o prompt do chat com os dados do aluno, calendário, horários, AVA e histórico.
+    Retorna (prompt, contexto), onde contexto descreve as seções usadas (para o cache).
+    Perguntas cacheáveis recebem o prompt geral, sem dados do aluno.
+    """
+    snapshot = carregar_contexto_chat(user_id)
+    usuario_dados = snapshot['usuario']
+    historico_recente = snapshot['historico']
+    conteudos_ava = snapshot['conteudos_ava']
 
-    termo_lower = mensagem_usuario.lower()
     ava_texto = ""
 
-    termos_cal = ['quando', 'data', 'dia', 'feriado', 'provas', 'calendário', 'calendario', 'va1', 'va2']
-    quer_calendario = any(t in termo_lower for t in termos_cal)
+    quer_calendario = MATCHER_CALENDARIO.encontra(mensagem_usuario)
 
     contexto_cal = ""
     if quer_calendario:
         contexto_cal = f"CALENDÁRIO:\n{DADOS_ACADEMICOS}\n"
 
-    termos_horarios = ['aula', 'horário', 'horario', 'segunda', 'terça', 'terca',
-                       'quarta', 'quinta', 'sexta', 'grade', 'disciplina',
-                       'professor', 'hoje', 'amanhã', 'amanha']
-    quer_horarios = any(t in termo_lower for t in termos_horarios)
-
-    contexto_horarios = ""
-    if quer_horarios:
-        contexto_horarios = "\n--- GRADE DE HORÁRIOS ---\n"
-        for dia, aulas in HORARIOS_AULAS.items():
-            contexto_horarios += f"\n{dia}:\n"
-            for aula in aulas:
-                contexto_horarios += f"  • {aula['horario']} - {aula['disciplina']}\n"
-                contexto_horarios += f"    Professor: {aula['professor']}\n"
-        contexto_horarios += "\n"
-
-    match_semana = re.search(r'semana\s*(\d+)', termo_lower)
+    quer_horarios = MATCHER_HORARIOS.encontra(mensagem_usuario)
+
+    contexto_horarios = CONTEXTO_GRADE_HORARIOS if quer_horarios else ""
+
+    match_semana = RE_SEMANA.search(mensagem_usuario)
     semana_foco = match_semana.group(1) if match_semana else None
 
     materiais_encontrados = False
+    palavras_mensagem = matcher_palavras_mensagem(mensagem_usuario)
 
     if conteudos_ava:
         ava_texto = "--- CONTEÚDOS DETALHADOS DO AVA ---\n"
@@ -1240,7 +1899,7 @@ def chat():
                             materiais_encontrados = True
                             break
 
-            elif any(t in disc_nome.lower() for t in termo_lower.split() if len(t) > 3):
+            elif palavras_mensagem.encontra(disc_nome):
                 ava_texto += f"\n>>> {disc_nome} (Visão Geral) <<<\n{disc_texto[:3000]}\n"
                 materiais_encontrados = True
 
@@ -1249,12 +1908,19 @@ def chat():
                 ava_texto += f"\nAVISO: Não encontrei detalhes específicos para a Semana {semana_foco} nos textos baixados.\n"
 
             ava_texto += "Resumo dos materiais disponíveis no banco:\n"
-            for item in conteudos_ava:
-                ava_texto += f"## {item['disciplina']}:\n{item['conteudo_texto'][:500]}...\n"
+            ava_texto += snapshot['resumo_ava']
     else:
         ava_texto = "AVA não sincronizado."
 
+    pergunta = normalizar_pergunta(mensagem_usuario)
+    if ((quer_calendario or quer_horarios) and not semana_foco and not materiais_encontrados
+            and not RE_PERGUNTA_ABERTA.search(pergunta) and not RE_PERGUNTA_CONTINUACAO.search(pergunta)):
+        secoes = [contexto_cal, contexto_horarios]
+        return montar_prompt_geral(mensagem_usuario, secoes), {'secoes': secoes, 'cacheavel': True}
+
     historico_texto = ""
+    if snapshot['resumo']:
+        historico_texto += f"Resumo da conversa até aqui:\n{snapshot['resumo']}\n\nÚltimas mensagens:\n"
     if historico_recente:
         for h in reversed(historico_recente):
             historico_texto += f"Aluno: {h['mensagem']}\nAssistente: {h['resposta']}\n"
@@ -1272,8 +1938,7 @@ def chat():
         email_usuario = 'N/A'
         curso_usuario = 'N/A'
 
-    try:
-        prompt = f"""
+    prompt = f"""
 Você é o **IAUniev Professor**, assistente acadêmico da UniEvangélica.
 
 ALUNO: {nome_usuario} ({curso_usuario})
@@ -1299,22 +1964,54 @@ PERGUNTA:
 4. Se o texto extraído não tiver descrição (estiver vazio ou só com títulos genéricos), seja honesto: "O professor não colocou descrição detalhada no AVA, apenas os títulos das atividades."
 5. Seja útil e incentive o estudo.
 """
+    return prompt, {'cacheavel': False}
+
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    user_id = session['user_id']
+
+    data = request.get_json(silent=True) or {}
+    mensagem_usuario = sanitizar_html(data.get('message', '').strip())
+
+    # "criar evento: ..." vem antes do roteador, que também reconhece VAs e dias da semana
+    resposta_evento = criar_evento_rapido_via_chat(user_id, mensagem_usuario)
+    if resposta_evento is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_evento)
+        return jsonify({'response': resposta_evento})
+
+    # Perguntas estruturadas não gastam cota do Gemini
+    resposta_direta = responder_intencao_estruturada(user_id, mensagem_usuario)
+    if resposta_direta is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_direta)
+        return jsonify({'response': resposta_direta, 'direct': True})
+
+    espera = rate_limiter.verificar('chat', user_id)
+    if espera:
+        return resposta_rate_limit(espera)
 
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
-        ]
+    prompt, contexto = montar_prompt_chat(user_id, mensagem_usuario)
 
+    chave_cache = chave_cache_resposta(mensagem_usuario, contexto)
+    resposta_cache = buscar_resposta_cache(chave_cache)
+    if resposta_cache is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_cache)
+        return jsonify({'response': resposta_cache, 'cached': True})
+
+    try:
         if model:
-            response = model.generate_content(
+            response = gerar_conteudo_gemini(
+                model,
                 prompt,
-                safety_settings=safety_settings
+                user_id,
+                safety_settings=SAFETY_SETTINGS
             )
             if response.parts:
                 resposta_final = response.text
                 salvar_historico_chat(user_id, mensagem_usuario, resposta_final)
+                guardar_resposta_cache(chave_cache, resposta_final)
                 return jsonify({'response': resposta_final})
             else:
                 resposta = "Não consegui gerar resposta."
@@ -1323,13 +2020,57 @@ PERGUNTA:
         else:
             return jsonify({'response': "Erro de configuração."})
 
+    except CotaExcedida as e:
+        return resposta_rate_limit(e.retry_after, status=503,
+                                   response=MENSAGEM_COTA_GEMINI.format(espera=e.retry_after))
     except Exception as e:
-        print(f"Erro Gemini: {str(e)}")
+        logger.error(f"Erro Gemini: {str(e)}")
         resposta = "Erro de conexão."
         salvar_historico_chat(user_id, mensagem_usuario, resposta)
         return jsonify({'response': resposta})
 
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Versão em streaming do /chat: envia os trechos do Gemini via SSE"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    user_id = session['user_id']
+
+    data = request.get_json(silent=True) or {}
+    mensagem_usuario = sanitizar_html(data.get('message', '').strip())
+
+    resposta_evento = criar_evento_rapido_via_chat(user_id, mensagem_usuario)
+    if resposta_evento is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_evento)
+        return resposta_sse(transmitir_texto_pronto(resposta_evento))
+
+    resposta_direta = responder_intencao_estruturada(user_id, mensagem_usuario)
+    if resposta_direta is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_direta)
+        return resposta_sse(transmitir_texto_pronto(resposta_direta, direct=True))
+
+    espera = rate_limiter.verificar('chat', user_id)
+    if espera:
+        return resposta_rate_limit(espera)
+
+    if not model:
+        return resposta_sse(transmitir_texto_pronto("Erro de configuração."))
+
+    prompt, contexto = montar_prompt_chat(user_id, mensagem_usuario)
+
+    chave_cache = chave_cache_resposta(mensagem_usuario, contexto)
+    resposta_cache = buscar_resposta_cache(chave_cache)
+    if resposta_cache is not None:
+        salvar_historico_chat(user_id, mensagem_usuario, resposta_cache)
+        return resposta_sse(transmitir_texto_pronto(resposta_cache, cached=True))
+
+    return resposta_sse(transmitir_resposta_gemini(
+        prompt, user_id, mensagem_usuario, modelo=model, safety_settings=SAFETY_SETTINGS,
+        ao_concluir=lambda resposta: guardar_resposta_cache(chave_cache, resposta)
+    ))
+
+
 # ============================================
 # 🆕 V5.1: NOVAS ROTAS PARA SINCRONIZAÇÃO MANUAL AVA
 # ============================================
@@ -1368,9 +2109,7 @@ def status_sync():
         return jsonify(response), 200
 
     except Exception as e:
-        print(f"[API] Erro ao obter status: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[API] Erro ao obter status: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
@@ -1387,23 +2126,27 @@ def api_sincronizar_ava():
             return jsonify({'erro': 'Scraper não disponível'}), 500
 
         if sincronizacoes_em_andamento.get(user_id, False):
-            print(f"[API] Sincronização já em andamento para user {user_id}")
+            logger.info(f"[API] Sincronização já em andamento para user {user_id}")
             return jsonify({
                 'status': 'em_andamento',
                 'mensagem': 'Sincronização já está em andamento'
             }), 200
 
+        espera = rate_limiter.verificar('sync', user_id)
+        if espera:
+            return resposta_rate_limit(espera, erro=f'Muitas sincronizações seguidas. Tente novamente em {espera}s.')
+
         matricula = session.get('matricula')
         cpf = session.get('cpf')
         nome = session.get('user_nome')
 
         if not matricula or not cpf:
-            print(f"[API] Erro: Credenciais não encontradas na sessão para user {user_id}")
+            logger.error(f"[API] Erro: Credenciais não encontradas na sessão para user {user_id}")
             return jsonify({
                 'erro': 'Dados de login não encontrados na sessão'
             }), 400
 
-        print(f"[API] Iniciando sincronização para: {nome} (ID: {user_id}, Matrícula: {matricula})")
+        logger.info(f"[API] Iniciando sincronização para: {nome} (ID: {user_id}, Matrícula: {matricula})")
 
         thread = threading.Thread(
             target=executar_sincronizacao_monitorada,
@@ -1420,9 +2163,7 @@ def api_sincronizar_ava():
         }), 200
 
     except Exception as e:
-        print(f"[API] Erro ao iniciar sincronização: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[API] Erro ao iniciar sincronização: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
@@ -1438,7 +2179,7 @@ def cancelar_sync():
         if user_id in sincronizacoes_em_andamento:
             sincronizacoes_em_andamento[user_id] = False
             status_sincronizacao[user_id] = 'cancelado'
-            print(f"[API] Sincronização marcada como cancelada para user {user_id}")
+            logger.info(f"[API] Sincronização marcada como cancelada para user {user_id}")
 
         return jsonify({
             'status': 'cancelado',
@@ -1446,7 +2187,7 @@ def cancelar_sync():
         }), 200
 
     except Exception as e:
-        print(f"[API] Erro ao cancelar: {e}")
+        logger.error(f"[API] Erro ao cancelar: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
@@ -1488,7 +2229,7 @@ def status_sync_lyceum():
         return jsonify(response), 200
 
     except Exception as e:
-        print(f"[API LYCEUM] Erro ao obter status: {e}")
+        logger.error(f"[API LYCEUM] Erro ao obter status: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
@@ -1505,12 +2246,16 @@ def api_sincronizar_lyceum():
             return jsonify({'erro': 'Scraper Lyceum não disponível'}), 500
 
         if sincronizacoes_em_andamento_lyceum.get(user_id, False):
-            print(f"[API LYCEUM] Sincronização já em andamento para user {user_id}")
+            logger.info(f"[API LYCEUM] Sincronização já em andamento para user {user_id}")
             return jsonify({
                 'status': 'em_andamento',
                 'mensagem': 'Sincronização já está em andamento'
             }), 200
 
+        espera = rate_limiter.verificar('sync', user_id)
+        if espera:
+            return resposta_rate_limit(espera, erro=f'Muitas sincronizações seguidas. Tente novamente em {espera}s.')
+
         matricula = session.get('matricula')
         nome = session.get('user_nome')
 
@@ -1527,12 +2272,12 @@ def api_sincronizar_lyceum():
             pass
 
         if not matricula or not senha_lyceum:
-            print(f"[API LYCEUM] Erro: Credenciais não encontradas para user {user_id}")
+            logger.error(f"[API LYCEUM] Erro: Credenciais não encontradas para user {user_id}")
             return jsonify({
                 'erro': 'Credenciais não encontradas. Configure sua senha do Lyceum.'
             }), 400
 
-        print(f"[API LYCEUM] Iniciando sincronização para: {nome} (ID: {user_id})")
+        logger.info(f"[API LYCEUM] Iniciando sincronização para: {nome} (ID: {user_id})")
 
         thread = threading.Thread(
             target=executar_sincronizacao_monitorada_lyceum,
@@ -1549,9 +2294,7 @@ def api_sincronizar_lyceum():
         }), 200
 
     except Exception as e:
-        print(f"[API LYCEUM] Erro ao iniciar sincronização: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[API LYCEUM] Erro ao iniciar sincronização: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
@@ -1567,7 +2310,7 @@ def cancelar_sync_lyceum():
         if user_id in sincronizacoes_em_andamento_lyceum:
             sincronizacoes_em_andamento_lyceum[user_id] = False
             status_sincronizacao_lyceum[user_id] = 'cancelado'
-            print(f"[API LYCEUM] Sincronização marcada como cancelada para user {user_id}")
+            logger.info(f"[API LYCEUM] Sincronização marcada como cancelada para user {user_id}")
 
         return jsonify({
             'status': 'cancelado',
@@ -1575,10 +2318,62 @@ def cancelar_sync_lyceum():
         }), 200
 
     except Exception as e:
-        print(f"[API LYCEUM] Erro ao cancelar: {e}")
+        logger.error(f"[API LYCEUM] Erro ao cancelar: {e}")
         return jsonify({'erro': str(e)}), 500
 
 
+# ============================================
+# ROTAS API - ADMINISTRAÇÃO
+# ============================================
+# Matrículas com acesso aos painéis internos, separadas por vírgula
+ADMIN_MATRICULAS = {m.strip() for m in os.getenv('ADMIN_MATRICULAS', '').split(',') if m.strip()}
+
+
+def usuario_admin():
+    return 'user_id' in session and session.get('matricula') in ADMIN_MATRICULAS
+
+
+@app.route('/api/admin/metricas_sync')
+def admin_metricas_sync():
+    """p50/p95 de cada fase (login, extrair_*, curso, PDF, gravação...) nas últimas N sincronizações"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    if not usuario_admin():
+        return jsonify({'error': 'Acesso restrito à administração'}), 403
+
+    ultimas = max(1, min(request.args.get('ultimas', 50, type=int), 1000))
+    fontes = [request.args['fonte']] if request.args.get('fonte') else ['lyceum', 'ava']
+    try:
+        resposta = {}
+        with get_db_connection() as conn:
+            for fonte in fontes:
+                linhas = conn.execute('''
+                    SELECT fase, duracao_ms, ok, memoria_mb, cpu_s
+                    FROM metricas_sync
+                    WHERE sync_id IN (
+                        SELECT sync_id FROM metricas_sync
+                        WHERE fonte = ?
+                        GROUP BY sync_id
+                        ORDER BY MAX(criado_em) DESC
+                        LIMIT ?
+                    )
+                ''', (fonte, ultimas)).fetchall()
+                sincronizacoes = conn.execute('''
+                    SELECT COUNT(*) FROM (
+                        SELECT sync_id FROM metricas_sync WHERE fonte = ?
+                        GROUP BY sync_id ORDER BY MAX(criado_em) DESC LIMIT ?
+                    )
+                ''', (fonte, ultimas)).fetchone()[0]
+                resposta[fonte] = {
+                    'sincronizacoes': sincronizacoes,
+                    'fases': resumir_fases([dict(linha) for linha in linhas])
+                }
+        return jsonify(resposta)
+    except Exception as e:
+        logger.error(f"[ADMIN] Erro ao resumir métricas de sincronização: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 # ============================================
 # ROTAS API - COMUNIDADE
 # ============================================
@@ -1618,12 +2413,34 @@ def limpar_historico():
     try:
         with get_db_connection() as conn:
             conn.execute('DELETE FROM historico_chat WHERE usuario_id = ?', (user_id,))
+            conn.execute('DELETE FROM memoria_chat WHERE usuario_id = ?', (user_id,))
             conn.commit()
+        invalidar_contexto_chat(user_id)
         return jsonify({'success': True, 'message': 'Histórico limpo!'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/metricas/gemini')
+def metricas_gemini():
+    """Uso da cota global do Gemini, tamanho da fila e tempos de espera"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    if not usuario_admin():
+        return jsonify({'error': 'Acesso restrito à administração'}), 403
+    return jsonify({'success': True, 'gemini': agendador_gemini.estatisticas()})
+
+
+@app.route('/api/metricas/cache_chat')
+def metricas_cache_chat():
+    """Hits, misses e taxa de acerto do cache de respostas do chat"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    if not usuario_admin():
+        return jsonify({'error': 'Acesso restrito à administração'}), 403
+    return jsonify({'success': True, 'cache': cache_respostas_chat.estatisticas()})
+
+
 @app.route('/api/posts')
 def buscar_posts():
     """Lazy loading de posts"""
@@ -1874,84 +2691,152 @@ def buscar_interacoes(post_id):
 # ============================================
 # ROTAS DO CALENDÁRIO
 # ============================================
+def filtro_intervalo(inicio, fim):
+    """Trecho SQL + parâmetros para data_evento em [inicio, fim) (qualquer um pode ser None)"""
+    sql, params = '', []
+    if inicio:
+        sql += ' AND data_evento >= ?'
+        params.append(inicio)
+    if fim:
+        sql += ' AND data_evento < ?'
+        params.append(fim)
+    return sql, params
+
+
+def montar_eventos_calendario(user_id, inicio=None, fim=None):
+    """
+    Eventos pessoais + calendário do Lyceum (ou o calendário acadêmico fixo, se não houver)
+    no formato do FullCalendar, só do intervalo [inicio, fim) quando informado.
+    """
+    sql_intervalo, params_intervalo = filtro_intervalo(inicio, fim)
+
+    with get_db_connection() as conn:
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta
+            FROM eventos_calendario
+            WHERE usuario_id = ?{sql_intervalo}
+            ORDER BY data_evento ASC
+        ''', [user_id] + params_intervalo)
+        eventos_db = c.fetchall()
+
+    eventos_pessoais = []
+    for row in eventos_db:
+        start_datetime = row['data_evento']
+        if row['hora_evento']:
+            start_datetime += 'T' + row['hora_evento']
+
+        eventos_pessoais.append({
+            'id': row['id'],
+            'title': row['titulo'],
+            'start': start_datetime,
+            'color': row['cor'],
+            'extendedProps': {
+                'descricao': row['descricao'],
+                'tipo': row['tipo'],
+                'pessoal': True,
+                'alerta': row['alerta'],
+                'minutos_antes_alerta': row['minutos_antes_alerta']
+            },
+            'allDay': False if row['hora_evento'] else True
+        })
+
+    # ============================================
+    # 🆕 V7.0: BUSCAR EVENTOS DO CALENDÁRIO LYCEUM
+    # ============================================
+    eventos_lyceum = []
+    try:
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                SELECT id, titulo, data_evento, tipo, cor, descricao
+                FROM calendario_lyceum
+                WHERE usuario_id = ?{sql_intervalo}
+            ''', [user_id] + params_intervalo)
+
+            for row in c.fetchall():
+                eventos_lyceum.append({
+                    'id': f"lyceum_{row['id']}",
+                    'title': row['titulo'],
+                    'start': row['data_evento'],
+                    'color': row['cor'] or '#4a90e2',
+                    'extendedProps': {
+                        'descricao': row['descricao'] or '',
+                        'tipo': row['tipo'] or 'evento',
+                        'pessoal': False,
+                        'origem': 'lyceum'
+                    },
+                    'allDay': True
+                })
+
+            if eventos_lyceum:
+                logger.debug(f"[CALENDARIO] Carregados {len(eventos_lyceum)} eventos do Lyceum")
+    except Exception as e:
+        # Tabela pode não existir ainda
+        logger.warning(f"[CALENDARIO] Eventos Lyceum não disponíveis: {e}")
+
+    # Combinar: Eventos fixos + Lyceum + Pessoais
+    # Se tiver eventos do Lyceum, usar eles como base. Senão, usar fixos.
+    if eventos_lyceum:
+        return eventos_lyceum + eventos_pessoais
+
+    return CALENDARIO_ACADEMICO.entre(inicio, fim) + eventos_pessoais
+
+
+def data_parametro(valor):
+    """'2025-09-28T00:00:00-03:00' (FullCalendar) -> '2025-09-28'; None se ausente/inválido"""
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def calendario_serializado(user_id, inicio=None, fim=None):
+    """Retorna {'corpo': bytes JSON, 'etag': str} do cache, montando no miss"""
+    chave = (user_id, inicio, fim)
+    entrada = cache_calendario.get(chave)
+    if entrada is None:
+        eventos = montar_eventos_calendario(user_id, inicio, fim)
+        corpo = json.dumps({'success': True, 'eventos': eventos}, ensure_ascii=False).encode('utf-8')
+        entrada = {'corpo': corpo, 'etag': hashlib.sha1(corpo).hexdigest()}
+        cache_calendario.set(chave, entrada)
+    return entrada
+
+
 @app.route('/api/eventos_calendario')
 def buscar_eventos_calendario():
     if 'user_id' not in session:
         return jsonify({'error': 'Não autorizado'}), 401
     user_id = session['user_id']
 
-    try:
-        timestamp = int(time.time() // 300)
-        eventos_db = get_eventos_cache_key(user_id, timestamp)
-
-        eventos_pessoais = []
-        for row in eventos_db:
-            start_datetime = row['data_evento']
-            if row['hora_evento']:
-                start_datetime += 'T' + row['hora_evento']
-
-            eventos_pessoais.append({
-                'id': row['id'],
-                'title': row['titulo'],
-                'start': start_datetime,
-                'color': row['cor'],
-                'extendedProps': {
-                    'descricao': row['descricao'],
-                    'tipo': row['tipo'],
-                    'pessoal': True,
-                    'alerta': row['alerta'],
-                    'minutos_antes_alerta': row['minutos_antes_alerta']
-                },
-                'allDay': False if row['hora_evento'] else True
-            })
+    # Intervalo da visão atual do FullCalendar (?start=...&end=..., fim exclusivo)
+    inicio = data_parametro(request.args.get('start'))
+    fim = data_parametro(request.args.get('end'))
 
-        # ============================================
-        # 🆕 V7.0: BUSCAR EVENTOS DO CALENDÁRIO LYCEUM
-        # ============================================
-        eventos_lyceum = []
-        try:
-            with get_db_connection() as conn:
-                c = conn.cursor()
-                c.execute('''
-                    SELECT id, titulo, data_evento, tipo, cor, descricao
-                    FROM calendario_lyceum
-                    WHERE usuario_id = ?
-                ''', (user_id,))
-                
-                for row in c.fetchall():
-                    eventos_lyceum.append({
-                        'id': f"lyceum_{row['id']}",
-                        'title': row['titulo'],
-                        'start': row['data_evento'],
-                        'color': row['cor'] or '#4a90e2',
-                        'extendedProps': {
-                            'descricao': row['descricao'] or '',
-                            'tipo': row['tipo'] or 'evento',
-                            'pessoal': False,
-                            'origem': 'lyceum'
-                        },
-                        'allDay': True
-                    })
-                
-                if eventos_lyceum:
-                    print(f"[CALENDARIO] Carregados {len(eventos_lyceum)} eventos do Lyceum")
-        except Exception as e:
-            # Tabela pode não existir ainda
-            print(f"[CALENDARIO] Eventos Lyceum não disponíveis: {e}")
+    try:
+        entrada = calendario_serializado(user_id, inicio, fim)
 
-        # Combinar: Eventos fixos + Lyceum + Pessoais
-        # Se tiver eventos do Lyceum, usar eles como base. Senão, usar fixos.
-        if eventos_lyceum:
-            todos_eventos = eventos_lyceum + eventos_pessoais
-        else:
-            todos_eventos = EVENTOS_ACADEMICOS + eventos_pessoais
-            
-        return jsonify({'success': True, 'eventos': todos_eventos})
+        resposta = Response(entrada['corpo'], mimetype='application/json')
+        resposta.set_etag(entrada['etag'])
+        # O navegador guarda a resposta, mas revalida sempre (If-None-Match -> 304)
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta.make_conditional(request)
     except Exception as e:
-        print(f"[ERROR] Erro: {e}")
+        logger.error(f"[ERROR] Erro: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/calendario_academico')
+def buscar_calendario_academico():
+    """Calendário acadêmico fixo: JSON pré-serializado, cacheável por 1h e revalidado por ETag"""
+    resposta = Response(CALENDARIO_ACADEMICO.corpo_api, mimetype='application/json')
+    resposta.set_etag(CALENDARIO_ACADEMICO.etag)
+    resposta.headers['Cache-Control'] = 'public, max-age=3600'
+    return resposta.make_conditional(request)
+
+
 @app.route('/api/criar_evento', methods=['POST'])
 def criar_evento():
     if 'user_id' not in session:
@@ -1971,17 +2856,25 @@ def criar_evento():
     if not titulo or not data_evento:
         return jsonify({'error': 'Título e data obrigatórios!'}), 400
 
+    alerta_em = calcular_alerta_em(data_evento, hora_evento, minutos_antes_alerta) if alerta else None
+
     try:
         with get_db_connection() as conn:
             c = conn.cursor()
             c.execute(''' 
-                INSERT INTO eventos_calendario (usuario_id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) 
-            ''', (user_id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta))
+                INSERT INTO eventos_calendario (usuario_id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta, alerta_em) 
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) 
+            ''', (user_id, titulo, descricao, data_evento, hora_evento, tipo, cor, alerta, minutos_antes_alerta,
+                  alerta_em.strftime('%Y-%m-%d %H:%M:%S') if alerta_em else None))
             evento_id = c.lastrowid
             conn.commit()
 
-        limpar_cache_eventos()
+        limpar_cache_eventos(user_id)
+        if alerta_em:
+            agendador_lembretes.agendar({
+                'evento_id': evento_id, 'usuario_id': user_id, 'titulo': titulo,
+                'data_evento': data_evento, 'hora_evento': hora_evento, 'quando': alerta_em
+            })
 
         return jsonify({
             'success': True,
@@ -1989,7 +2882,7 @@ def criar_evento():
             'mensagem': 'Evento criado!'
         })
     except Exception as e:
-        print(f"[ERROR] Erro: {e}")
+        logger.error(f"[ERROR] Erro: {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -2013,11 +2906,12 @@ def excluir_evento():
             c.execute('DELETE FROM eventos_calendario WHERE id = ?', (evento_id,))
             conn.commit()
 
-        limpar_cache_eventos()
+        limpar_cache_eventos(user_id)
+        agendador_lembretes.cancelar(evento_id)
 
         return jsonify({'success': True, 'mensagem': 'Evento excluído!'})
     except Exception as e:
-        print(f"[ERROR] Erro: {e}")
+        logger.error(f"[ERROR] Erro: {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -2087,136 +2981,156 @@ def toggle_dark_mode():
 # ============================================
 # EXPORT DE DADOS
 # ============================================
+exportacoes_lote = ExportacoesEmLote()
+
+# Documentos prontos por (usuário, formato, versão dos dados, dia). A versão
+# (usuarios.versao_dados_lyceum) muda a cada salvar_dados_lyceum, então um
+# relatório só é gerado de novo quando as notas mudam.
+cache_exportacoes = CacheLRU(
+    max_itens=500,
+    max_bytes=int(os.getenv('CACHE_EXPORTACOES_MB', '64')) * 1024 * 1024,
+    ttl=24 * 3600
+)
+
+
+def iterar_notas_alunos(usuario_ids):
+    """(aluno, notas) de um aluno por vez, para os geradores não carregarem a turma inteira"""
+    with get_db_connection() as conn:
+        for usuario_id in usuario_ids:
+            aluno = conn.execute('SELECT nome, matricula FROM usuarios WHERE id = ?', (usuario_id,)).fetchone()
+            if aluno is None:
+                continue
+            notas = conn.execute('''SELECT disciplina, va1, va2, va3, media, situacao
+                                    FROM notas_aluno WHERE usuario_id = ? ORDER BY disciplina''',
+                                 (usuario_id,)).fetchall()
+            yield dict(aluno), notas
+
+
 @app.route('/api/exportar_notas/<formato>')
 def exportar_notas(formato):
     if 'user_id' not in session:
         return jsonify({'error': 'Não autorizado'}), 401
+    if formato not in GERADORES:
+        return jsonify({'error': 'Formato inválido'}), 400
 
     user_id = session['user_id']
+    gerar, mimetype, extensao = GERADORES[formato]
+
+    try:
+        with get_db_connection() as conn:
+            row = conn.execute('SELECT versao_dados_lyceum FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+        if row is None:
+            return jsonify({'error': 'Usuário não encontrado'}), 404
+
+        # O documento traz a data de geração, então a chave inclui o dia
+        chave = (user_id, formato, row['versao_dados_lyceum'] or 0, datetime.now().strftime('%Y-%m-%d'))
+        entrada = cache_exportacoes.get(chave)
+        if entrada is None:
+            alunos = list(iterar_notas_alunos([user_id]))
+            buffer = io.BytesIO()
+            gerar(buffer, alunos)
+            corpo = buffer.getvalue()
+            entrada = {
+                'corpo': corpo,
+                'etag': hashlib.sha1(corpo).hexdigest(),
+                'nome_download': f"notas_{alunos[0][0]['nome']}.{extensao}"
+            }
+            cache_exportacoes.set(chave, entrada)
+    except ImportError as e:
+        logger.error(f"[EXPORT] Exportação em {formato} indisponível: {e}")
+        return jsonify({'error': descrever_erro_geracao(formato, e)}), 500
+    except Exception as e:
+        logger.exception(f"[EXPORT] Erro ao exportar notas ({formato}) do user {user_id}: {e}")
+        return jsonify({'error': descrever_erro_geracao(formato, e)}), 500
+
+    resposta = Response(entrada['corpo'], mimetype=mimetype)
+    resposta.headers['Content-Length'] = str(len(entrada['corpo']))
+    resposta.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(entrada['nome_download'])}"
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    resposta.set_etag(entrada['etag'])
+    return resposta.make_conditional(request)
+
+
+@app.route('/api/exportar_notas/lote', methods=['POST'])
+def exportar_notas_lote():
+    """Coordenação: exporta as notas da turma (mesmo curso) em segundo plano"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
 
+    data = request.get_json(silent=True) or {}
+    formato = data.get('formato', 'excel')
+    if formato not in GERADORES:
+        return jsonify({'error': 'Formato inválido'}), 400
+
+    user_id = session['user_id']
     with get_db_connection() as conn:
-        c = conn.cursor()
-        c.execute('''SELECT disciplina, va1, va2, va3, media, situacao 
-                     FROM notas_aluno WHERE usuario_id = ?''', (user_id,))
-        notas = c.fetchall()
-
-        c.execute('SELECT nome FROM usuarios WHERE id = ?', (user_id,))
-        nome = c.fetchone()['nome']
-
-    if formato == 'pdf':
-        buffer = io.BytesIO()
-        p: Any = Canvas(buffer, pagesize=A4)
-
-        y = 800
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, y, "RELATÓRIO DE NOTAS - IAUniev")
-
-        y -= 30
-        p.setFont("Helvetica", 12)
-        p.drawString(100, y, f"Aluno: {nome}")
-
-        y -= 30
-        p.drawString(100, y, f"Data: {datetime.now().strftime('%d/%m/%Y')}")
-
-        y -= 50
-
-        data_table = [['Disciplina', 'VA1', 'VA2', 'VA3', 'Média', 'Situação']]
-        for nota in notas:
-            data_table.append([
-                nota['disciplina'][:30],
-                str(nota['va1']),
-                str(nota['va2']),
-                str(nota['va3']),
-                str(nota['media']),
-                nota['situacao']
-            ])
-
-        table = Table(data_table, colWidths=[200, 50, 50, 50, 50, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        table.wrapOn(p, 100, y)
-        table.drawOn(p, 50, y - len(data_table) * 25)
-
-        p.save()
-        buffer.seek(0)
-
-        return send_file(buffer,
-                         mimetype='application/pdf',
-                         as_attachment=True,
-                         download_name=f'notas_{nome}.pdf')
-
-    elif formato == 'excel':
-        try:
-            import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment
-
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            if ws is None:
-                ws = wb.create_sheet("Notas")
-            ws.title = "Notas"
-
-            ws['A1'] = f"Relatório de Notas - {nome}"
-            ws['A1'].font = Font(size=14, bold=True)
-            ws['A2'] = f"Data: {datetime.now().strftime('%d/%m/%Y')}"
-
-            headers = ['Disciplina', 'VA1', 'VA2', 'VA3', 'Média', 'Situação']
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=4, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-
-            for row_idx, nota in enumerate(notas, start=5):
-                ws.cell(row=row_idx, column=1, value=nota['disciplina'])
-                ws.cell(row=row_idx, column=2, value=nota['va1'])
-                ws.cell(row=row_idx, column=3, value=nota['va2'])
-                ws.cell(row=row_idx, column=4, value=nota['va3'])
-                ws.cell(row=row_idx, column=5, value=nota['media'])
-                ws.cell(row=row_idx, column=6, value=nota['situacao'])
-
-            ws.column_dimensions['A'].width = 40
-            for col in ['B', 'C', 'D', 'E']:
-                ws.column_dimensions[col].width = 10
-            ws.column_dimensions['F'].width = 15
+        coordenador = conn.execute('SELECT curso, coordenador FROM usuarios WHERE id = ?', (user_id,)).fetchone()
+        if not coordenador or not coordenador['coordenador']:
+            return jsonify({'error': 'Apenas a coordenação pode exportar a turma'}), 403
+
+        # A coordenação só exporta o próprio curso
+        curso = coordenador['curso']
+        if data.get('curso') and data['curso'] != curso:
+            return jsonify({'error': 'Exportação permitida apenas para o seu curso'}), 403
+        usuario_ids = [row['id'] for row in conn.execute(
+            'SELECT id FROM usuarios WHERE curso = ? AND coordenador = 0 ORDER BY nome', (curso,)
+        )]
+
+    trabalho_id = exportacoes_lote.iniciar(
+        user_id, formato,
+        lambda: iterar_notas_alunos(usuario_ids),
+        f"notas_turma_{curso}_{datetime.now().strftime('%Y%m%d')}"
+    )
+    logger.info(f"[EXPORT] Lote {trabalho_id[:8]} iniciado: {len(usuario_ids)} alunos de {curso} ({formato})")
 
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+    return jsonify({
+        'success': True,
+        'job_id': trabalho_id,
+        'total_alunos': len(usuario_ids),
+        'status_url': url_for('status_exportacao_lote', trabalho_id=trabalho_id)
+    }), 202
 
-            return send_file(buffer,
-                             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                             as_attachment=True,
-                             download_name=f'notas_{nome}.xlsx')
-        except ImportError:
-            return jsonify({'error': 'openpyxl não instalado'}), 500
 
-    return jsonify({'error': 'Formato inválido'}), 400
+@app.route('/api/exportar_notas/lote/<trabalho_id>')
+def status_exportacao_lote(trabalho_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
 
+    trabalho = exportacoes_lote.obter(trabalho_id, session['user_id'])
+    if trabalho is None:
+        return jsonify({'error': 'Exportação não encontrada'}), 404
 
-from flask import request, jsonify
-from werkzeug.utils import secure_filename
-import os
-import PyPDF2
-import docx
-from youtube_transcript_api import YouTubeTranscriptApi
-import google.generativeai as genai
-from dotenv import load_dotenv
+    resposta = {
+        'job_id': trabalho_id,
+        'status': trabalho['status'],
+        'alunos_processados': trabalho['alunos'],
+        'erro': trabalho['erro']
+    }
+    if trabalho['status'] == 'pronto':
+        resposta['download_url'] = url_for('baixar_exportacao_lote', trabalho_id=trabalho_id)
+    return jsonify(resposta)
 
-# Carregar variáveis de ambiente do .env
-load_dotenv()
 
-# Configurar Gemini com a chave do .env
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+@app.route('/api/exportar_notas/lote/<trabalho_id>/download')
+def baixar_exportacao_lote(trabalho_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+
+    trabalho = exportacoes_lote.obter(trabalho_id, session['user_id'])
+    if trabalho is None or trabalho['status'] != 'pronto' or not os.path.exists(trabalho['arquivo']):
+        return jsonify({'error': 'Exportação não disponível'}), 404
+
+    return send_file(os.path.abspath(trabalho['arquivo']),
+                     mimetype=trabalho['mimetype'],
+                     as_attachment=True,
+                     download_name=trabalho['nome_download'])
+
+
+from werkzeug.utils import secure_filename
+
+# Leitores de documentos: importados só quando um arquivo é enviado
+PyPDF2 = ModuloTardio('PyPDF2')
+docx = ModuloTardio('docx')
 
 # Configurações de upload
 UPLOAD_FOLDER = 'uploads'
@@ -2239,22 +3153,22 @@ def extract_text_from_pdf(filepath):
         with open(filepath, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
             total_pages = len(pdf_reader.pages)
-            print(f"[PDF] Processando {total_pages} páginas...")
+            logger.info(f"[PDF] Processando {total_pages} páginas...")
 
             for i, page in enumerate(pdf_reader.pages):
                 try:
                     page_text = page.extract_text()
                     text += page_text + "\n"
                     if (i + 1) % 10 == 0:
-                        print(f"[PDF] Processadas {i + 1}/{total_pages} páginas")
+                        logger.debug(f"[PDF] Processadas {i + 1}/{total_pages} páginas")
                 except Exception as e:
-                    print(f"[PDF] Erro na página {i + 1}: {e}")
+                    logger.error(f"[PDF] Erro na página {i + 1}: {e}")
                     continue
 
-        print(f"[PDF] ✅ Extraído {len(text)} caracteres")
+        logger.info(f"[PDF] ✅ Extraído {len(text)} caracteres")
         return text.strip()
     except Exception as e:
-        print(f"[PDF] ❌ Erro ao extrair texto: {e}")
+        logger.error(f"[PDF] ❌ Erro ao extrair texto: {e}")
         return None
 
 
@@ -2264,17 +3178,17 @@ def extract_text_from_docx(filepath):
         doc = docx.Document(filepath)
         text = ""
         total_paragraphs = len(doc.paragraphs)
-        print(f"[DOCX] Processando {total_paragraphs} parágrafos...")
+        logger.info(f"[DOCX] Processando {total_paragraphs} parágrafos...")
 
         for i, paragraph in enumerate(doc.paragraphs):
             text += paragraph.text + "\n"
             if (i + 1) % 100 == 0:
-                print(f"[DOCX] Processados {i + 1}/{total_paragraphs} parágrafos")
+                logger.debug(f"[DOCX] Processados {i + 1}/{total_paragraphs} parágrafos")
 
-        print(f"[DOCX] ✅ Extraído {len(text)} caracteres")
+        logger.info(f"[DOCX] ✅ Extraído {len(text)} caracteres")
         return text.strip()
     except Exception as e:
-        print(f"[DOCX] ❌ Erro ao extrair texto: {e}")
+        logger.error(f"[DOCX] ❌ Erro ao extrair texto: {e}")
         return None
 
 
@@ -2283,20 +3197,20 @@ def extract_text_from_txt(filepath):
     try:
         with open(filepath, 'r', encoding='utf-8') as file:
             text = file.read()
-        print(f"[TXT] ✅ Extraído {len(text)} caracteres")
+        logger.info(f"[TXT] ✅ Extraído {len(text)} caracteres")
         return text.strip()
     except UnicodeDecodeError:
         # Tenta com outra codificação
         try:
             with open(filepath, 'r', encoding='latin-1') as file:
                 text = file.read()
-            print(f"[TXT] ✅ Extraído {len(text)} caracteres (latin-1)")
+            logger.info(f"[TXT] ✅ Extraído {len(text)} caracteres (latin-1)")
             return text.strip()
         except Exception as e:
-            print(f"[TXT] ❌ Erro ao ler arquivo: {e}")
+            logger.error(f"[TXT] ❌ Erro ao ler arquivo: {e}")
             return None
     except Exception as e:
-        print(f"[TXT] ❌ Erro ao ler arquivo: {e}")
+        logger.error(f"[TXT] ❌ Erro ao ler arquivo: {e}")
         return None
 
 
@@ -2320,7 +3234,7 @@ def extract_youtube_transcript(video_id):
     import os
     import tempfile
 
-    print(f"[YOUTUBE] Video ID: {video_id}")
+    logger.info(f"[YOUTUBE] Video ID: {video_id}")
 
     try:
         # Verificar se yt-dlp está instalado
@@ -2334,8 +3248,8 @@ def extract_youtube_transcript(video_id):
             if result.returncode != 0:
                 raise Exception("yt-dlp não está instalado")
         except FileNotFoundError:
-            print("[YOUTUBE] ❌ yt-dlp não encontrado")
-            print("[YOUTUBE] Instale: pip install yt-dlp --break-system-packages")
+            logger.error("[YOUTUBE] ❌ yt-dlp não encontrado")
+            logger.error("[YOUTUBE] Instale: pip install yt-dlp --break-system-packages")
             return None
 
         # URL do vídeo
@@ -2345,7 +3259,7 @@ def extract_youtube_transcript(video_id):
         with tempfile.TemporaryDirectory() as temp_dir:
             subtitle_file = os.path.join(temp_dir, 'subtitle')
 
-            print("[YOUTUBE] Baixando legendas com yt-dlp...")
+            logger.info("[YOUTUBE] Baixando legendas com yt-dlp...")
 
             # Comando para baixar legendas
             cmd = [
@@ -2359,12 +3273,13 @@ def extract_youtube_transcript(video_id):
                 url
             ]
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            with medir_externo('yt_dlp'):
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=30
+                )
 
             # Procurar arquivo de legenda
             subtitle_files = [
@@ -2373,14 +3288,14 @@ def extract_youtube_transcript(video_id):
             ]
 
             if not subtitle_files:
-                print("[YOUTUBE] ❌ Nenhuma legenda baixada")
-                print(f"[YOUTUBE] Saída: {result.stderr[:200]}")
+                logger.error("[YOUTUBE] ❌ Nenhuma legenda baixada")
+                logger.error(f"[YOUTUBE] Saída: {result.stderr[:200]}")
                 return None
 
             # Ler primeira legenda encontrada
             subtitle_path = os.path.join(temp_dir, subtitle_files[0])
 
-            print(f"[YOUTUBE] ✅ Legenda encontrada: {subtitle_files[0]}")
+            logger.info(f"[YOUTUBE] ✅ Legenda encontrada: {subtitle_files[0]}")
 
             with open(subtitle_path, 'r', encoding='utf-8') as f:
                 vtt_content = f.read()
@@ -2401,22 +3316,20 @@ def extract_youtube_transcript(video_id):
                 texts.append(line)
 
             if not texts:
-                print("[YOUTUBE] ❌ Nenhum texto extraído")
+                logger.error("[YOUTUBE] ❌ Nenhum texto extraído")
                 return None
 
             full_text = " ".join(texts)
 
-            print(f"[YOUTUBE] ✅ {len(full_text)} caracteres, {len(texts)} linhas")
+            logger.info(f"[YOUTUBE] ✅ {len(full_text)} caracteres, {len(texts)} linhas")
             return full_text
 
     except subprocess.TimeoutExpired:
-        print("[YOUTUBE] ❌ Timeout ao executar yt-dlp")
+        logger.error("[YOUTUBE] ❌ Timeout ao executar yt-dlp")
         return None
 
     except Exception as e:
-        print(f"[YOUTUBE] ❌ Erro: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[YOUTUBE] ❌ Erro: {e}")
         return None
 
 
@@ -2425,8 +3338,7 @@ def extract_youtube_transcript(video_id):
 # ============================================
 
 if __name__ == "__main__":
-    print("🧪 TESTANDO COM YT-DLP")
-    print("=" * 70)
+    logger.info("🧪 TESTANDO COM YT-DLP")
 
     videos = [
         ("dQw4w9WgXcQ", "Never Gonna Give You Up"),
@@ -2434,21 +3346,18 @@ if __name__ == "__main__":
     ]
 
     for video_id, title in videos:
-        print(f"\n📹 {title}")
-        print("-" * 70)
+        logger.info(f"📹 {title}")
 
         result = extract_youtube_transcript(video_id)
 
         if result:
-            print(f"\n✅ SUCESSO! {len(result)} caracteres")
-            print(f"Preview: {result[:200]}...")
+            logger.info(f"✅ SUCESSO! {len(result)} caracteres")
+            logger.debug(f"Preview: {result[:200]}...")
         else:
-            print("\n❌ FALHOU")
+            logger.warning("❌ FALHOU")
 
-        print("=" * 70)
 
-
-def chamar_gemini_api(mensagem):
+def chamar_gemini_api(mensagem, usuario_id=None):
     """
     Chama a API do Gemini com a mensagem fornecida
     """
@@ -2457,73 +3366,165 @@ def chamar_gemini_api(mensagem):
         model = genai.GenerativeModel('models/gemini-2.5-flash')
 
         # Gerar resposta
-        print(f"[GEMINI] Enviando {len(mensagem)} caracteres para análise...")
-        response = model.generate_content(mensagem)
+        logger.info(f"[GEMINI] Enviando {len(mensagem)} caracteres para análise...")
+        response = gerar_conteudo_gemini(model, mensagem, usuario_id)
 
-        print(f"[GEMINI] ✅ Resposta recebida")
+        logger.info(f"[GEMINI] ✅ Resposta recebida")
         return response.text
 
+    except CotaExcedida as e:
+        return MENSAGEM_COTA_GEMINI.format(espera=e.retry_after)
     except Exception as e:
-        print(f"[GEMINI API] ❌ Erro: {e}")
+        logger.error(f"[GEMINI API] ❌ Erro: {e}")
         return f"Erro ao processar sua solicitação: {str(e)}"
 
 
 # ============================================
-# ROTA: Chat com arquivo (SEM LIMITES)
+# STREAMING DE RESPOSTAS (SSE)
 # ============================================
-@app.route('/chat/with-file', methods=['POST'])
-def chat_with_file():
-    """Processa mensagem com arquivo anexado - SEM LIMITES DE TAMANHO"""
-    try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+def formatar_evento_sse(dados):
+    """Serializa um evento no formato text/event-stream"""
+    return f"data: {json.dumps(dados, ensure_ascii=False)}\n\n"
 
-        file = request.files['file']
-        message = request.form.get('message', '')
 
-        if file.filename == '':
-            return jsonify({'error': 'Arquivo sem nome'}), 400
+def resposta_sse(gerador):
+    """Cria a resposta HTTP em streaming para um gerador de eventos SSE"""
+    return Response(
+        stream_with_context(gerador),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Tipo de arquivo não permitido. Use: PDF, DOC, DOCX ou TXT'}), 400
+def gerar_trechos_gemini(prompt, modelo=None, safety_settings=None, usuario_id=None):
+    """Chama o Gemini com stream=True e devolve os trechos de texto conforme chegam"""
+    modelo = modelo or genai.GenerativeModel('models/gemini-2.5-flash')
+    if safety_settings:
+        response = gerar_conteudo_gemini(modelo, prompt, usuario_id, safety_settings=safety_settings, stream=True)
+    else:
+        response = gerar_conteudo_gemini(modelo, prompt, usuario_id, stream=True)
 
-        print(f"\n[ARQUIVO] Recebido: {file.filename}")
+    caracteres = 0
+    # O corpo em streaming é lido depois do after_request: entra só no histograma por serviço
+    with medir_externo('gemini_stream'):
+        for trecho in response:
+            if trecho.parts:
+                caracteres += len(trecho.text)
+                yield trecho.text
+    agendador_gemini.registrar_tokens(caracteres // 4)
 
-        # Salvar arquivo temporariamente
-        filename = secure_filename(cast(str, file.filename))
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
 
-        file_size = os.path.getsize(filepath)
-        print(f"[ARQUIVO] Tamanho: {file_size / (1024 * 1024):.2f} MB")
+def transmitir_texto_pronto(texto, **extras):
+    """Envia uma resposta já pronta (sem chamar o modelo) como um único trecho"""
+    yield formatar_evento_sse({'chunk': texto})
+    yield formatar_evento_sse({'done': True, **extras})
 
-        # Extrair texto baseado no tipo de arquivo
-        extension = filename.rsplit('.', 1)[1].lower()
 
-        if extension == 'pdf':
-            document_text = extract_text_from_pdf(filepath)
-        elif extension == 'docx':
-            document_text = extract_text_from_docx(filepath)
-        elif extension in ['txt', 'doc']:
-            document_text = extract_text_from_txt(filepath)
-        else:
-            document_text = None
+def transmitir_resposta_gemini(prompt, user_id, mensagem_usuario, modelo=None, safety_settings=None,
+                               ao_concluir=None, **extras):
+    """
+    Repassa os trechos do Gemini ao navegador e, ao final, salva o texto completo
+    com salvar_historico_chat. A latência medida é o tempo até o primeiro trecho.
+    ao_concluir(resposta) é chamado apenas quando o modelo respondeu sem erro.
+    Se o navegador desconectar no meio, o que já foi enviado é salvo no histórico.
+    """
+    inicio = time.time()
+    ttft_ms = None
+    partes = []
+    sucesso = False
+    enviado_ate_o_fim = False
 
-        # Remover arquivo após processamento
+    try:
         try:
-            os.remove(filepath)
-            print(f"[ARQUIVO] ✅ Arquivo temporário removido")
-        except:
-            pass
+            for trecho in gerar_trechos_gemini(prompt, modelo, safety_settings, usuario_id=user_id):
+                if ttft_ms is None:
+                    ttft_ms = int((time.time() - inicio) * 1000)
+                    logger.info(f"[CHAT STREAM] Primeiro trecho em {ttft_ms} ms")
+                partes.append(trecho)
+                yield formatar_evento_sse({'chunk': trecho})
+
+            if not partes:
+                partes.append("Não consegui gerar resposta.")
+                yield formatar_evento_sse({'chunk': partes[0]})
+            else:
+                sucesso = True
+        except CotaExcedida as e:
+            partes.append(MENSAGEM_COTA_GEMINI.format(espera=e.retry_after))
+            yield formatar_evento_sse({'chunk': partes[-1]})
+        except Exception as e:
+            logger.error(f"[CHAT STREAM] ❌ Erro Gemini: {e}")
+            erro = "Erro de conexão."
+            partes.append(("\n\n" if partes else "") + erro)
+            yield formatar_evento_sse({'chunk': partes[-1]})
+        enviado_ate_o_fim = True
+    finally:
+        # Também roda no GeneratorExit (cliente desconectou): salva o trecho já enviado
+        resposta_final = "".join(partes)
+        total_ms = int((time.time() - inicio) * 1000)
+        if enviado_ate_o_fim:
+            logger.info(f"[CHAT STREAM] ✅ {len(resposta_final)} caracteres em {total_ms} ms")
+        else:
+            logger.info(f"[CHAT STREAM] Cliente desconectou após {len(resposta_final)} caracteres ({total_ms} ms)")
+
+        if user_id and resposta_final:
+            salvar_historico_chat(user_id, mensagem_usuario, resposta_final)
+        if sucesso and ao_concluir:
+            ao_concluir(resposta_final)
+
+    yield formatar_evento_sse({'done': True, 'ttft_ms': ttft_ms, 'total_ms': total_ms, **extras})
+
+
+# ============================================
+# ROTA: Chat com arquivo (SEM LIMITES)
+# ============================================
+def preparar_prompt_arquivo(file, message):
+    """
+    Valida o arquivo enviado, extrai o texto e monta o prompt de análise.
+    Retorna (prompt, filename, document_text, erro); erro é a mensagem para o cliente.
+    """
+    if file.filename == '':
+        return None, None, None, 'Arquivo sem nome'
+
+    if not allowed_file(file.filename):
+        return None, None, None, 'Tipo de arquivo não permitido. Use: PDF, DOC, DOCX ou TXT'
+
+    logger.info(f"[ARQUIVO] Recebido: {file.filename}")
+
+    # Salvar arquivo temporariamente
+    filename = secure_filename(cast(str, file.filename))
+    filepath = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(filepath)
+
+    file_size = os.path.getsize(filepath)
+    logger.info(f"[ARQUIVO] Tamanho: {file_size / (1024 * 1024):.2f} MB")
+
+    # Extrair texto baseado no tipo de arquivo
+    extension = filename.rsplit('.', 1)[1].lower()
 
-        if not document_text:
-            return jsonify({'error': 'Não foi possível extrair texto do arquivo'}), 400
+    if extension == 'pdf':
+        document_text = extract_text_from_pdf(filepath)
+    elif extension == 'docx':
+        document_text = extract_text_from_docx(filepath)
+    elif extension in ['txt', 'doc']:
+        document_text = extract_text_from_txt(filepath)
+    else:
+        document_text = None
+
+    # Remover arquivo após processamento
+    try:
+        os.remove(filepath)
+        logger.debug(f"[ARQUIVO] ✅ Arquivo temporário removido")
+    except:
+        pass
+
+    if not document_text:
+        return None, filename, None, 'Não foi possível extrair texto do arquivo'
 
-        # ✅ SEM LIMITE DE TAMANHO - Processa todo o texto
-        print(f"[PROCESSAMENTO] Texto extraído: {len(document_text)} caracteres")
+    # ✅ SEM LIMITE DE TAMANHO - Processa todo o texto
+    logger.info(f"[PROCESSAMENTO] Texto extraído: {len(document_text)} caracteres")
 
-        # Criar prompt com contexto do documento
-        enhanced_message = f"""Você recebeu um documento para análise.
+    # Criar prompt com contexto do documento
+    enhanced_message = f"""Você recebeu um documento para análise.
 
 DOCUMENTO ({len(document_text)} caracteres):
 ---
@@ -2534,12 +3535,33 @@ PERGUNTA DO USUÁRIO: {message if message else "Faça um resumo completo e detal
 
 Por favor, responda à pergunta com base no conteúdo completo do documento fornecido acima."""
 
-        print(f"[GEMINI] Enviando {len(enhanced_message)} caracteres para análise...")
+    return enhanced_message, filename, document_text, None
+
+
+@app.route('/chat/with-file', methods=['POST'])
+def chat_with_file():
+    """Processa mensagem com arquivo anexado - SEM LIMITES DE TAMANHO"""
+    espera = rate_limiter.verificar('chat_arquivo', identificador_rate_limit())
+    if espera:
+        return resposta_rate_limit(espera)
+
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+
+        file = request.files['file']
+        message = request.form.get('message', '')
+
+        enhanced_message, filename, document_text, erro = preparar_prompt_arquivo(file, message)
+        if erro or enhanced_message is None or document_text is None:
+            return jsonify({'error': erro}), 400
+
+        logger.info(f"[GEMINI] Enviando {len(enhanced_message)} caracteres para análise...")
 
         # Chamar Gemini API
-        response_text = chamar_gemini_api(enhanced_message)
+        response_text = chamar_gemini_api(enhanced_message, session.get('user_id'))
 
-        print(f"[GEMINI] ✅ Resposta recebida: {len(response_text)} caracteres")
+        logger.info(f"[GEMINI] ✅ Resposta recebida: {len(response_text)} caracteres")
 
         return jsonify({
             'success': True,
@@ -2550,44 +3572,70 @@ Por favor, responda à pergunta com base no conteúdo completo do documento forn
         })
 
     except Exception as e:
-        print(f"[ERRO] Chat com arquivo: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[ERRO] Chat com arquivo: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/chat/with-file/stream', methods=['POST'])
+def chat_with_file_stream():
+    """Versão em streaming do /chat/with-file"""
+    espera = rate_limiter.verificar('chat_arquivo', identificador_rate_limit())
+    if espera:
+        return resposta_rate_limit(espera)
+
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+
+        file = request.files['file']
+        message = request.form.get('message', '')
+
+        enhanced_message, filename, document_text, erro = preparar_prompt_arquivo(file, message)
+        if erro or enhanced_message is None or document_text is None:
+            return jsonify({'error': erro}), 400
+
+        logger.info(f"[GEMINI] Streaming de {len(enhanced_message)} caracteres para análise...")
+
+        return resposta_sse(transmitir_resposta_gemini(
+            enhanced_message,
+            session.get('user_id'),
+            f"📎 {filename}: {message}" if message else f"📎 {filename}",
+            document_filename=filename,
+            document_size=len(document_text)
+        ))
+
+    except Exception as e:
+        logger.exception(f"[ERRO] Chat com arquivo (stream): {e}")
         return jsonify({'error': str(e)}), 500
 
 
 # ============================================
 # ROTA: Chat com YouTube (SEM LIMITES)
 # ============================================
-@app.route('/chat/with-youtube', methods=['POST'])
-def chat_with_youtube():
-    """Processa mensagem com link do YouTube - SEM LIMITES DE TAMANHO"""
-    try:
-        data = request.get_json()
-        message = data.get('message', '')
-        video_id = data.get('video_id', '')
+ERRO_TRANSCRICAO_YOUTUBE = ('Não foi possível obter a transcrição do vídeo. Possíveis causas:\n' +
+                            '• O vídeo não tem legendas\n' +
+                            '• As legendas estão desativadas\n' +
+                            '• O vídeo é privado ou restrito')
 
-        if not video_id:
-            return jsonify({'error': 'ID do vídeo não fornecido'}), 400
 
-        print(f"\n[YOUTUBE] Video ID: {video_id}")
+def preparar_prompt_youtube(video_id, message):
+    """
+    Baixa a transcrição do vídeo e monta o prompt de análise.
+    Retorna (prompt, transcript_text); ambos None se não houver transcrição.
+    """
+    logger.info(f"[YOUTUBE] Video ID: {video_id}")
 
-        # Extrair transcrição do YouTube
-        transcript_text = extract_youtube_transcript(video_id)
+    # Extrair transcrição do YouTube
+    transcript_text = extract_youtube_transcript(video_id)
 
-        if not transcript_text:
-            return jsonify({
-                'error': 'Não foi possível obter a transcrição do vídeo. Possíveis causas:\n' +
-                         '• O vídeo não tem legendas\n' +
-                         '• As legendas estão desativadas\n' +
-                         '• O vídeo é privado ou restrito'
-            }), 400
+    if not transcript_text:
+        return None, None
 
-        # ✅ SEM LIMITE DE TAMANHO - Processa toda a transcrição
-        print(f"[PROCESSAMENTO] Transcrição: {len(transcript_text)} caracteres")
+    # ✅ SEM LIMITE DE TAMANHO - Processa toda a transcrição
+    logger.info(f"[PROCESSAMENTO] Transcrição: {len(transcript_text)} caracteres")
 
-        # Criar prompt com contexto do vídeo
-        enhanced_message = f"""Você recebeu a transcrição completa de um vídeo do YouTube para análise.
+    # Criar prompt com contexto do vídeo
+    enhanced_message = f"""Você recebeu a transcrição completa de um vídeo do YouTube para análise.
 
 TRANSCRIÇÃO DO VÍDEO (ID: {video_id}, {len(transcript_text)} caracteres):
 ---
@@ -2598,12 +3646,35 @@ PERGUNTA DO USUÁRIO: {message if message else "Faça um resumo completo e detal
 
 Por favor, responda à pergunta com base no conteúdo completo da transcrição do vídeo fornecida acima."""
 
-        print(f"[GEMINI] Enviando {len(enhanced_message)} caracteres para análise...")
+    return enhanced_message, transcript_text
+
+
+@app.route('/chat/with-youtube', methods=['POST'])
+def chat_with_youtube():
+    """Processa mensagem com link do YouTube - SEM LIMITES DE TAMANHO"""
+    espera = rate_limiter.verificar('chat_youtube', identificador_rate_limit())
+    if espera:
+        return resposta_rate_limit(espera)
+
+    try:
+        data = request.get_json()
+        message = data.get('message', '')
+        video_id = data.get('video_id', '')
+
+        if not video_id:
+            return jsonify({'error': 'ID do vídeo não fornecido'}), 400
+
+        enhanced_message, transcript_text = preparar_prompt_youtube(video_id, message)
+
+        if not enhanced_message or not transcript_text:
+            return jsonify({'error': ERRO_TRANSCRICAO_YOUTUBE}), 400
+
+        logger.info(f"[GEMINI] Enviando {len(enhanced_message)} caracteres para análise...")
 
         # Chamar Gemini API
-        response_text = chamar_gemini_api(enhanced_message)
+        response_text = chamar_gemini_api(enhanced_message, session.get('user_id'))
 
-        print(f"[GEMINI] ✅ Resposta recebida: {len(response_text)} caracteres")
+        logger.info(f"[GEMINI] ✅ Resposta recebida: {len(response_text)} caracteres")
 
         return jsonify({
             'success': True,
@@ -2614,9 +3685,42 @@ Por favor, responda à pergunta com base no conteúdo completo da transcrição
         })
 
     except Exception as e:
-        print(f"[ERRO] Chat com YouTube: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"[ERRO] Chat com YouTube: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/chat/with-youtube/stream', methods=['POST'])
+def chat_with_youtube_stream():
+    """Versão em streaming do /chat/with-youtube"""
+    espera = rate_limiter.verificar('chat_youtube', identificador_rate_limit())
+    if espera:
+        return resposta_rate_limit(espera)
+
+    try:
+        data = request.get_json(silent=True) or {}
+        message = data.get('message', '')
+        video_id = data.get('video_id', '')
+
+        if not video_id:
+            return jsonify({'error': 'ID do vídeo não fornecido'}), 400
+
+        enhanced_message, transcript_text = preparar_prompt_youtube(video_id, message)
+
+        if not enhanced_message or not transcript_text:
+            return jsonify({'error': ERRO_TRANSCRICAO_YOUTUBE}), 400
+
+        logger.info(f"[GEMINI] Streaming de {len(enhanced_message)} caracteres para análise...")
+
+        return resposta_sse(transmitir_resposta_gemini(
+            enhanced_message,
+            session.get('user_id'),
+            f"🎥 {video_id}: {message}" if message else f"🎥 {video_id}",
+            video_id=video_id,
+            transcript_size=len(transcript_text)
+        ))
+
+    except Exception as e:
+        logger.exception(f"[ERRO] Chat com YouTube (stream): {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -2673,36 +3777,22 @@ Timestamps:
 "Resuma o documento, liste os pontos principais e crie 5 questões"
 """
 
-print("[CHAT ANEXOS] ✅ Sistema de anexos e YouTube carregado!")
-print("[CHAT ANEXOS] 📄 Suporta: PDF, DOC, DOCX, TXT")
-print("[CHAT ANEXOS] 🎥 Suporta: Vídeos do YouTube com legendas")
-print("[CHAT ANEXOS] ♾️  SEM LIMITES de tamanho!")
-print("[CHAT ANEXOS] 🤖 Usando: Google Gemini API")
+logger.info("[CHAT ANEXOS] ✅ Sistema de anexos e YouTube carregado (PDF, DOC, DOCX, TXT e YouTube via Gemini)")
 
 # ============================================
 # 🚀 INICIALIZAÇÃO
 # ============================================
 if __name__ == '__main__':
-    print("\n" + "=" * 60)
-    print("🚀 INICIANDO IAUniev V5.1 FINAL")
-    print("=" * 60)
+    logger.info("🚀 INICIANDO IAUniev V5.1 FINAL")
 
     init_db()
 
-    print("\n📌 SCRAPERS DISPONÍVEIS:")
-    if SCRAPER_DISPONIVEL:
-        print("   ✅ AVA (Materiais de aula)")
-    if LYCEUM_DISPONIVEL:
-        print("   ✅ LYCEUM (Notas e faltas)")
-
-    print("\n📌 COMPORTAMENTO:")
-    print("   • 1º LOGIN: Scraping automático (5-8 min)")
-    print("   • 2º+ LOGIN: Instantâneo (< 5 seg)")
-    print("   • BOTÕES: Re-sincroniza quando quiser")
-    print("   • SENHA LYCEUM: 9 primeiros dígitos do CPF\n")
-
-    print(f"🌐 Servidor rodando em: http://0.0.0.0:5000")
-    print("=" * 60 + "\n")
+    scrapers = [nome for nome, disponivel in (('AVA (materiais de aula)', SCRAPER_DISPONIVEL),
+                                              ('LYCEUM (notas e faltas)', LYCEUM_DISPONIVEL)) if disponivel]
+    logger.info(f"📌 Scrapers disponíveis: {', '.join(scrapers) or 'nenhum'}")
+    logger.info("📌 Comportamento: 1º login faz o scraping automático (5-8 min); nos seguintes é instantâneo "
+                "(< 5 seg); os botões re-sincronizam quando quiser; senha do Lyceum = 9 primeiros dígitos do CPF")
+    logger.info("🌐 Servidor rodando em: http://0.0.0.0:5000")
 
     app.run(
         debug=True,
@@ -0,0 +1,163 @@
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+FONTES = ('lyceum', 'ava')
+
+
+# ============================================
+# ATUALIZAÇÃO AGENDADA (FORA DO HORÁRIO DE PICO)
+# ============================================
+# Uma vez por dia, dentro da janela (ex.: 2h-6h), monta a fila de usuários
+# com dados velhos e os sincroniza em segundo plano:
+# - prioridade: quanto mais tempo sem atualizar e mais recente o último
+#   acesso, antes na fila; quem não entra há `dias_inativo` dias fica de fora
+# - no máximo `simultaneas` sincronizações ao mesmo tempo (semáforo)
+# - cada início espera um intervalo aleatório (jitter), para não bater no
+#   portal em rajada
+# O que não couber na janela fica para a noite seguinte.
+def ler_janela(texto):
+    """'2-6' -> (2, 6). A janela pode passar da meia-noite ('23-5') e terminar em 24"""
+    try:
+        inicio, fim = (int(parte) for parte in texto.split('-'))
+    except ValueError:
+        raise ValueError(f"Janela de atualização inválida: {texto!r} (use HORA_INICIO-HORA_FIM, ex.: 2-6)")
+    if not 0 <= inicio <= 23 or not 0 <= fim <= 24 or (fim - inicio) % 24 == 0:
+        raise ValueError(f"Janela de atualização inválida: {texto!r} (horas de 0 a 24, início diferente do fim)")
+    return inicio, fim
+
+
+def prioridade(candidato, agora, fonte):
+    """Horas sem atualizar (até 1 semana) divididas pelos dias desde o último acesso (+1)"""
+    ultima = candidato.get(f'ultima_{fonte}')
+    horas_velho = 7 * 24 if ultima is None else min((agora - ultima).total_seconds() / 3600, 7 * 24)
+    acesso = candidato.get('ultimo_acesso') or agora
+    dias_sem_acesso = max(0.0, (agora - acesso).total_seconds() / 86400)
+    return horas_velho / (1 + dias_sem_acesso)
+
+
+class AtualizacaoAgendada:
+    def __init__(self, listar_candidatos, atualizar, janela=(2, 6), simultaneas=2,
+                 intervalo_minimo=timedelta(hours=20), dias_inativo=14, jitter_maximo=90,
+                 reservar_janela=None):
+        """
+        - listar_candidatos(): dicts com 'usuario_id', 'ultimo_acesso', 'ultima_lyceum'
+          e 'ultima_ava' (datetime ou None) e, opcional, 'fontes' que o usuário tem
+        - atualizar(candidato, fonte): sincroniza e só retorna ao terminar
+        - janela: (hora_inicio, hora_fim) do horário fora de pico (ver ler_janela)
+        - reservar_janela(inicio): True se este processo roda a janela que começa em
+          `inicio`; com vários workers, só o primeiro a reservar roda (None = sempre roda)
+        """
+        self.listar_candidatos = listar_candidatos
+        self.atualizar = atualizar
+        self.janela = janela
+        self.intervalo_minimo = intervalo_minimo
+        self.dias_inativo = dias_inativo
+        self.jitter_maximo = jitter_maximo
+        self.reservar_janela = reservar_janela
+
+        self._vagas = threading.Semaphore(simultaneas)
+        self._parar = threading.Event()
+        self._thread = None
+
+    # ---------- API ----------
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name='atualizacao-agendada', daemon=True)
+        self._thread.start()
+        inicio, fim = self.janela
+        logger.info(f"[ATUALIZAÇÃO] Agendada entre {inicio}h e {fim}h (próxima: {self.proxima_janela():%d/%m %H:%M})")
+
+    def parar(self):
+        self._parar.set()
+
+    def janela_de(self, agora):
+        """(início, fim) da janela em andamento ou, fora dela, da próxima"""
+        hora_inicio, hora_fim = self.janela
+        duracao = timedelta(hours=(hora_fim - hora_inicio) % 24)
+        # Último início até agora (o de ontem, se hoje ainda não chegou): se a janela
+        # passa da meia-noite (ex.: 23h-5h), a de ontem ainda pode estar aberta
+        inicio = agora.replace(hour=hora_inicio, minute=0, second=0, microsecond=0)
+        if inicio > agora:
+            inicio -= timedelta(days=1)
+        if agora >= inicio + duracao:
+            inicio += timedelta(days=1)
+        return inicio, inicio + duracao
+
+    def proxima_janela(self, agora=None):
+        """Início da próxima janela (agora, se já estiver dentro dela)"""
+        agora = agora or datetime.now()
+        return max(self.janela_de(agora)[0], agora)
+
+    def montar_fila(self, candidatos, agora=None):
+        """[(candidato, fonte)] com dados velhos, do mais prioritário ao menos"""
+        agora = agora or datetime.now()
+        limite_acesso = agora - timedelta(days=self.dias_inativo)
+        fila = []
+        for candidato in candidatos:
+            acesso = candidato.get('ultimo_acesso')
+            if acesso is None or acesso < limite_acesso:
+                continue
+            for fonte in FONTES:
+                ultima = candidato.get(f'ultima_{fonte}')
+                if fonte in candidato.get('fontes', FONTES) and (ultima is None or agora - ultima >= self.intervalo_minimo):
+                    fila.append((prioridade(candidato, agora, fonte), candidato, fonte))
+        fila.sort(key=lambda item: item[0], reverse=True)
+        return [(candidato, fonte) for _, candidato, fonte in fila]
+
+    # ---------- interno ----------
+    def _loop(self):
+        while not self._parar.is_set():
+            # Jitter no início da janela: vários processos não começam juntos
+            inicio_janela, fim = self.janela_de(datetime.now())
+            inicio = self.proxima_janela() + timedelta(seconds=random.uniform(0, 600))
+            if self._parar.wait(max(0.0, (inicio - datetime.now()).total_seconds())):
+                return
+            if fim <= datetime.now():
+                continue
+            if self.reservar_janela is None or self.reservar_janela(inicio_janela):
+                self._executar_janela(fim)
+            else:
+                logger.info(f"[ATUALIZAÇÃO] Janela de {inicio_janela:%d/%m %H:%M} já reservada por outro processo")
+            # Não repetir na mesma janela: espera ela acabar
+            self._parar.wait(max(0.0, (fim - datetime.now()).total_seconds()) + 1)
+
+    def _executar_janela(self, fim):
+        try:
+            fila = self.montar_fila(self.listar_candidatos())
+        except Exception as e:
+            logger.error(f"[ATUALIZAÇÃO] Erro ao listar usuários: {e}")
+            return
+        logger.info(f"[ATUALIZAÇÃO] {len(fila)} sincronizações na fila até {fim:%H:%M}")
+
+        iniciadas = 0
+        for candidato, fonte in fila:
+            if self._parar.wait(random.uniform(0, self.jitter_maximo)) or not self._esperar_vaga(fim):
+                break
+            iniciadas += 1
+            threading.Thread(target=self._rodar, args=(candidato, fonte),
+                             name=f"atualizacao-{fonte}-{candidato['usuario_id']}", daemon=True).start()
+        logger.info(f"[ATUALIZAÇÃO] Janela encerrada: {iniciadas}/{len(fila)} sincronizações iniciadas")
+
+    def _esperar_vaga(self, fim):
+        """Bloqueia até uma sincronização terminar; False se a janela acabar (ou parar) antes"""
+        while not self._vagas.acquire(timeout=30):
+            if self._parar.is_set() or datetime.now() >= fim:
+                return False
+        if self._parar.is_set() or datetime.now() >= fim:
+            self._vagas.release()
+            return False
+        return True
+
+    def _rodar(self, candidato, fonte):
+        try:
+            self.atualizar(candidato, fonte)
+        except Exception as e:
+            logger.error(f"[ATUALIZAÇÃO] Erro ao atualizar {fonte} do usuário {candidato['usuario_id']}: {e}")
+        finally:
+            self._vagas.release()
@@ -0,0 +1,246 @@
+"""
+Correção e desempenho dos parsers do Lyceum, sem navegador nem rede.
+
+Uso:
+    python benchmark_parsers.py              # confere com fixtures/lyceum/esperado e mede
+    python benchmark_parsers.py --atualizar  # regrava os resultados esperados
+    python benchmark_parsers.py --repeticoes 2000
+    python benchmark_parsers.py --variantes 10000  # parse_notas x parser anterior
+
+Cada fixture é um dump anonimizado do body.text de uma página do portal
+(*_dom.json: o que os scripts de leitura do DOM devolvem).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+from matchers import (
+    MATCHER_DISCIPLINA, MATCHER_NOVA_DISCIPLINA, MATCHER_MENU_NOTAS, MATCHER_ROTULOS_VERIFICACAO,
+    RE_LINHA_DISCIPLINA, RE_VERIFICACAO, RE_VA, RE_NOTA, RE_DATA_COMPLETA
+)
+from parsers_lyceum import (
+    parse_notas, parse_frequencia, parse_horarios, parse_aulas_por_dia,
+    mes_do_cabecalho, parse_calendario_mes, parse_celulas_calendario, aulas_da_grade, deduplicar_eventos,
+    CABECALHOS_NOTAS, limpar_texto, normalizar_disciplina, linhas_nao_vazias, nota_vazia, finalizar_notas
+)
+
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'lyceum')
+PASTA_ESPERADO = os.path.join(PASTA_FIXTURES, 'esperado')
+
+
+def ler_fixture(nome):
+    with open(os.path.join(PASTA_FIXTURES, nome), encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_calendario(body_text):
+    """Um mês da Agenda, completado com as aulas da grade da fixture de horários"""
+    mes_num, ano, _ = mes_do_cabecalho(body_text)
+    feriados, aulas = set(), set()
+    eventos = parse_calendario_mes(body_text, mes_num, ano, feriados, aulas)
+    eventos += aulas_da_grade(mes_num, ano, parse_horarios(ler_fixture('horarios.txt')), feriados, aulas)
+    return deduplicar_eventos(eventos)
+
+
+def parse_calendario_dom(texto):
+    """Snapshot do JS_MES_AGENDA, completado com as aulas da grade como em parse_calendario"""
+    foto = json.loads(texto)
+    mes_num, ano, _ = mes_do_cabecalho(foto['cabecalho'])
+    feriados, aulas = set(), set()
+    eventos = parse_celulas_calendario(foto, mes_num, ano, feriados, aulas)
+    eventos += aulas_da_grade(mes_num, ano, parse_horarios(ler_fixture('horarios.txt')), feriados, aulas)
+    return deduplicar_eventos(eventos)
+
+
+def parse_horarios_dom(texto):
+    """Resultado do JS_AULAS_POR_DIA (como o Selenium devolve, serializado em JSON)"""
+    return parse_aulas_por_dia(json.loads(texto)['dias'])
+
+
+# nome -> (fixture, parser)
+CASOS = {
+    'notas': ('notas.txt', parse_notas),
+    'frequencia': ('frequencia.txt', parse_frequencia),
+    'horarios': ('horarios.txt', parse_horarios),
+    'horarios_dom': ('horarios_dom.json', parse_horarios_dom),
+    'calendario': ('calendario_2025_10.txt', parse_calendario),
+    'calendario_dom': ('calendario_2025_10_dom.json', parse_calendario_dom),
+}
+
+
+def caminho_esperado(nome):
+    return os.path.join(PASTA_ESPERADO, f"{nome}.json")
+
+
+def conferir(nome, resultado):
+    """Lista de diferenças entre o resultado e o JSON esperado (vazia = ok)"""
+    with open(caminho_esperado(nome), encoding='utf-8') as f:
+        esperado = json.load(f)
+    if resultado == esperado:
+        return []
+    diferencas = [f"{len(resultado)} registros (esperado {len(esperado)})"] if len(resultado) != len(esperado) else []
+    for obtido, correto in zip(resultado, esperado):
+        if obtido != correto:
+            diferencas.append(f"obtido {obtido}\n         esperado {correto}")
+    return diferencas
+
+
+# ============================================
+# PARSER DE NOTAS ANTERIOR (REFERÊNCIA)
+# ============================================
+# Versão que, para cada VA, voltava até 4 linhas atrás da disciplina e lia até
+# 9 linhas à frente da nota. Fica aqui só para conferir que parse_notas (uma
+# passada) devolve o mesmo resultado, inclusive em páginas embaralhadas.
+def registrar_nota_legado(dados_notas, disciplina, tipo_va, nota_valor):
+    disc_key = normalizar_disciplina(disciplina)
+    if disc_key not in dados_notas:
+        dados_notas[disc_key] = nota_vazia(disciplina)
+    campo = tipo_va.lower()
+    if dados_notas[disc_key][campo] == 0.0 or nota_valor > dados_notas[disc_key][campo]:
+        dados_notas[disc_key][campo] = nota_valor
+
+
+def parse_notas_legado(body_text):
+    dados_notas = {}
+    linhas = linhas_nao_vazias(body_text)
+    disciplina_atual = None
+
+    for i, linha in enumerate(linhas):
+        if linha in CABECALHOS_NOTAS:
+            continue
+
+        if len(linha) > 10 and RE_LINHA_DISCIPLINA.match(linha):
+            disciplina = limpar_texto(linha)
+            if MATCHER_MENU_NOTAS.encontra(disciplina):
+                continue
+            if MATCHER_DISCIPLINA.encontra(disciplina):
+                disciplina_atual = disciplina
+                disc_key = normalizar_disciplina(disciplina)
+                if disc_key not in dados_notas:
+                    dados_notas[disc_key] = nota_vazia(disciplina)
+
+        match_verificacao = RE_VERIFICACAO.search(linha)
+        if match_verificacao:
+            tipo_va = f"VA{match_verificacao.group(2)}"
+            for k in range(i - 1, max(0, i - 5), -1):
+                linha_anterior = linhas[k].strip()
+                if MATCHER_DISCIPLINA.encontra(linha_anterior):
+                    if not RE_DATA_COMPLETA.search(linha_anterior) and 'verificação' not in linha_anterior.lower():
+                        disciplina_atual = limpar_texto(linha_anterior)
+                        break
+            if not disciplina_atual:
+                continue
+
+            nota_valor = None
+            for linha_nota in linhas[i + 1:i + 10]:
+                if MATCHER_ROTULOS_VERIFICACAO.encontra(linha_nota) or linha_nota.lower() == 'nota':
+                    continue
+                if '/' in linha_nota or MATCHER_NOVA_DISCIPLINA.encontra(linha_nota):
+                    break
+                match_nota = RE_NOTA.match(linha_nota)
+                if match_nota:
+                    val = float(match_nota.group(1).replace(',', '.'))
+                    if 0 <= val <= 100:
+                        nota_valor = val
+                        break
+            if nota_valor is not None:
+                if nota_valor > 10:
+                    nota_valor = round(nota_valor / 10, 1)
+                registrar_nota_legado(dados_notas, disciplina_atual, tipo_va, nota_valor)
+
+        if disciplina_atual and not match_verificacao:
+            va_match = RE_VA.search(linha)
+            if va_match:
+                nota_valor = None
+                for ln in linhas[i + 1:i + 10]:
+                    if MATCHER_ROTULOS_VERIFICACAO.encontra(ln) or 'nota' in ln.lower() or '/' in ln:
+                        continue
+                    if MATCHER_NOVA_DISCIPLINA.encontra(ln):
+                        break
+                    m2 = RE_NOTA.match(ln)
+                    if m2:
+                        val = float(m2.group(1).replace(',', '.'))
+                        if 0 <= val <= 100:
+                            nota_valor = val
+                            break
+                if nota_valor is not None:
+                    if nota_valor > 10:
+                        nota_valor = round(nota_valor / 10, 1)
+                    registrar_nota_legado(dados_notas, disciplina_atual, f"VA{va_match.group(1)}", nota_valor)
+
+    return finalizar_notas(dados_notas)
+
+
+def variantes_pagina(texto, quantidade, semente=42):
+    """Páginas derivadas da fixture: linhas removidas, repetidas, trocadas e ruído"""
+    gerador = random.Random(semente)
+    linhas = linhas_nao_vazias(texto)
+    ruido = ['Nota', 'VA2', '100', '7,5', '150', '12/11/2025', 'Gráfico de notas', 'Em andamento',
+             'Disciplina de Teste Avançado', '05/11/2025 - 2ª Verificação De Aprendizagem']
+    for _ in range(quantidade):
+        nova = list(linhas)
+        for _ in range(gerador.randint(1, 12)):
+            pos = gerador.randrange(len(nova))
+            operacao = gerador.random()
+            if operacao < 0.3:
+                del nova[pos]
+            elif operacao < 0.5:
+                nova.insert(pos, nova[pos])
+            elif operacao < 0.75 and pos + 1 < len(nova):
+                nova[pos], nova[pos + 1] = nova[pos + 1], nova[pos]
+            else:
+                nova.insert(pos, gerador.choice(ruido))
+        yield '\n'.join(nova)
+
+
+def conferir_equivalencia(texto, quantidade):
+    """Quantas variantes da página dão resultados diferentes entre parse_notas e o legado"""
+    return sum(parse_notas(v) != parse_notas_legado(v) for v in variantes_pagina(texto, quantidade))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=(__doc__ or '').strip().split('\n')[0])
+    parser.add_argument('--atualizar', action='store_true', help='regrava fixtures/lyceum/esperado')
+    parser.add_argument('--repeticoes', type=int, default=500)
+    parser.add_argument('--variantes', type=int, default=2000, help='páginas embaralhadas comparadas com o parser legado')
+    args = parser.parse_args()
+
+    falhas = 0
+    print(f"{'parser':<14} {'resultado':<10} {'registros':>9} {'µs/página':>10} {'MB/s':>8}")
+    for nome, (fixture, funcao) in CASOS.items():
+        texto = ler_fixture(fixture)
+        resultado = funcao(texto)
+
+        if args.atualizar:
+            with open(caminho_esperado(nome), 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+                f.write('\n')
+            status, diferencas = 'gravado', []
+        else:
+            diferencas = conferir(nome, resultado)
+            status = 'ok' if not diferencas else 'DIFERENTE'
+            falhas += bool(diferencas)
+
+        tempo = min(timeit.repeat(lambda: funcao(texto), number=args.repeticoes, repeat=3)) / args.repeticoes
+        mb_por_s = len(texto.encode('utf-8')) / tempo / 1e6
+        print(f"{nome:<14} {status:<10} {len(resultado):>9} {tempo * 1e6:>10.1f} {mb_por_s:>8.2f}")
+        for diferenca in diferencas:
+            print(f"   - {diferenca}")
+
+    # parse_notas x parser anterior: mesma saída e quanto cada um leva
+    texto = ler_fixture('notas.txt')
+    divergentes = conferir_equivalencia(texto, args.variantes)
+    falhas += bool(divergentes)
+    tempo_atual = min(timeit.repeat(lambda: parse_notas(texto), number=args.repeticoes, repeat=3))
+    tempo_legado = min(timeit.repeat(lambda: parse_notas_legado(texto), number=args.repeticoes, repeat=3))
+    print(f"\nnotas x legado: {args.variantes - divergentes}/{args.variantes} variantes iguais, "
+          f"legado leva {tempo_legado / tempo_atual:.2f}x o tempo de parse_notas")
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
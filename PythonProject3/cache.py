@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# ============================================
+# CACHE LRU EM MEMÓRIA (TTL + LIMITE DE TAMANHO)
+# ============================================
+def tamanho_aproximado(valor):
+    """Estimativa barata do tamanho em bytes de um valor guardado no cache"""
+    if isinstance(valor, (str, bytes, bytearray)):
+        return len(valor)
+    if isinstance(valor, dict):
+        return sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """
+    Cache LRU thread-safe.
+    - max_itens: número máximo de entradas
+    - max_bytes: limite de memória (estimado por medir_tamanho)
+    - ttl: validade padrão das entradas em segundos (None = sem expiração)
+    """
+
+    def __init__(self, max_itens=256, max_bytes=None, ttl=None, medir_tamanho=tamanho_aproximado):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.medir_tamanho = medir_tamanho
+
+        self._dados = OrderedDict()  # chave -> (valor, expira_em, tamanho)
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chave, padrao=None):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                self.misses += 1
+                return padrao
+
+            valor, expira_em, _ = item
+            if expira_em is not None and expira_em <= time.time():
+                self._remover(chave)
+                self.misses += 1
+                return padrao
+
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expira_em = time.time() + ttl if ttl else None
+        tamanho = self.medir_tamanho(valor)
+
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+
+            # Valor maior que o cache inteiro: não guarda
+            if self.max_bytes is not None and tamanho > self.max_bytes:
+                return
+
+            self._dados[chave] = (valor, expira_em, tamanho)
+            self._bytes += tamanho
+            self._aplicar_limites()
+
+    def atualizar(self, chave, funcao):
+        """
+        Troca o valor por funcao(valor) de forma atômica, mantendo a expiração.
+        Não faz nada (retorna None) se a chave não existir ou já tiver expirado.
+        """
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None or (item[1] is not None and item[1] <= time.time()):
+                return None
+
+            valor = funcao(item[0])
+            tamanho = self.medir_tamanho(valor)
+            self._dados[chave] = (valor, item[1], tamanho)
+            self._bytes += tamanho - item[2]
+            self._dados.move_to_end(chave)
+            self._aplicar_limites()
+            return valor
+
+    def invalidar(self, chave):
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+
+    def invalidar_onde(self, condicao):
+        """Remove as entradas em que condicao(chave, valor) é verdadeira; retorna quantas saíram"""
+        with self._lock:
+            chaves = [k for k, (v, _, _) in self._dados.items() if condicao(k, v)]
+            for chave in chaves:
+                self._remover(chave)
+            return len(chaves)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'itens': len(self._dados),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions
+            }
+
+    def __len__(self):
+        return len(self._dados)
+
+    def _aplicar_limites(self):
+        while len(self._dados) > self.max_itens or (
+                self.max_bytes is not None and self._bytes > self.max_bytes):
+            chave_antiga = next(iter(self._dados))
+            self._remover(chave_antiga)
+            self.evictions += 1
+
+    def _remover(self, chave):
+        _, _, tamanho = self._dados.pop(chave)
+        self._bytes -= tamanho
@@ -0,0 +1,87 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'calendario_academico.json')
+
+
+# ============================================
+# CALENDÁRIO ACADÊMICO (DADOS ESTÁTICOS)
+# ============================================
+# Lido uma vez do JSON em dados/, indexado por data e por tipo. O JSON dos
+# eventos (com ETag) e o texto usado no prompt do chat já ficam prontos na
+# carga, então nenhuma requisição precisa serializar nada.
+class CalendarioAcademico:
+    def __init__(self, dados):
+        self.dados = dados
+        self.horarios_aulas = dados['horarios_aulas']
+        self.eventos = sorted(dados['eventos'], key=lambda e: e['start'])
+
+        self._datas = [e['start'] for e in self.eventos]  # ordenadas, para bisect
+        self.por_data = defaultdict(list)
+        self.por_tipo = defaultdict(list)
+        for evento in self.eventos:
+            self.por_data[evento['start']].append(evento)
+            self.por_tipo[evento['tipo']].append(evento)
+
+        self.json_eventos = json.dumps(self.eventos, ensure_ascii=False)
+        self.corpo_api = json.dumps({'success': True, 'eventos': self.eventos}, ensure_ascii=False).encode('utf-8')
+        self.etag = hashlib.sha1(self.corpo_api).hexdigest()
+        self.texto_prompt = montar_texto_prompt(dados)
+
+    def entre(self, inicio=None, fim=None):
+        """Eventos com inicio <= start < fim (datas ISO; None = sem limite)"""
+        i = bisect.bisect_left(self._datas, inicio) if inicio else 0
+        j = bisect.bisect_left(self._datas, fim) if fim else len(self._datas)
+        return self.eventos[i:j]
+
+    def do_tipo(self, tipo):
+        return self.por_tipo.get(tipo, [])
+
+
+def montar_texto_prompt(dados):
+    """Texto compacto com grade, disciplinas, docentes e provas para o prompt do chat"""
+    linhas = [
+        f"INFORMAÇÕES DA {dados['instituicao']} - CURSO DE {dados['curso'].upper()}",
+        f"Data de Atualização: {dados['atualizacao']}",
+        "",
+        f"HORÁRIOS DAS AULAS - SEMESTRE {dados['semestre']}",
+    ]
+    for dia, aulas in dados['horarios_aulas'].items():
+        linhas.append(f"{dia.upper()}:")
+        # texto_prompt: linha própria para o prompt quando difere da grade da página (ex.: EAD)
+        linhas.extend(f"• {a.get('texto_prompt') or a['horario'] + ': ' + a['disciplina']}" for a in aulas)
+        linhas.append("")
+
+    linhas.append("DISCIPLINAS DO CURSO:")
+    linhas.extend(f"{i}. {d}" for i, d in enumerate(dados['disciplinas'], 1))
+    linhas.append("")
+
+    linhas.append("CORPO DOCENTE:")
+    linhas.append(f"• Coordenadora: {dados['coordenacao']}")
+    linhas.extend(f"• Prof. {p['nome']} - {p['area']}" for p in dados['docentes'])
+    linhas.append("")
+
+    linhas.append(f"CALENDÁRIO DE PROVAS {dados['semestre']}:")
+    linhas.extend(f"• {p['titulo']}: {p['periodo']}" for p in dados['provas'])
+    return "\n".join(linhas) + "\n"
+
+
+def carregar_calendario(caminho=CAMINHO_PADRAO):
+    with open(caminho, encoding='utf-8') as f:
+        calendario = CalendarioAcademico(json.load(f))
+    logger.info(f"[CALENDARIO] {len(calendario.eventos)} eventos acadêmicos carregados de {os.path.basename(caminho)}")
+    return calendario
+
+
+CALENDARIO_ACADEMICO = carregar_calendario()
+
+# Nomes usados pelo restante do app
+EVENTOS_ACADEMICOS = CALENDARIO_ACADEMICO.eventos
+HORARIOS_AULAS = CALENDARIO_ACADEMICO.horarios_aulas
+DADOS_ACADEMICOS = CALENDARIO_ACADEMICO.texto_prompt
@@ -0,0 +1,72 @@
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CARREGAMENTO TARDIO DE MÓDULOS PESADOS
+# ============================================
+# Selenium, Gemini, PyPDF2, python-docx, reportlab e openpyxl custam centenas
+# de ms para importar e só são usados por algumas rotas. Aqui eles só são
+# importados no primeiro uso, então o worker sobe rápido.
+def modulo_disponivel(*nomes):
+    """True se todos os módulos podem ser importados (sem importá-los)"""
+    try:
+        return all(importlib.util.find_spec(nome) is not None for nome in nomes)
+    except (ImportError, ValueError):
+        return False
+
+
+class ModuloTardio:
+    """
+    Substituto de `import nome`: o import acontece no primeiro acesso a um atributo.
+    - ao_carregar(modulo): executado uma única vez logo após o import (ex.: configure)
+    """
+
+    def __init__(self, nome, ao_carregar=None):
+        self._nome = nome
+        self._ao_carregar = ao_carregar
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    inicio = time.perf_counter()
+                    modulo = importlib.import_module(self._nome)
+                    if self._ao_carregar:
+                        self._ao_carregar(modulo)
+                    self._modulo = modulo
+                    logger.info(f"[IMPORT] {self._nome} carregado sob demanda "
+                                f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+        return self._modulo
+
+    def disponivel(self):
+        return modulo_disponivel(self._nome)
+
+    def __getattr__(self, atributo):
+        return getattr(self.carregar(), atributo)
+
+
+class ObjetoTardio:
+    """Cria o objeto com fabrica() no primeiro acesso a um atributo (ex.: o modelo do Gemini)"""
+
+    def __init__(self, fabrica):
+        self._fabrica = fabrica
+        self._objeto = None
+        self._lock = threading.Lock()
+
+    def obter(self):
+        if self._objeto is None:
+            with self._lock:
+                if self._objeto is None:
+                    self._objeto = self._fabrica()
+        return self._objeto
+
+    def __getattr__(self, atributo):
+        return getattr(self.obter(), atributo)
@@ -0,0 +1,91 @@
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# ESTADO DAS SINCRONIZAÇÕES (AVA / LYCEUM)
+# ============================================
+# Consultas rápidas usadas no login e nas rotas de status. Ficam fora dos
+# scrapers para o app não precisar importar o Selenium só para respondê-las.
+def get_db_connection_estado():
+    # Lido a cada chamada: o app carrega o .env depois de importar este módulo
+    conn = sqlite3.connect(os.getenv('DATABASE', 'unievangelica.db'))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def usuario_tem_cache(user_id):
+    """
+    Verifica se usuário já tem dados salvos.
+    NOTA: Não verifica expiração - cache é infinito!
+    Usuário decide quando atualizar clicando no botão.
+    """
+    try:
+        with get_db_connection_estado() as conn:
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*) FROM conteudos_ava WHERE usuario_id = ?', (user_id,))
+            count = c.fetchone()[0]
+
+            return count > 0
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao verificar cache: {e}")
+        return False
+
+
+def obter_ultima_sincronizacao(user_id):
+    """
+    Retorna data e hora da última sincronização do usuário.
+    Retorna None se nunca sincronizou.
+    """
+    try:
+        with get_db_connection_estado() as conn:
+            c = conn.cursor()
+            c.execute("PRAGMA table_info(conteudos_ava)")
+            cols = {row[1] for row in c.fetchall()}
+            if 'ultima_atualizacao' not in cols:
+                return None
+            c.execute('''
+                SELECT MAX(ultima_atualizacao) as ultima_sync
+                FROM conteudos_ava
+                WHERE usuario_id = ?
+            ''', (user_id,))
+            row = c.fetchone()
+            if row and row['ultima_sync']:
+                return datetime.fromisoformat(row['ultima_sync'])
+            return None
+    except Exception as e:
+        logger.error(f"❌ Erro ao obter última sync: {e}")
+        return None
+
+
+def usuario_tem_cache_lyceum(user_id):
+    try:
+        with get_db_connection_estado() as conn:
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*) FROM notas_aluno WHERE usuario_id = ?', (user_id,))
+            count_notas = c.fetchone()[0]
+            c.execute('SELECT COUNT(*) FROM faltas_aluno WHERE usuario_id = ?', (user_id,))
+            count_faltas = c.fetchone()[0]
+            return count_notas > 0 or count_faltas > 0
+    except Exception as e:
+        logger.error(f"❌ [LYCEUM] Erro ao verificar cache: {e}")
+        return False
+
+
+def obter_ultima_sincronizacao_lyceum(user_id):
+    try:
+        with get_db_connection_estado() as conn:
+            c = conn.cursor()
+            c.execute('SELECT ultima_atualizacao_lyceum FROM usuarios WHERE id = ?', (user_id,))
+            row = c.fetchone()
+            if row and row['ultima_atualizacao_lyceum']:
+                return datetime.fromisoformat(row['ultima_atualizacao_lyceum'])
+            return None
+    except Exception as e:
+        logger.error(f"❌ [LYCEUM] Erro ao obter última sync: {e}")
+        return None
@@ -0,0 +1,228 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PASTA_EXPORTACOES = 'exportacoes'
+VALIDADE_EXPORTACAO = 3600  # segundos até o arquivo de um lote ser apagado
+CABECALHO_NOTAS = ['Disciplina', 'VA1', 'VA2', 'VA3', 'Média', 'Situação']
+
+MIME_PDF = 'application/pdf'
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+# ============================================
+# GERAÇÃO DOS DOCUMENTOS
+# ============================================
+# As funções recebem um iterável de (aluno, notas), consumido um aluno por
+# vez: o XLSX em modo write-only grava cada aba direto em disco, e o PDF é
+# paginado pelo platypus (uma quebra de página por aluno). reportlab e
+# openpyxl são importados dentro das funções, só quando um relatório é gerado.
+def valor_celula(valor):
+    return '' if valor is None else str(valor)
+
+
+def gerar_pdf_notas(destino, alunos):
+    """destino: caminho ou arquivo binário; alunos: iterável de (aluno, notas)"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+    estilo_tabela = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    estilos = getSampleStyleSheet()
+    data_geracao = datetime.now().strftime('%d/%m/%Y')
+    doc = SimpleDocTemplate(destino, pagesize=A4, title="Relatório de Notas - IAUniev")
+
+    historia = []
+    for aluno, notas in alunos:
+        if historia:
+            historia.append(PageBreak())
+        historia.append(Paragraph("RELATÓRIO DE NOTAS - IAUniev", estilos['Title']))
+        historia.append(Paragraph(f"Aluno: {aluno['nome']}", estilos['Normal']))
+        if aluno.get('matricula'):
+            historia.append(Paragraph(f"Matrícula: {aluno['matricula']}", estilos['Normal']))
+        historia.append(Paragraph(f"Data: {data_geracao}", estilos['Normal']))
+        historia.append(Spacer(1, 20))
+
+        linhas = [CABECALHO_NOTAS] + [
+            [Paragraph(nota['disciplina'] or '', estilos['BodyText']),
+             valor_celula(nota['va1']), valor_celula(nota['va2']), valor_celula(nota['va3']),
+             valor_celula(nota['media']), valor_celula(nota['situacao'])]
+            for nota in notas
+        ]
+        # repeatRows: se a tabela quebrar de página, o cabeçalho se repete
+        tabela = Table(linhas, colWidths=[200, 45, 45, 45, 50, 90], repeatRows=1)
+        tabela.setStyle(estilo_tabela)
+        historia.append(tabela)
+
+    if not historia:
+        historia.append(Paragraph("Nenhum aluno encontrado.", estilos['Normal']))
+    doc.build(historia)
+
+
+def nome_aba(nome, usados):
+    """Nome de aba válido no Excel: até 31 caracteres, sem []:*?/\\ e sem repetir"""
+    base = ''.join('_' if ch in '[]:*?/\\' else ch for ch in nome).strip()[:31] or 'Aluno'
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufixo = f" ({n})"
+        candidato = base[:31 - len(sufixo)] + sufixo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def gerar_excel_notas(destino, alunos):
+    """Uma aba por aluno, gravada em streaming (openpyxl write-only)"""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    wb = openpyxl.Workbook(write_only=True)
+    data_geracao = datetime.now().strftime('%d/%m/%Y')
+    usados = set()
+
+    def celula(ws, valor, **estilo):
+        c = WriteOnlyCell(ws, value=valor)
+        for nome, v in estilo.items():
+            setattr(c, nome, v)
+        return c
+
+    for aluno, notas in alunos:
+        ws = wb.create_sheet(nome_aba(aluno['nome'], usados))
+        ws.column_dimensions['A'].width = 40
+        for col in ['B', 'C', 'D', 'E']:
+            ws.column_dimensions[col].width = 10
+        ws.column_dimensions['F'].width = 15
+
+        ws.append([celula(ws, f"Relatório de Notas - {aluno['nome']}", font=Font(size=14, bold=True))])
+        ws.append([f"Data: {data_geracao}"] + ([f"Matrícula: {aluno['matricula']}"] if aluno.get('matricula') else []))
+        ws.append([])
+        ws.append([celula(ws, h, font=Font(bold=True),
+                          fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+                          alignment=Alignment(horizontal="center"))
+                   for h in CABECALHO_NOTAS])
+        for nota in notas:
+            ws.append([nota['disciplina'], nota['va1'], nota['va2'], nota['va3'], nota['media'], nota['situacao']])
+
+    if not usados:
+        wb.create_sheet('Notas').append(["Nenhum aluno encontrado."])
+    wb.save(destino)
+
+
+GERADORES = {
+    'pdf': (gerar_pdf_notas, MIME_PDF, 'pdf'),
+    'excel': (gerar_excel_notas, MIME_XLSX, 'xlsx'),
+}
+
+# Pacote opcional de que cada formato depende
+PACOTES_GERADORES = {
+    'pdf': 'reportlab',
+    'excel': 'openpyxl',
+}
+
+
+def descrever_erro_geracao(formato, erro):
+    """Mensagem para o usuário: o pacote que falta, se for um ImportError, senão uma falha genérica"""
+    if isinstance(erro, ImportError):
+        pacote = (erro.name or '').split('.')[0] or PACOTES_GERADORES[formato]
+        return f"{pacote} não instalado"
+    return "Erro ao gerar o relatório"
+
+
+# ============================================
+# EXPORTAÇÃO EM LOTE (TRABALHO EM SEGUNDO PLANO)
+# ============================================
+# O coordenador pede a exportação da turma, recebe um id e consulta o status;
+# quando fica pronta, o arquivo é baixado pelo link e apagado após a validade.
+class ExportacoesEmLote:
+    def __init__(self, pasta=PASTA_EXPORTACOES, validade=VALIDADE_EXPORTACAO):
+        self.pasta = pasta
+        self.validade = validade
+        self._trabalhos = {}
+        self._lock = threading.Lock()
+        os.makedirs(pasta, exist_ok=True)
+
+    def iniciar(self, dono_id, formato, carregar_alunos, nome_arquivo):
+        """
+        carregar_alunos(): iterável de (aluno, notas), executado na thread do trabalho.
+        Retorna o id do trabalho.
+        """
+        gerar, mimetype, extensao = GERADORES[formato]
+        self._limpar_vencidos()
+
+        trabalho_id = uuid.uuid4().hex
+        trabalho = {
+            'id': trabalho_id,
+            'dono_id': dono_id,
+            'formato': formato,
+            'status': 'processando',
+            'alunos': 0,
+            'erro': None,
+            'arquivo': os.path.join(self.pasta, f"{trabalho_id}.{extensao}"),
+            'nome_download': f"{nome_arquivo}.{extensao}",
+            'mimetype': mimetype,
+            'criado_em': time.time(),
+        }
+        with self._lock:
+            self._trabalhos[trabalho_id] = trabalho
+
+        def contar(alunos):
+            for item in alunos:
+                trabalho['alunos'] += 1
+                yield item
+
+        def executar():
+            inicio = time.time()
+            try:
+                gerar(trabalho['arquivo'], contar(carregar_alunos()))
+                trabalho['status'] = 'pronto'
+                logger.info(f"[EXPORT] Lote {trabalho_id[:8]} ({formato}, {trabalho['alunos']} alunos) "
+                            f"gerado em {time.time() - inicio:.1f}s")
+            except Exception as e:
+                trabalho['status'] = 'erro'
+                trabalho['erro'] = descrever_erro_geracao(formato, e)
+                logger.exception(f"[EXPORT] Erro no lote {trabalho_id[:8]}: {e}")
+                # Não deixa um arquivo pela metade para trás
+                try:
+                    os.remove(trabalho['arquivo'])
+                except OSError:
+                    pass
+
+        threading.Thread(target=executar, name=f"export-{trabalho_id[:8]}", daemon=True).start()
+        return trabalho_id
+
+    def obter(self, trabalho_id, dono_id):
+        """O trabalho, se existir e pertencer ao usuário; senão None"""
+        with self._lock:
+            trabalho = self._trabalhos.get(trabalho_id)
+        if trabalho is None or trabalho['dono_id'] != dono_id:
+            return None
+        return trabalho
+
+    def _limpar_vencidos(self):
+        limite = time.time() - self.validade
+        with self._lock:
+            vencidos = [t for t in self._trabalhos.values()
+                        if t['criado_em'] < limite and t['status'] != 'processando']
+            for trabalho in vencidos:
+                del self._trabalhos[trabalho['id']]
+        for trabalho in vencidos:
+            try:
+                os.remove(trabalho['arquivo'])
+            except OSError:
+                pass
@@ -0,0 +1,133 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+ESPERA_APOS_ERRO = 30
+
+
+# ============================================
+# AGENDADOR DE LEMBRETES (HEAP ORDENADO POR HORÁRIO)
+# ============================================
+# Só os alertas das próximas `horizonte` horas ficam em memória, num heap
+# ordenado pelo horário de disparo. Quando o relógio passa da metade do
+# horizonte, a próxima janela é carregada do banco (carregar_alertas).
+# Cancelar é O(1): a entrada sai de `_ativos` e a cópia no heap é ignorada
+# quando chegar ao topo (cancelamento preguiçoso).
+class AgendadorLembretes:
+    def __init__(self, carregar_alertas, disparar, horizonte=timedelta(hours=6)):
+        """
+        - carregar_alertas(desde, ate): lista de dicts com 'evento_id' e 'quando' (datetime)
+          dos alertas pendentes com desde < quando <= ate (desde=None: inclui atrasados)
+        - disparar(alerta): chamado na thread do agendador quando o alerta vence
+        """
+        self.carregar_alertas = carregar_alertas
+        self.disparar = disparar
+        self.horizonte = horizonte
+
+        self._heap = []           # (timestamp, sequencia, evento_id)
+        self._ativos = {}         # evento_id -> (sequencia, alerta)
+        self._sequencia = 0
+        self._carregado_ate = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._parar = False
+
+    # ---------- API ----------
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar = False
+        self._recarregar(primeira_vez=True)
+        logger.info(f"[LEMBRETES] Agendador iniciado ({len(self._ativos)} alertas nas próximas horas)")
+        self._thread = threading.Thread(target=self._loop, name='agendador-lembretes', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        with self._cond:
+            self._parar = True
+            self._cond.notify()
+
+    def agendar(self, alerta):
+        """Inclui/atualiza um alerta; fora do horizonte carregado ele vem depois, do banco"""
+        with self._cond:
+            # Antes do iniciar nada é guardado em memória: a primeira carga lê o alerta do banco
+            if self._carregado_ate is None:
+                return
+            if alerta['quando'] > self._carregado_ate:
+                self._ativos.pop(alerta['evento_id'], None)
+                return
+            self._inserir(alerta)
+            self._cond.notify()
+
+    def cancelar(self, evento_id):
+        with self._cond:
+            self._ativos.pop(evento_id, None)
+
+    def pendentes(self):
+        with self._cond:
+            return len(self._ativos)
+
+    # ---------- interno ----------
+    def _inserir(self, alerta):
+        self._sequencia += 1
+        self._ativos[alerta['evento_id']] = (self._sequencia, alerta)
+        heapq.heappush(self._heap, (alerta['quando'].timestamp(), self._sequencia, alerta['evento_id']))
+
+    def _recarregar(self, primeira_vez=False):
+        desde = None if primeira_vez else self._carregado_ate
+        ate = datetime.now() + self.horizonte
+        try:
+            alertas = self.carregar_alertas(desde, ate)
+        except Exception as e:
+            logger.error(f"[LEMBRETES] Erro ao carregar alertas: {e}")
+            return False
+        with self._cond:
+            for alerta in alertas:
+                if alerta['evento_id'] not in self._ativos:
+                    self._inserir(alerta)
+            self._carregado_ate = ate
+        return True
+
+    def _proximo_vencido(self):
+        """Remove do heap as entradas canceladas; retorna (alerta vencido ou None, segundos até o próximo)"""
+        agora = time.time()
+        while self._heap:
+            quando, sequencia, evento_id = self._heap[0]
+            ativo = self._ativos.get(evento_id)
+            if ativo is None or ativo[0] != sequencia:
+                heapq.heappop(self._heap)  # cancelado ou reagendado
+                continue
+            if quando > agora:
+                return None, quando - agora
+            heapq.heappop(self._heap)
+            del self._ativos[evento_id]
+            return ativo[1], 0
+        return None, None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._parar:
+                    return
+                alerta, espera = self._proximo_vencido()
+                if alerta is None:
+                    if self._carregado_ate is None:
+                        ate_recarga = 0
+                    else:
+                        ate_recarga = (self._carregado_ate - self.horizonte / 2 - datetime.now()).total_seconds()
+                    espera = ate_recarga if espera is None else min(espera, ate_recarga)
+                    if espera > 0:
+                        self._cond.wait(timeout=espera)
+                        continue
+
+            if alerta is not None:
+                try:
+                    self.disparar(alerta)
+                except Exception as e:
+                    logger.error(f"[LEMBRETES] Erro ao disparar alerta do evento {alerta['evento_id']}: {e}")
+            elif not self._recarregar(primeira_vez=self._carregado_ate is None):
+                time.sleep(ESPERA_APOS_ERRO)
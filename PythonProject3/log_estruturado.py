@@ -0,0 +1,135 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Id que amarra as linhas de uma requisição ou de uma sincronização ('-' fora delas)
+CORRELACAO = contextvars.ContextVar('correlacao', default='-')
+
+# Atributos que todo LogRecord tem; o resto veio de extra={...} e vai para o JSON
+ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'correlacao'}
+
+FORMATO_TEXTO = '%(asctime)s %(levelname)-7s [%(correlacao)s] %(name)s: %(message)s'
+
+
+# ============================================
+# LOGS ESTRUTURADOS
+# ============================================
+# Quem loga só enfileira o registro (QueueHandler); uma thread à parte
+# (QueueListener) formata e escreve no stdout e, se LOG_ARQUIVO estiver
+# definido, num arquivo rotativo. Assim uma sync ou uma rota nunca espera
+# pelo I/O do terminal. Variáveis de ambiente:
+# - LOG_LEVEL: DEBUG, INFO (padrão), WARNING, ERROR
+# - LOG_FORMATO: json (padrão) ou texto
+# - LOG_ARQUIVO: caminho do arquivo (ex.: scraper.log)
+# - LOG_AMOSTRA_DUMPS: fração dos dumps de página gravados em DEBUG (padrão 0.05)
+class FormatadorJson(logging.Formatter):
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'correlacao': getattr(record, 'correlacao', '-'),
+            'msg': record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FiltroCorrelacao(logging.Filter):
+    """Copia o id de correlação para o registro na thread de quem loga (antes da fila)"""
+
+    def filter(self, record):
+        record.correlacao = CORRELACAO.get()
+        return True
+
+
+class HandlerFila(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (e conta) em vez de bloquear quando a fila enche"""
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def prepare(self, record):
+        # Resolve a mensagem e o traceback aqui: args e exc_info não atravessam a fila
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def configurar_logs():
+    """Instala a fila e os handlers no logger raiz (só na primeira chamada)"""
+    raiz = logging.getLogger()
+    if any(isinstance(h, HandlerFila) for h in raiz.handlers):
+        return
+
+    if os.getenv('LOG_FORMATO', 'json').lower() == 'texto':
+        formatador = logging.Formatter(FORMATO_TEXTO, datefmt='%H:%M:%S')
+    else:
+        formatador = FormatadorJson()
+
+    destinos = [logging.StreamHandler(sys.stdout)]
+    arquivo = os.getenv('LOG_ARQUIVO')
+    if arquivo:
+        destinos.append(logging.handlers.RotatingFileHandler(
+            arquivo, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8'))
+    for destino in destinos:
+        destino.setFormatter(formatador)
+
+    fila = queue.Queue(maxsize=10000)
+    handler = HandlerFila(fila)
+    handler.addFilter(FiltroCorrelacao())
+    raiz.addHandler(handler)
+    raiz.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    ouvinte = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    ouvinte.start()
+    atexit.register(ouvinte.stop)
+
+
+def novo_id_correlacao():
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def correlacao(id_correlacao=None):
+    """Tudo que for logado dentro do bloco (nesta thread) leva este id"""
+    token = CORRELACAO.set(id_correlacao or novo_id_correlacao())
+    try:
+        yield CORRELACAO.get()
+    finally:
+        CORRELACAO.reset(token)
+
+
+def amostrar_dump(logger, rotulo, texto, limite=4000):
+    """Dump de página em DEBUG, só numa fração das syncs (LOG_AMOSTRA_DUMPS)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= float(os.getenv('LOG_AMOSTRA_DUMPS', '0.05')):
+        return
+    logger.debug("Dump de %s (%d caracteres)", rotulo, len(texto), extra={'dump': texto[:limite]})
@@ -0,0 +1,190 @@
+import re
+import unicodedata
+
+
+# ============================================
+# MATCHERS PRÉ-COMPILADOS (SEM ACENTO / SEM CAIXA)
+# ============================================
+# Cada lista de termos vira UMA regex de alternação compilada uma única vez.
+# Cada termo entra com e sem acento ("calendário" | "calendario"), então o texto
+# só precisa de .lower() antes da busca (bem mais barato que normalizar Unicode).
+def remover_acentos(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch))
+
+
+class MatcherTermos:
+    """
+    Busca qualquer um dos termos num texto, ignorando acentos e maiúsculas.
+    - palavra_inteira=False mantém a semântica de `termo in texto` (substring)
+    """
+
+    def __init__(self, termos, palavra_inteira=False):
+        variantes = set()
+        for termo in termos:
+            if termo:
+                variantes.add(termo.lower())
+                variantes.add(remover_acentos(termo.lower()))
+        # Termos mais longos primeiro: a alternação devolve o casamento mais específico
+        self.termos = sorted(variantes, key=len, reverse=True)
+        padrao = '|'.join(re.escape(t) for t in self.termos) or r'(?!)'
+        if palavra_inteira:
+            padrao = rf'\b(?:{padrao})\b'
+        self.regex = re.compile(padrao)
+
+    def encontra(self, texto):
+        return bool(texto) and self.regex.search(texto.lower()) is not None
+
+    def primeiro(self, texto):
+        """Termo (sem acento) do primeiro casamento, ou None"""
+        m = self.regex.search((texto or '').lower())
+        return remover_acentos(m.group(0)) if m else None
+
+    def todos(self, texto):
+        return {remover_acentos(m.group(0)) for m in self.regex.finditer((texto or '').lower())}
+
+    def __bool__(self):
+        return bool(self.termos)
+
+
+# ============================================
+# TERMOS DO CHAT
+# ============================================
+TERMOS_CALENDARIO = ['quando', 'data', 'dia', 'feriado', 'provas', 'calendário', 'va1', 'va2']
+TERMOS_HORARIOS = ['aula', 'horário', 'segunda', 'terça', 'quarta', 'quinta', 'sexta', 'grade',
+                   'disciplina', 'professor', 'hoje', 'amanhã']
+
+MATCHER_CALENDARIO = MatcherTermos(TERMOS_CALENDARIO)
+MATCHER_HORARIOS = MatcherTermos(TERMOS_HORARIOS)
+
+RE_SEMANA = re.compile(r'semana\s*(\d+)', re.IGNORECASE)
+
+
+def matcher_palavras_mensagem(mensagem, tamanho_minimo=4):
+    """Matcher com as palavras da mensagem (usado para achar a disciplina citada no AVA)"""
+    return MatcherTermos(p for p in mensagem.split() if len(p) >= tamanho_minimo)
+
+
+# ============================================
+# TERMOS DO SCRAPER LYCEUM
+# ============================================
+PALAVRAS_DISCIPLINA = [
+    'FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO',
+    'ALGORITMOS', 'PROGRAMAÇÃO', 'MATEMÁTIC', 'CIDADANIA',
+    'ÉTICA', 'ESPIRITUALIDADE', 'LEITURA', 'INTERPRETAÇÃO',
+    'TEXTO', 'DADOS', 'INFRAESTRUTURA', 'SOLUÇÕES'
+]
+# Palavras que indicam que uma nova disciplina começou (encerra a busca da nota)
+INICIO_NOVA_DISCIPLINA = [
+    'FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO',
+    'ALGORITMOS', 'CIDADANIA', 'LEITURA', 'MATEMÁTIC', 'ÉTICA'
+]
+TERMOS_MENU_NOTAS = [
+    'AVALIAÇÃO', 'DISCIPLINA', 'CALENDÁRIO', 'NOTAS',
+    'FREQUÊNCIA', 'CADASTRO', 'SECRETARIA VIRTUAL',
+    'FINANCEIRO', 'AVALIAÇÃO INSTITUCIONAL', 'BIBLIOTECA',
+    'IDIOMA', 'SAIR', 'AVISO', 'FELIPPE', 'ALMEIDA', 'RODRIGUES',
+    'INTELIGÊNCIA ARTIFICIAL', 'RA:', 'SÉRIE', 'PERÍODO', 'TURMA', 'STATUS'
+]
+TERMOS_MENU_HORARIOS = [
+    'DIA DA SEMANA', 'TODOS', 'HORÁRIO DE AULAS',
+    'INTELIGÊNCIA ARTIFICIAL', 'RA:', 'SÉRIE', 'PERÍODO', 'TURMA',
+    'CALENDÁRIO', 'AVALIAÇÃO', 'DISCIPLINA', 'CADASTRO',
+    'SECRETARIA', 'FINANCEIRO', 'BIBLIOTECA', 'SAIR', 'AVISO'
+]
+ROTULOS_VERIFICACAO = ['verificação', 'gráfico', 'aprendizagem']
+
+MATCHER_DISCIPLINA = MatcherTermos(PALAVRAS_DISCIPLINA)
+MATCHER_DISCIPLINA_FREQUENCIA = MatcherTermos(PALAVRAS_DISCIPLINA + ['ON-LINE', 'ONLINE'])
+MATCHER_NOVA_DISCIPLINA = MatcherTermos(INICIO_NOVA_DISCIPLINA)
+MATCHER_MENU_NOTAS = MatcherTermos(TERMOS_MENU_NOTAS)
+MATCHER_MENU_HORARIOS = MatcherTermos(TERMOS_MENU_HORARIOS)
+MATCHER_ROTULOS_VERIFICACAO = MatcherTermos(ROTULOS_VERIFICACAO)
+
+# Regex usadas dentro dos laços de parsing (compiladas uma vez só)
+RE_ESPACOS = re.compile(r'\s+')
+RE_PONTUACAO_FINAL = re.compile(r'[.,;:]+$')
+RE_LINHA_DISCIPLINA = re.compile(r'^[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ][A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑa-záàâãéèêíïóôõöúçñ\s,\.\-À-ú]+$')
+RE_INICIA_MAIUSCULA = re.compile(r'^[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ]')
+RE_VERIFICACAO = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})\s*-\s*(\d)[ªa]\s*Verificação', re.IGNORECASE)
+RE_VA = re.compile(r'\bVA\s*([123])\b', re.IGNORECASE)
+RE_NOTA = re.compile(r'^(\d{1,3}(?:[.,]\d+)?)$')
+RE_INTEIRO = re.compile(r'^\d+$')
+RE_NUMERO = re.compile(r'(\d+(?:[.,]\d+)?)')
+RE_NUMERO_EXATO = re.compile(r'^(\d+(?:[.,]\d+)?)$')
+RE_CODIGO_DISCIPLINA = re.compile(r'^\d{4}\s*-')
+RE_FALTAS_BLOCO = re.compile(r'Faltas\s*\n?\s*(\d+)', re.IGNORECASE)
+RE_FREQUENCIA_BLOCO = re.compile(r'Frequência.*?(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+RE_HORARIO_EXATO = re.compile(r'^(\d{1,2}:\d{2})\s*[-–]\s*(\d{1,2}:\d{2})$')
+RE_HORARIO = re.compile(r'(\d{1,2}:\d{2})\s*[-–]\s*(\d{1,2}:\d{2})')
+RE_MES_ANO = re.compile(
+    r'(janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)\s+de?\s*(\d{4})')
+RE_DATA_COMPLETA = re.compile(r'(\d{1,2}/\d{1,2}/\d{4})')
+RE_DATA_DIA_MES = re.compile(r'(\d{1,2}/\d{1,2})')
+RE_SITUACAO = re.compile(r"Situação\s*\n\s*([A-Za-zÁ-ú\s]+)", re.IGNORECASE)
+RE_PERIODO = re.compile(r"Período\s*\n\s*([\w\sºª\-\/]+)", re.IGNORECASE)
+RE_DOCENTE = re.compile(r"Docente\s*\n\s*([A-Za-zÁ-ú\s\.]+)", re.IGNORECASE)
+RE_DATA_INICIAL = re.compile(r"Data\s*Inicial\s*\n\s*(\d{2}/\d{2}/\d{4})", re.IGNORECASE)
+
+
+# ============================================
+# MICROBENCHMARK
+# ============================================
+if __name__ == "__main__":
+    import timeit
+
+    mensagens = [
+        "Quando é a prova de Fundamentos matemáticos?",
+        "tenho aula amanhã com o professor Henrique?",
+        "me explica o conteúdo da semana 5 de engenharia de dados",
+        "qual o melhor jeito de estudar para a VA2",
+        "Obrigado!",
+    ]
+    linhas = [
+        "FUNDAMENTOS MATEMÁTICOS PARA COMPUTAÇÃO",
+        "16/09/2025 - 1ª Verificação De Aprendizagem",
+        "Nota",
+        "85,5",
+        "SECRETARIA VIRTUAL",
+        "Leitura e interpretação de texto",
+    ] * 50
+
+    termos_cal = TERMOS_CALENDARIO + ['calendario']
+    termos_hor = TERMOS_HORARIOS + ['horario', 'terca', 'amanha']
+
+    def chat_antigo():
+        for m in mensagens:
+            t = m.lower()
+            any(x in t for x in termos_cal)
+            any(x in t for x in termos_hor)
+
+    def chat_novo():
+        for m in mensagens:
+            MATCHER_CALENDARIO.encontra(m)
+            MATCHER_HORARIOS.encontra(m)
+
+    def scraper_antigo():
+        for linha in linhas:
+            u = linha.upper()
+            any(p in u for p in PALAVRAS_DISCIPLINA)
+            any(p in u for p in TERMOS_MENU_NOTAS)
+            re.search(r'(\d{1,2}/\d{1,2}/\d{4})\s*-\s*(\d)[ªa]\s*Verificação', linha, re.IGNORECASE)
+            re.match(r'^(\d{1,3}(?:[.,]\d+)?)$', linha)
+
+    def scraper_novo():
+        for linha in linhas:
+            MATCHER_DISCIPLINA.encontra(linha)
+            MATCHER_MENU_NOTAS.encontra(linha)
+            RE_VERIFICACAO.search(linha)
+            RE_NOTA.match(linha)
+
+    # Mesmo resultado nos dois caminhos (sem acento o novo casa a mais, nunca a menos)
+    for m in mensagens:
+        t = m.lower()
+        assert any(x in t for x in termos_cal) <= MATCHER_CALENDARIO.encontra(m), m
+        assert any(x in t for x in termos_hor) <= MATCHER_HORARIOS.encontra(m), m
+
+    for nome, func in [('chat (any)', chat_antigo), ('chat (matcher)', chat_novo),
+                       ('scraper (any + re)', scraper_antigo), ('scraper (pré-compilado)', scraper_novo)]:
+        tempo = min(timeit.repeat(func, number=200, repeat=5))
+        print(f"{nome:<26} {tempo * 1000 / 200:.3f} ms/iteração")
@@ -0,0 +1,173 @@
+import bisect
+import contextvars
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Faixas (le) dos histogramas, em segundos e em número de consultas
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITES_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Medição da requisição em andamento nesta thread (None fora de uma requisição)
+REQUISICAO: contextvars.ContextVar[Optional['MedicaoRequisicao']] = contextvars.ContextVar(
+    'metricas_requisicao', default=None)
+
+
+# ============================================
+# HISTOGRAMAS NO FORMATO DO PROMETHEUS
+# ============================================
+# Cada série guarda só a contagem por faixa, a soma e nada mais: observar é
+# um bisect e três somas sob um lock. As faixas acumuladas do formato texto
+# são montadas só quando /metrics é lido. Os valores são por processo (com
+# gunicorn -w N, cada worker expõe os seus).
+def escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_SEGUNDOS):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.limites = limites
+        self._series = {}  # valores dos rótulos -> [contagem por faixa..., +Inf, soma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_rotulos):
+        faixa = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.limites) + 1) + [0.0]
+            serie[faixa] += 1
+            serie[-1] += valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [(valores, list(serie)) for valores, serie in self._series.items()]
+        for valores, serie in sorted(series):
+            rotulos = ','.join(f'{nome}="{escapar_rotulo(valor)}"' for nome, valor in zip(self.rotulos, valores))
+            prefixo = rotulos + ',' if rotulos else ''
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), serie):
+                acumulado += contagem
+                linhas.append(f'{self.nome}_bucket{{{prefixo}le="{limite}"}} {acumulado}')
+            chaves = f'{{{rotulos}}}' if rotulos else ''
+            linhas.append(f"{self.nome}_sum{chaves} {serie[-1]:.6f}")
+            linhas.append(f"{self.nome}_count{chaves} {acumulado}")
+        return linhas
+
+
+DURACAO_REQUISICAO = Histograma(
+    'aulaial_requisicao_segundos', 'Tempo total de resposta por rota', ('rota', 'metodo', 'status'))
+SQL_REQUISICAO = Histograma(
+    'aulaial_requisicao_sql_segundos', 'Tempo gasto em consultas SQL por requisição', ('rota',))
+CONSULTAS_REQUISICAO = Histograma(
+    'aulaial_requisicao_sql_consultas', 'Consultas SQL por requisição', ('rota',), LIMITES_CONSULTAS)
+EXTERNO_REQUISICAO = Histograma(
+    'aulaial_requisicao_externa_segundos', 'Tempo em chamadas externas (Gemini, SMTP, yt-dlp) por requisição',
+    ('rota',))
+CHAMADA_EXTERNA = Histograma(
+    'aulaial_chamada_externa_segundos', 'Duração de cada chamada externa', ('servico',))
+
+HISTOGRAMAS = (DURACAO_REQUISICAO, SQL_REQUISICAO, CONSULTAS_REQUISICAO, EXTERNO_REQUISICAO, CHAMADA_EXTERNA)
+
+
+def exportar_prometheus():
+    linhas = []
+    for histograma in HISTOGRAMAS:
+        linhas.extend(histograma.exportar())
+    return '\n'.join(linhas) + '\n'
+
+
+# ============================================
+# MEDIÇÃO POR REQUISIÇÃO
+# ============================================
+class MedicaoRequisicao:
+    __slots__ = ('inicio', 'sql_consultas', 'sql_segundos', 'externo_segundos')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sql_consultas = 0
+        self.sql_segundos = 0.0
+        self.externo_segundos = 0.0
+
+
+def iniciar_requisicao():
+    REQUISICAO.set(MedicaoRequisicao())
+
+
+def finalizar_requisicao(rota, metodo, status, medicao=None):
+    """
+    Registra a requisição nos histogramas. Chamado no after_request ou, em
+    respostas em streaming, quando a resposta fecha (com a medição guardada).
+    """
+    if medicao is None:
+        medicao = REQUISICAO.get()
+        if medicao is None:
+            return
+        REQUISICAO.set(None)
+    DURACAO_REQUISICAO.observar(time.perf_counter() - medicao.inicio, rota, metodo, str(status))
+    SQL_REQUISICAO.observar(medicao.sql_segundos, rota)
+    CONSULTAS_REQUISICAO.observar(medicao.sql_consultas, rota)
+    EXTERNO_REQUISICAO.observar(medicao.externo_segundos, rota)
+
+
+@contextmanager
+def medir_externo(servico):
+    """Mede uma chamada externa (histograma por serviço e soma na requisição atual, se houver)"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        CHAMADA_EXTERNA.observar(duracao, servico)
+        medicao = REQUISICAO.get()
+        if medicao is not None:
+            medicao.externo_segundos += duracao
+
+
+# ============================================
+# CONEXÃO SQLITE INSTRUMENTADA
+# ============================================
+# sqlite3.connect(..., factory=ConexaoMedida): conn.execute e conn.cursor()
+# passam pelo CursorMedido, que conta e cronometra cada execute dentro de uma
+# requisição. Fora dela (threads de sync, agendadores) o custo é um
+# ContextVar.get(). O tempo de fetchall() das linhas seguintes não entra.
+class CursorMedido(sqlite3.Cursor):
+    def _medir(self, executar, *args):
+        medicao = REQUISICAO.get()
+        if medicao is None:
+            return executar(*args)
+        inicio = time.perf_counter()
+        try:
+            return executar(*args)
+        finally:
+            medicao.sql_consultas += 1
+            medicao.sql_segundos += time.perf_counter() - inicio
+
+    def execute(self, sql, parametros=()):
+        return self._medir(super().execute, sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self._medir(super().executemany, sql, sequencia)
+
+    def executescript(self, script):
+        return self._medir(super().executescript, script)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
@@ -0,0 +1,155 @@
+import logging
+import sqlite3
+import os
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# MIGRAÇÃO: TABELAS LYCEUM V8.0 (CHAVES NATURAIS)
+# ============================================
+# salvar_dados_lyceum grava com INSERT ... ON CONFLICT pela chave natural de
+# cada tabela, então elas precisam de índices únicos. As tabelas que o
+# scraper criava a cada sincronização passam a ser criadas aqui.
+# Executada pelo init_db do app e também pode ser rodada direto:
+#     python migrar_banco_lyceum_v8.py
+
+# tabela -> colunas da chave natural (além de usuario_id)
+CHAVES_NATURAIS = {
+    'notas_aluno': ('disciplina',),
+    'faltas_aluno': ('disciplina',),
+    'horarios_aluno': ('dia_semana', 'horario_inicio', 'disciplina'),
+    'disciplinas_aluno': ('disciplina',),
+    'calendario_lyceum': ('data_evento', 'titulo'),
+}
+
+TABELAS_LYCEUM = [
+    '''
+    CREATE TABLE IF NOT EXISTS horarios_aluno (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        dia_semana INTEGER NOT NULL,
+        dia_nome TEXT,
+        disciplina TEXT NOT NULL,
+        horario_inicio TEXT,
+        horario_fim TEXT,
+        local TEXT,
+        professor TEXT,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS disciplinas_aluno (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        disciplina TEXT NOT NULL,
+        situacao TEXT,
+        periodo TEXT,
+        docente TEXT,
+        data_inicial TEXT,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS calendario_lyceum (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        titulo TEXT NOT NULL,
+        data_evento DATE NOT NULL,
+        tipo TEXT,
+        cor TEXT,
+        descricao TEXT,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS calendario_lyceum_meses (
+        usuario_id INTEGER NOT NULL,
+        ano INTEGER NOT NULL,
+        mes INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        eventos TEXT NOT NULL,
+        atualizado_em TEXT,
+        PRIMARY KEY (usuario_id, ano, mes),
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS alteracoes_lyceum (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario_id INTEGER NOT NULL,
+        disciplina TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        campo TEXT,
+        valor_anterior REAL,
+        valor_novo REAL,
+        mensagem TEXT,
+        criado_em TEXT,
+        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+    )
+    ''',
+]
+
+
+def migrar_tabelas_lyceum(conn):
+    """Cria as tabelas do Lyceum e os índices únicos das chaves naturais (idempotente)"""
+    c = conn.cursor()
+    for sql in TABELAS_LYCEUM:
+        c.execute(sql)
+
+    for tabela, chave in CHAVES_NATURAIS.items():
+        colunas = ', '.join(('usuario_id',) + chave)
+        # Linhas repetidas das gravações antigas (DELETE + INSERT): fica a mais recente
+        removidas = c.execute(f'''
+            DELETE FROM {tabela} WHERE id NOT IN (
+                SELECT MAX(id) FROM {tabela} GROUP BY {colunas}
+            )
+        ''').rowcount
+        if removidas:
+            logger.info(f"[MIGRACAO] {tabela}: {removidas} linhas duplicadas removidas")
+        c.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{tabela}_chave ON {tabela} ({colunas})')
+
+    c.execute('CREATE INDEX IF NOT EXISTS idx_calendario_lyceum_usuario_data '
+              'ON calendario_lyceum (usuario_id, data_evento)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_alteracoes_lyceum_usuario '
+              'ON alteracoes_lyceum (usuario_id, criado_em)')
+    conn.commit()
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='   %(message)s')
+    DATABASE = os.getenv('DATABASE', 'unievangelica.db')
+
+    print("=" * 80)
+    print("🔄 MIGRAÇÃO DO BANCO DE DADOS - LYCEUM V8.0")
+    print("=" * 80)
+    print(f"Database: {DATABASE}\n")
+
+    try:
+        conn = sqlite3.connect(DATABASE)
+        migrar_tabelas_lyceum(conn)
+        conn.close()
+
+        print("✅ MIGRAÇÃO CONCLUÍDA COM SUCESSO!")
+        print()
+        print("📊 Índices únicos (usuario_id + chave natural):")
+        for tabela, chave in CHAVES_NATURAIS.items():
+            print(f"   • {tabela} ({', '.join(chave)})")
+        print()
+        print("=" * 80)
+
+    except sqlite3.OperationalError as e:
+        print(f"❌ Erro de operação no banco: {e}")
+        print()
+        print("Possível solução:")
+        print("   • Rode o app uma vez para criar as tabelas base (usuarios, notas_aluno, faltas_aluno)")
+        print("   • Certifique-se que o banco não está aberto em outro programa")
+
+    except Exception as e:
+        print(f"❌ Erro na migração: {e}")
+        import traceback
+        traceback.print_exc()
+
+    print()
@@ -0,0 +1,707 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from matchers import (
+    MATCHER_DISCIPLINA, MATCHER_DISCIPLINA_FREQUENCIA, MATCHER_NOVA_DISCIPLINA,
+    MATCHER_MENU_NOTAS, MATCHER_MENU_HORARIOS, MATCHER_ROTULOS_VERIFICACAO,
+    RE_ESPACOS, RE_PONTUACAO_FINAL, RE_LINHA_DISCIPLINA,
+    RE_VERIFICACAO, RE_VA, RE_NOTA, RE_INTEIRO, RE_NUMERO, RE_NUMERO_EXATO,
+    RE_CODIGO_DISCIPLINA, RE_FALTAS_BLOCO, RE_FREQUENCIA_BLOCO, RE_HORARIO_EXATO,
+    RE_HORARIO, RE_MES_ANO, RE_DATA_COMPLETA, RE_DATA_DIA_MES
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# PARSERS DO LYCEUM (FUNÇÕES PURAS)
+# ============================================
+# Recebem o texto da página (body.text capturado pelo Selenium) e devolvem os
+# registros. Não dependem de navegador nem de rede: podem ser testados e
+# medidos com os dumps em fixtures/lyceum (ver benchmark_parsers.py).
+def limpar_texto(texto):
+    if not texto:
+        return ""
+    return RE_ESPACOS.sub(' ', texto).strip()
+
+
+def normalizar_disciplina(nome):
+    if not nome:
+        return ""
+    nome = limpar_texto(nome).upper()
+    nome = RE_PONTUACAO_FINAL.sub('', nome)
+    return nome
+
+
+def linhas_nao_vazias(body_text):
+    return [l.strip() for l in body_text.split('\n') if l.strip()]
+
+
+# ============================================
+# NOTAS
+# ============================================
+CABECALHOS_NOTAS = {'Notas', 'Notas e Faltas', 'Gráfico de notas', 'Boletim', 'Nota',
+                    'Situação do aluno', 'Em andamento', 'Aprovado', 'Reprovado'}
+
+
+def nota_vazia(disciplina):
+    return {
+        'disciplina': disciplina,
+        'va1': 0.0,
+        'va2': 0.0,
+        'va3': 0.0,
+        'media': 0.0,
+        'situacao': 'Cursando'
+    }
+
+
+def finalizar_notas(dados_notas):
+    """Média (sempre dividida por 3), situação e correção de valores fora de 0-10"""
+    for dados in dados_notas.values():
+        for va in ['va1', 'va2', 'va3']:
+            if dados[va] < 0 or dados[va] > 10:
+                logger.warning(f"⚠️ ALERTA: {dados['disciplina']} tem {va.upper()}={dados[va]} fora do range 0-10")
+                dados[va] = max(0, min(10, dados[va]))
+
+        soma = dados['va1'] + dados['va2'] + dados['va3']
+        dados['media'] = round(soma / 3, 1)
+
+        notas_preenchidas = sum(1 for n in [dados['va1'], dados['va2'], dados['va3']] if n > 0)
+        if notas_preenchidas >= 3:
+            dados['situacao'] = 'Aprovado' if dados['media'] >= 6.0 else 'Reprovado'
+        else:
+            dados['situacao'] = 'Cursando'
+    return list(dados_notas.values())
+
+
+def valor_nota(linha):
+    """Nota sozinha na linha (0-100, convertida para 0-10) ou None"""
+    match_nota = RE_NOTA.match(linha)
+    if not match_nota:
+        return None
+    val = float(match_nota.group(1).replace(',', '.'))
+    if not 0 <= val <= 100:
+        return None
+    return round(val / 10, 1) if val > 10 else val
+
+
+# Janela (em linhas) em que a nota de uma VA é procurada, e para trás a disciplina
+JANELA_NOTA = 9
+JANELA_DISCIPLINA = 4
+
+# Estados de uma VA à espera da nota
+BUSCA_APOS_DATA = 'data'  # "16/09/2025 - 1ª Verificação": uma nova data encerra a busca
+BUSCA_APOS_VA = 'va'      # "VA1" solto: linhas com data são só ignoradas
+
+
+def parse_notas(body_text):
+    """
+    Texto da página Avaliação > Notas -> lista de {disciplina, va1, va2, va3, media, situacao}
+
+    Uma passada só: cada linha é classificada uma vez (cabeçalho, disciplina,
+    marcador de VA, nota, ruído) e alimenta as VAs que ainda esperam a nota.
+    A disciplina de uma VA é a última linha candidata vista nas 4 anteriores.
+    """
+    dados_notas = {}
+    ordem = {}           # disc_key -> (linha, prioridade) da 1ª aparição, para manter a ordem da página
+    chaves = {}          # nome da disciplina -> disc_key (normalizar a cada nota custa mais que o resto)
+    pendentes = []       # [modo, tipo_va, disciplina, linha_do_marcador, linhas_restantes]
+    disciplina_atual = None
+    candidato = None     # (índice, linha) da última linha que pode nomear a disciplina de uma VA
+
+    for i, linha in enumerate(linhas_nao_vazias(body_text)):
+        baixa = linha.lower()
+
+        # ---- 1) a linha pode ser a nota de uma VA anterior ----
+        if pendentes:
+            nota = valor_nota(linha)
+            tem_barra = '/' in linha
+            # Rótulos e "nova disciplina" só importam se a linha encerraria ou resolveria a busca
+            eh_rotulo = nova_disciplina = False
+            if nota is not None or tem_barra or MATCHER_NOVA_DISCIPLINA.regex.search(baixa):
+                eh_rotulo = MATCHER_ROTULOS_VERIFICACAO.regex.search(baixa) is not None
+                nova_disciplina = MATCHER_NOVA_DISCIPLINA.regex.search(baixa) is not None
+            restantes = []
+            for pendente in pendentes:
+                modo, tipo_va, disciplina, origem, faltam = pendente
+                if eh_rotulo or (baixa == 'nota' if modo == BUSCA_APOS_DATA else ('nota' in baixa or tem_barra)):
+                    pass
+                elif tem_barra or nova_disciplina:
+                    continue  # encerra sem nota
+                elif nota is not None:
+                    disc_key = chaves.get(disciplina)
+                    if disc_key is None:
+                        disc_key = chaves[disciplina] = normalizar_disciplina(disciplina)
+                    posicao = (origem, 1)
+                    if disc_key not in dados_notas:
+                        dados_notas[disc_key] = nota_vazia(disciplina)
+                        ordem[disc_key] = posicao
+                    elif posicao < ordem[disc_key]:
+                        # A VA veio antes do cabeçalho da disciplina: vale o nome e a posição da VA
+                        dados_notas[disc_key]['disciplina'] = disciplina
+                        ordem[disc_key] = posicao
+                    campo = tipo_va.lower()
+                    if dados_notas[disc_key][campo] == 0.0 or nota > dados_notas[disc_key][campo]:
+                        dados_notas[disc_key][campo] = nota
+                    continue
+                if faltam > 1:
+                    pendente[4] = faltam - 1
+                    restantes.append(pendente)
+            pendentes = restantes
+
+        palavra_disciplina = MATCHER_DISCIPLINA.regex.search(baixa) is not None
+        pode_nomear_va = (palavra_disciplina and 'verificação' not in baixa
+                          and not RE_DATA_COMPLETA.search(linha))
+
+        if linha in CABECALHOS_NOTAS:
+            if pode_nomear_va:
+                candidato = (i, linha)
+            continue
+
+        # ---- 2) cabeçalho de disciplina ----
+        if len(linha) > 10 and RE_LINHA_DISCIPLINA.match(linha):
+            if MATCHER_MENU_NOTAS.regex.search(baixa):
+                if pode_nomear_va:
+                    candidato = (i, linha)
+                continue
+            if palavra_disciplina:
+                disciplina_atual = limpar_texto(linha)
+                disc_key = chaves.get(disciplina_atual)
+                if disc_key is None:
+                    disc_key = chaves[disciplina_atual] = normalizar_disciplina(disciplina_atual)
+                if disc_key not in dados_notas:
+                    dados_notas[disc_key] = nota_vazia(disciplina_atual)
+                    ordem[disc_key] = (i, 0)
+
+        # ---- 3) marcador de VA ----
+        match_verificacao = RE_VERIFICACAO.search(linha)
+        if match_verificacao:
+            if candidato and candidato[0] > max(0, i - JANELA_DISCIPLINA - 1):
+                disciplina_atual = limpar_texto(candidato[1])
+            if disciplina_atual:
+                pendentes.append([BUSCA_APOS_DATA, f"VA{match_verificacao.group(2)}",
+                                  disciplina_atual, i, JANELA_NOTA])
+        elif disciplina_atual:
+            va_match = RE_VA.search(linha)
+            if va_match:
+                pendentes.append([BUSCA_APOS_VA, f"VA{va_match.group(1)}", disciplina_atual, i, JANELA_NOTA])
+
+        if pode_nomear_va:
+            candidato = (i, linha)
+
+    return finalizar_notas({k: dados_notas[k] for k in sorted(dados_notas, key=lambda k: ordem[k])})
+
+
+# ============================================
+# FREQUÊNCIA
+# ============================================
+def is_disciplina_frequencia(texto):
+    """Verifica se o texto é um nome de disciplina válido na página de frequência"""
+    texto_upper = texto.upper().strip()
+
+    if len(texto_upper) < 10:
+        return False
+
+    # Linhas que começam com código numérico não são disciplinas
+    if RE_CODIGO_DISCIPLINA.match(texto_upper):
+        return False
+
+    # Deve conter pelo menos uma palavra-chave de disciplina
+    # (termos de menu só eram descartados quando não tinham nenhuma)
+    return MATCHER_DISCIPLINA_FREQUENCIA.encontra(texto_upper)
+
+
+def valor_frequencia(linhas, idx, padrao):
+    """Percentual na linha idx ("Frequência (%) 92,5") ou sozinho na linha seguinte"""
+    freq_match = RE_NUMERO.search(linhas[idx])
+    if freq_match:
+        return float(freq_match.group(1).replace(',', '.'))
+    if idx + 1 < len(linhas):
+        freq_match2 = RE_NUMERO_EXATO.match(linhas[idx + 1].strip())
+        if freq_match2:
+            return float(freq_match2.group(1).replace(',', '.'))
+    return padrao
+
+
+def parse_frequencia(body_text):
+    """
+    Texto da página Avaliação > Frequência -> lista de {disciplina, total_faltas, percentual}
+
+    Formato esperado:
+    DISCIPLINA_NAME (header em azul)
+    Faltas                    X
+    Frequência (%)            Y.YY
+    """
+    dados_faltas = {}
+    linhas = linhas_nao_vazias(body_text)
+
+    # "Faltas" seguido de número, associado à disciplina mais próxima acima
+    i = 0
+    disciplina_atual = None
+
+    while i < len(linhas):
+        linha = linhas[i]
+        linha_upper = linha.upper().strip()
+
+        if is_disciplina_frequencia(linha) or linha_upper == 'TOTAL':
+            disciplina_atual = limpar_texto(linha)
+            i += 1
+            continue
+
+        if linha_upper == 'FALTAS' and disciplina_atual:
+            faltas = 0
+            freq = 100.0
+
+            for j in range(1, 5):
+                if i + j < len(linhas):
+                    prox = linhas[i + j].strip()
+
+                    if RE_INTEIRO.match(prox):
+                        faltas = int(prox)
+                        break
+
+                    if prox.upper().startswith('FREQUÊNCIA'):
+                        freq = valor_frequencia(linhas, i + j, freq)
+                        break
+
+            for j in range(1, 8):
+                if i + j < len(linhas):
+                    prox = linhas[i + j].strip()
+                    if 'FREQUÊNCIA' in prox.upper():
+                        freq = valor_frequencia(linhas, i + j, freq)
+                        break
+
+            # Sanitização
+            freq = max(0.0, min(100.0, freq))
+            faltas = max(0, faltas)
+
+            # Faltas muito altas (>60) com frequência alta são erro de parsing
+            if faltas > 60:
+                logger.warning(f"⚠️ Faltas suspeitas para {disciplina_atual}: {faltas} (ignorando)")
+                if freq >= 90:
+                    faltas = 0
+
+            disc_key = normalizar_disciplina(disciplina_atual)
+
+            # Evitar sobrescrever com valores piores
+            prev = dados_faltas.get(disc_key)
+            if not prev or faltas <= prev.get('total_faltas', 999):
+                dados_faltas[disc_key] = {
+                    'disciplina': disciplina_atual,
+                    'total_faltas': faltas,
+                    'percentual': freq
+                }
+
+        i += 1
+
+    # Fallback: "DISCIPLINA ... Faltas X ... Frequência Y" num bloco de 10 linhas
+    if not dados_faltas:
+        for i, linha in enumerate(linhas):
+            if is_disciplina_frequencia(linha):
+                disciplina = limpar_texto(linha)
+                disc_key = normalizar_disciplina(disciplina)
+                bloco = "\n".join(linhas[i:i + 10])
+
+                faltas = 0
+                freq = 100.0
+
+                m_faltas = RE_FALTAS_BLOCO.search(bloco)
+                if m_faltas:
+                    val = int(m_faltas.group(1))
+                    if val <= 60:
+                        faltas = val
+
+                m_freq = RE_FREQUENCIA_BLOCO.search(bloco)
+                if m_freq:
+                    freq = min(100.0, float(m_freq.group(1).replace(',', '.')))
+
+                if disc_key not in dados_faltas:
+                    dados_faltas[disc_key] = {
+                        'disciplina': disciplina,
+                        'total_faltas': faltas,
+                        'percentual': freq
+                    }
+
+    # TOTAL não é disciplina
+    dados_faltas.pop(normalizar_disciplina('TOTAL'), None)
+    return list(dados_faltas.values())
+
+
+# ============================================
+# HORÁRIOS
+# ============================================
+DIAS_MAP = {
+    'segunda': {'num': 1, 'nome': 'Segunda-feira'},
+    'terça': {'num': 2, 'nome': 'Terça-feira'},
+    'terca': {'num': 2, 'nome': 'Terça-feira'},
+    'quarta': {'num': 3, 'nome': 'Quarta-feira'},
+    'quinta': {'num': 4, 'nome': 'Quinta-feira'},
+    'sexta': {'num': 5, 'nome': 'Sexta-feira'},
+    'sábado': {'num': 6, 'nome': 'Sábado'},
+    'sabado': {'num': 6, 'nome': 'Sábado'},
+}
+
+
+def is_disciplina_horario(texto):
+    texto_upper = texto.upper().strip()
+
+    if len(texto_upper) < 10:
+        return False
+    if MATCHER_MENU_HORARIOS.encontra(texto_upper):
+        return False
+    if RE_CODIGO_DISCIPLINA.match(texto_upper):
+        return False
+    return MATCHER_DISCIPLINA.encontra(texto_upper)
+
+
+def detectar_dia_semana(linha):
+    """'Segunda-feira' -> (1, 'Segunda-feira'); None se a linha não for um dia"""
+    linha_lower = linha.lower()
+    for dia_key, dia_info in DIAS_MAP.items():
+        if dia_key in linha_lower and ('feira' in linha_lower or linha_lower.endswith(dia_key)):
+            return dia_info['num'], dia_info['nome']
+    return None
+
+
+def adicionar_aula(dados_horarios, vistos, dia_num, dia_nome, disciplina, inicio, fim, local):
+    chave = (dia_num, inicio, disciplina)
+    if chave in vistos:
+        return
+    vistos.add(chave)
+    dados_horarios.append({
+        'dia_semana': dia_num,
+        'dia_nome': dia_nome,
+        'disciplina': disciplina,
+        'horario_inicio': inicio,
+        'horario_fim': fim,
+        'local': local,
+        'professor': ''
+    })
+
+
+def parse_horarios(body_text, dia_fixo=None, dados_horarios=None):
+    """
+    Texto da página Horário de Aulas -> lista de aulas.
+    - dia_fixo=(num, nome): página filtrada por um dia (não há cabeçalho de dia)
+    - dados_horarios: lista existente a completar (sem duplicar aulas)
+    """
+    dados_horarios = [] if dados_horarios is None else dados_horarios
+    vistos = {(a['dia_semana'], a['horario_inicio'], a['disciplina']) for a in dados_horarios}
+    linhas = [l.strip() for l in body_text.split('\n')]
+
+    dia_num, dia_atual = dia_fixo if dia_fixo else (0, None)
+
+    for i, linha in enumerate(linhas):
+        if not linha:
+            continue
+
+        if not dia_fixo:
+            dia = detectar_dia_semana(linha)
+            if dia:
+                dia_num, dia_atual = dia
+                continue
+
+        if dia_atual and is_disciplina_horario(linha):
+            disciplina = limpar_texto(linha)
+            local = ""
+            horario_inicio = ""
+            horario_fim = ""
+
+            # Próximas linhas: local (BLOCO X - Yº PISO - SALA Z) e horário
+            for j in range(1, 6):
+                if i + j < len(linhas):
+                    prox = linhas[i + j]
+                    prox_upper = prox.upper()
+
+                    if 'BLOCO' in prox_upper or (not dia_fixo and 'PISO' in prox_upper and 'SALA' in prox_upper):
+                        local = prox
+
+                    match_hora = RE_HORARIO_EXATO.match(prox)
+                    if match_hora:
+                        horario_inicio = match_hora.group(1)
+                        horario_fim = match_hora.group(2)
+                        break
+
+            if disciplina and horario_inicio:
+                adicionar_aula(dados_horarios, vistos, dia_num, dia_atual,
+                               disciplina, horario_inicio, horario_fim, local)
+
+    dados_horarios.sort(key=lambda x: (x['dia_semana'], x['horario_inicio']))
+    return dados_horarios
+
+
+def parse_aulas_por_dia(aulas_por_dia, dados_horarios=None):
+    """
+    Linhas lidas do DOM (ver JS_AULAS_POR_DIA em scraper_lyceum) -> lista de aulas.
+    aulas_por_dia: {"Segunda-feira": [["DISCIPLINA", "BLOCO A - SALA 1", "19:00 - 20:40"], ...]}
+    """
+    dados_horarios = [] if dados_horarios is None else dados_horarios
+    vistos = {(a['dia_semana'], a['horario_inicio'], a['disciplina']) for a in dados_horarios}
+
+    for rotulo, aulas in aulas_por_dia.items():
+        dia = detectar_dia_semana(rotulo.strip())
+        if not dia:
+            continue
+        for linhas in aulas:
+            disciplina = local = horario = None
+            for linha in linhas:
+                linha_upper = linha.upper()
+                match_hora = RE_HORARIO.search(linha) if horario is None else None
+                if match_hora:
+                    horario = match_hora
+                elif not local and ('BLOCO' in linha_upper or ('PISO' in linha_upper and 'SALA' in linha_upper)):
+                    local = linha
+                elif not disciplina and is_disciplina_horario(linha):
+                    disciplina = limpar_texto(linha)
+            if disciplina and horario:
+                adicionar_aula(dados_horarios, vistos, dia[0], dia[1],
+                               disciplina, horario.group(1), horario.group(2), local or "")
+
+    dados_horarios.sort(key=lambda x: (x['dia_semana'], x['horario_inicio']))
+    return dados_horarios
+
+
+# ============================================
+# CALENDÁRIO
+# ============================================
+MESES_NUM = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'abril': 4,
+    'maio': 5, 'junho': 6, 'julho': 7, 'agosto': 8,
+    'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12
+}
+COR_FERIADO = '#e74c3c'
+COR_AULA = '#4a90e2'
+
+
+def dia_do_grid(linha):
+    return linha.isdigit() and 1 <= int(linha) <= 31
+
+
+def mes_do_cabecalho(body_text, mes_idx=0, hoje=None):
+    """(mes_num, ano, estimado) a partir de 'outubro de 2025'; sem cabeçalho, estima pelo índice"""
+    match_mes = RE_MES_ANO.search(body_text.lower())
+    if match_mes:
+        return MESES_NUM.get(match_mes.group(1), 12), int(match_mes.group(2)), False
+
+    hoje = hoje or datetime.now()
+    mes_num = (hoje.month + mes_idx - 1) % 12 + 1
+    ano = hoje.year + ((hoje.month + mes_idx - 1) // 12)
+    return mes_num, ano, True
+
+
+def evento_feriado(data_iso):
+    return {'titulo': 'Feriado', 'data': data_iso, 'tipo': 'feriado', 'cor': COR_FERIADO, 'descricao': 'Feriado'}
+
+
+def evento_aula(data_iso, inicio, fim):
+    return {'titulo': f"Aula {inicio}-{fim}", 'data': data_iso, 'tipo': 'aula', 'cor': COR_AULA,
+            'descricao': f"{inicio} - {fim}"}
+
+
+def parse_calendario_mes(body_text, mes_num, ano, feriados_encontrados, aulas_encontradas):
+    """
+    Feriados e aulas de um mês da Agenda. Os conjuntos feriados_encontrados
+    ('AAAA-MM-DD') e aulas_encontradas ('aula|data|hora') evitam repetir
+    eventos entre meses e são atualizados.
+    """
+    eventos = []
+    linhas = linhas_nao_vazias(body_text)
+
+    # Dias do grid (1-31) -> data
+    dias_calendario = {}
+    ultimo_dia = None
+    for linha in linhas:
+        if dia_do_grid(linha):
+            ultimo_dia = int(linha)
+            try:
+                dias_calendario[ultimo_dia] = datetime(ano, mes_num, ultimo_dia)
+            except ValueError:
+                pass
+
+    ultima_data_textual = None
+
+    for i, linha in enumerate(linhas):
+        linha_lower = linha.lower()
+
+        # Data textual (dd/mm/aaaa ou dd/mm)
+        mdata = RE_DATA_COMPLETA.search(linha)
+        if mdata:
+            try:
+                ultima_data_textual = datetime.strptime(mdata.group(1), '%d/%m/%Y')
+            except ValueError:
+                pass
+        else:
+            mdata2 = RE_DATA_DIA_MES.search(linha)
+            if mdata2:
+                try:
+                    ultima_data_textual = datetime.strptime(f"{mdata2.group(1)}/{ano}", '%d/%m/%Y')
+                except ValueError:
+                    pass
+
+        if 'feriado' in linha_lower:
+            data_obj = None
+            # 1) número de dia mais próximo no grid
+            dia_feriado = next((int(linhas[j]) for j in range(max(0, i - 6), min(len(linhas), i + 6))
+                                if dia_do_grid(linhas[j])), None)
+            if dia_feriado and dia_feriado in dias_calendario:
+                data_obj = dias_calendario[dia_feriado]
+
+            # 2) data completa próxima; 3) dd/mm com o ano do cabeçalho
+            for regex, sufixo in ((RE_DATA_COMPLETA, ''), (RE_DATA_DIA_MES, f"/{ano}")):
+                if data_obj:
+                    break
+                for k in range(max(0, i - 4), min(len(linhas), i + 5)):
+                    mm = regex.search(linhas[k])
+                    if mm:
+                        try:
+                            data_obj = datetime.strptime(f"{mm.group(1)}{sufixo}", '%d/%m/%Y')
+                            break
+                        except ValueError:
+                            pass
+
+            # 4) última data textual vista
+            data_obj = data_obj or ultima_data_textual
+            if not data_obj:
+                continue
+
+            if data_obj.month == mes_num and data_obj.year == ano:
+                data_iso = data_obj.strftime('%Y-%m-%d')
+                if data_iso not in feriados_encontrados:
+                    feriados_encontrados.add(data_iso)
+                    eventos.append(evento_feriado(data_iso))
+
+        # Aulas: "HH:MM-HH:MM" com "aula" na linha ou na seguinte
+        match_aula = RE_HORARIO.search(linha)
+        if match_aula:
+            hora_inicio, hora_fim = match_aula.group(1), match_aula.group(2)
+
+            is_aula = 'aula' in linha_lower
+            if not is_aula and i + 1 < len(linhas):
+                is_aula = 'aula' in linhas[i + 1].lower()
+
+            if is_aula:
+                data_obj = ultima_data_textual
+                if data_obj is None:
+                    dia_aula = next((int(linhas[j]) for j in range(max(0, i - 5), min(len(linhas), i + 5))
+                                     if dia_do_grid(linhas[j])), ultimo_dia)
+                    data_obj = dias_calendario.get(dia_aula)
+
+                if data_obj is not None and data_obj.month == mes_num and data_obj.year == ano:
+                    data_iso = data_obj.strftime('%Y-%m-%d')
+                    chave = f"aula|{data_iso}|{hora_inicio}"
+                    if chave not in aulas_encontradas:
+                        aulas_encontradas.add(chave)
+                        eventos.append(evento_aula(data_iso, hora_inicio, hora_fim))
+
+    return eventos
+
+
+# ---- Snapshot estruturado do mês (JS_MES_AGENDA em scraper_lyceum) ----
+def assinatura_mes(foto):
+    """Hash do conteúdo do mês: igual ao da última sincronização = mês sem mudanças"""
+    conteudo = [foto.get('cabecalho'), foto.get('celulas') or [], foto.get('datados') or [], foto.get('texto') or '']
+    return hashlib.sha1(json.dumps(conteudo, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def chave_evento(evento):
+    """Chave usada em feriados_encontrados / aulas_encontradas"""
+    if evento['tipo'] == 'feriado':
+        return evento['data']
+    match_hora = RE_HORARIO.search(evento.get('titulo') or '')
+    return f"aula|{evento['data']}|{match_hora.group(1) if match_hora else ''}"
+
+
+def parse_celulas_calendario(foto, mes_num, ano, feriados_encontrados, aulas_encontradas):
+    """
+    Feriados e aulas de um mês a partir do snapshot do DOM:
+    - celulas: [{'dia': 12, 'linhas': ['Feriado'], 'fora': False}, ...] (fora = dia de outro mês)
+    - datados: linhas fora do grid com data completa ("12/10/2025 Feriado - ...")
+    """
+    eventos = []
+    feriados = []
+
+    for celula in foto.get('celulas') or []:
+        if celula.get('fora'):
+            continue
+        try:
+            data_obj = datetime(ano, mes_num, int(celula['dia']))
+        except (KeyError, TypeError, ValueError):
+            continue
+        data_iso = data_obj.strftime('%Y-%m-%d')
+        linhas = celula.get('linhas') or []
+        for i, linha in enumerate(linhas):
+            linha_lower = linha.lower()
+            if 'feriado' in linha_lower:
+                feriados.append(data_obj)
+
+            match_aula = RE_HORARIO.search(linha)
+            if match_aula and ('aula' in linha_lower or (i + 1 < len(linhas) and 'aula' in linhas[i + 1].lower())):
+                chave = f"aula|{data_iso}|{match_aula.group(1)}"
+                if chave not in aulas_encontradas:
+                    aulas_encontradas.add(chave)
+                    eventos.append(evento_aula(data_iso, match_aula.group(1), match_aula.group(2)))
+
+    for linha in foto.get('datados') or []:
+        mdata = RE_DATA_COMPLETA.search(linha)
+        if mdata and 'feriado' in linha.lower():
+            try:
+                feriados.append(datetime.strptime(mdata.group(1), '%d/%m/%Y'))
+            except ValueError:
+                pass
+
+    for data_obj in feriados:
+        data_iso = data_obj.strftime('%Y-%m-%d')
+        if data_obj.month == mes_num and data_obj.year == ano and data_iso not in feriados_encontrados:
+            feriados_encontrados.add(data_iso)
+            eventos.append(evento_feriado(data_iso))
+
+    return eventos
+
+
+def reaproveitar_eventos_mes(eventos_salvos, feriados_encontrados, aulas_encontradas):
+    """Eventos de um mês sem mudanças, guardados na sincronização anterior (sem repetir entre meses)"""
+    eventos = []
+    for evento in eventos_salvos:
+        chave = chave_evento(evento)
+        vistos = feriados_encontrados if evento['tipo'] == 'feriado' else aulas_encontradas
+        if chave not in vistos:
+            vistos.add(chave)
+            eventos.append(evento)
+    return eventos
+
+
+def aulas_da_grade(mes_num, ano, horarios, feriados_encontrados, aulas_encontradas):
+    """Aulas do mês geradas pela grade semanal (evita meses em branco), pulando feriados"""
+    eventos = []
+    mapa = {}
+    for h in horarios or []:
+        if h.get('dia_semana'):
+            mapa.setdefault(h['dia_semana'], []).append((h.get('horario_inicio'), h.get('horario_fim')))
+
+    for dia in range(1, 32):
+        try:
+            d = datetime(ano, mes_num, dia)
+        except ValueError:
+            continue
+        data_iso = d.strftime('%Y-%m-%d')
+        if data_iso in feriados_encontrados:
+            continue
+        for inicio, fim in mapa.get(d.weekday() + 1, []):
+            if not inicio or not fim:
+                continue
+            chave = f"aula|{data_iso}|{inicio}"
+            if chave in aulas_encontradas:
+                continue
+            aulas_encontradas.add(chave)
+            eventos.append(evento_aula(data_iso, inicio, fim))
+    return eventos
+
+
+def deduplicar_eventos(eventos):
+    """Um evento por (título, data), mantendo o primeiro"""
+    unicos = {}
+    for ev in eventos:
+        unicos.setdefault((ev['titulo'], ev['data']), ev)
+    return list(unicos.values())
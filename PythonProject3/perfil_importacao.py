@@ -0,0 +1,69 @@
+"""
+Perfil do tempo de import do app (python -X importtime).
+
+Uso: python perfil_importacao.py [modulo] [--top N]
+
+Mostra o tempo total e os imports mais caros, e termina com código 1 se
+algum módulo pesado (que deveria ser carregado sob demanda) for importado
+junto com o app.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Só devem ser importados pelas rotas que os usam (ver carregamento_tardio.py)
+MODULOS_PESADOS = [
+    'selenium', 'webdriver_manager', 'bs4',
+    'google.generativeai', 'reportlab', 'openpyxl',
+    'PyPDF2', 'docx', 'youtube_transcript_api',
+    'scraper_ava', 'scraper_lyceum',
+]
+
+
+def medir_importacao(modulo):
+    """Executa o import num processo novo; retorna [(self_us, cumulativo_us, nome)] e o código de saída"""
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=pasta, capture_output=True, text=True
+    )
+    medicoes = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        proprio, cumulativo, nome = linha[len('import time:'):].split('|', 2)
+        medicoes.append((int(proprio), int(cumulativo), nome[1:].rstrip()))  # recuo = nível
+    return medicoes, processo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=(__doc__ or '').strip().split('\n')[0])
+    parser.add_argument('modulo', nargs='?', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    modulo, top = args.modulo, args.top
+
+    medicoes, processo = medir_importacao(modulo)
+    if processo.returncode != 0:
+        print(f"❌ 'import {modulo}' falhou:\n{processo.stderr.splitlines()[-1] if processo.stderr else ''}")
+        return 2
+
+    # Só os imports de primeiro nível (sem indentação) somam o tempo total
+    total_us = sum(c for _, c, nome in medicoes if not nome.startswith(' '))
+    print(f"Import de '{modulo}': {total_us / 1000:.0f} ms ({len(medicoes)} módulos)\n")
+    print(f"{'cumulativo':>11} {'próprio':>9}  módulo")
+    for proprio, cumulativo, nome in sorted(medicoes, key=lambda m: m[1], reverse=True)[:top]:
+        print(f"{cumulativo / 1000:>9.1f}ms {proprio / 1000:>7.1f}ms  {nome.strip()}")
+
+    importados = {nome.strip() for _, _, nome in medicoes}
+    pesados = [m for m in MODULOS_PESADOS if m in importados]
+    if pesados:
+        print(f"\n❌ Módulos pesados importados no boot: {', '.join(pesados)}")
+        return 1
+    print("\n✅ Nenhum módulo pesado importado no boot")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# RATE LIMITING (TOKEN BUCKET)
+# ============================================
+# Cada (rota, usuário) tem um balde com `capacidade` fichas que se recarrega a
+# `por_minuto` fichas por minuto. Cada requisição gasta uma ficha.
+# O estado fica num armazenamento plugável:
+# - memória: um processo só, entradas ociosas expiram sozinhas
+# - sqlite: vários workers na mesma máquina (gunicorn -w N) dividindo o mesmo balde
+class Limite:
+    def __init__(self, capacidade, por_minuto):
+        self.capacidade = float(capacidade)
+        self.por_segundo = por_minuto / 60.0
+
+
+def consumir_ficha(tokens, atualizado_em, agora, limite):
+    """
+    Recarrega o balde e tenta gastar uma ficha.
+    Retorna (tokens_restantes, segundos_de_espera); espera 0 = permitido.
+    """
+    if tokens is None:
+        tokens = limite.capacidade
+    else:
+        tokens = min(limite.capacidade, tokens + (agora - atualizado_em) * limite.por_segundo)
+
+    if tokens >= 1:
+        return tokens - 1, 0
+
+    espera = math.ceil((1 - tokens) / limite.por_segundo)
+    return tokens, max(1, espera)
+
+
+class ArmazenamentoMemoria:
+    """Baldes num dict protegido por lock; remove baldes parados há mais de ttl_ocioso"""
+
+    def __init__(self, ttl_ocioso=3600, limpar_a_cada=500):
+        self.ttl_ocioso = ttl_ocioso
+        self.limpar_a_cada = limpar_a_cada
+        self._baldes = {}  # chave -> (tokens, atualizado_em)
+        self._lock = threading.Lock()
+        self._operacoes = 0
+
+    def consumir(self, chave, limite):
+        agora = time.time()
+        with self._lock:
+            tokens, atualizado_em = self._baldes.get(chave, (None, agora))
+            tokens, espera = consumir_ficha(tokens, atualizado_em, agora, limite)
+            self._baldes[chave] = (tokens, agora)
+
+            self._operacoes += 1
+            if self._operacoes % self.limpar_a_cada == 0:
+                self._expirar(agora)
+        return espera
+
+    def _expirar(self, agora):
+        vencidos = [k for k, (_, t) in self._baldes.items() if agora - t > self.ttl_ocioso]
+        for chave in vencidos:
+            del self._baldes[chave]
+
+    def __len__(self):
+        return len(self._baldes)
+
+
+class ArmazenamentoSQLite:
+    """Baldes numa tabela SQLite; BEGIN IMMEDIATE serializa os workers na leitura+escrita"""
+
+    def __init__(self, caminho, ttl_ocioso=3600, limpar_a_cada=500):
+        self.caminho = caminho
+        self.ttl_ocioso = ttl_ocioso
+        self.limpar_a_cada = limpar_a_cada
+        self._operacoes = 0
+
+        with self._conectar() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_limit_baldes (
+                    chave TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    atualizado_em REAL NOT NULL
+                )
+            ''')
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def consumir(self, chave, limite):
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT tokens, atualizado_em FROM rate_limit_baldes WHERE chave = ?', (chave,)
+            ).fetchone()
+            tokens, atualizado_em = row if row else (None, agora)
+            tokens, espera = consumir_ficha(tokens, atualizado_em, agora, limite)
+            conn.execute('''
+                INSERT INTO rate_limit_baldes (chave, tokens, atualizado_em) VALUES (?, ?, ?)
+                ON CONFLICT(chave) DO UPDATE SET tokens = excluded.tokens, atualizado_em = excluded.atualizado_em
+            ''', (chave, tokens, agora))
+
+            self._operacoes += 1
+            if self._operacoes % self.limpar_a_cada == 0:
+                conn.execute('DELETE FROM rate_limit_baldes WHERE atualizado_em < ?', (agora - self.ttl_ocioso,))
+
+            conn.execute('COMMIT')
+            return espera
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+
+class RateLimiter:
+    def __init__(self, armazenamento, limites):
+        self.armazenamento = armazenamento
+        self.limites = limites
+
+    def verificar(self, rota, identificador):
+        """Gasta uma ficha do orçamento da rota; retorna 0 se liberado ou os segundos até a próxima"""
+        limite = self.limites[rota]
+        try:
+            return self.armazenamento.consumir(f"{rota}:{identificador}", limite)
+        except sqlite3.Error as e:
+            # Banco travado/indisponível: não derruba a rota por causa do limitador
+            logger.error(f"[RATE LIMIT] Erro no armazenamento, liberando requisição: {e}")
+            return 0
+
+
+# Orçamentos por rota (capacidade = rajada permitida)
+LIMITES_PADRAO = {
+    'chat': Limite(capacidade=2, por_minuto=15),
+    'chat_arquivo': Limite(capacidade=1, por_minuto=4),
+    'chat_youtube': Limite(capacidade=1, por_minuto=4),
+    'sync': Limite(capacidade=2, por_minuto=0.5),
+}
+
+
+def criar_rate_limiter(database):
+    """RATE_LIMIT_STORAGE=memoria (padrão) ou sqlite (RATE_LIMIT_DB, padrão: o banco do app)"""
+    tipo = os.getenv('RATE_LIMIT_STORAGE', 'memoria').lower()
+    if tipo == 'sqlite':
+        armazenamento = ArmazenamentoSQLite(os.getenv('RATE_LIMIT_DB', database))
+    else:
+        armazenamento = ArmazenamentoMemoria()
+    logger.info(f"[RATE LIMIT] Armazenamento: {tipo}")
+    return RateLimiter(armazenamento, LIMITES_PADRAO)
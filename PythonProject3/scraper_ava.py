@@ -10,6 +10,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.common.keys import Keys
+import logging
 import os
 import time
 import re
@@ -17,6 +18,8 @@ from dotenv import load_dotenv
 import io
 from datetime import datetime
 
+from telemetria import fase, definir_driver, medir_sincronizacao
+
 # ============================================
 # BIBLIOTECAS DE PDF
 # ============================================
@@ -37,6 +40,7 @@ except ImportError:
 # ============================================
 load_dotenv()
 DATABASE = os.getenv('DATABASE', 'unievangelica.db')
+logger = logging.getLogger(__name__)
 
 
 def get_db_connection_scraper():
@@ -69,58 +73,14 @@ def garantir_esquema_conteudos_ava():
                 c.execute("ALTER TABLE conteudos_ava ADD COLUMN ultima_atualizacao TEXT")
             conn.commit()
     except Exception as e:
-        print(f"❌ Erro ao garantir esquema conteudos_ava: {e}")
+        logger.error(f"❌ Erro ao garantir esquema conteudos_ava: {e}")
 
 
 # ============================================
-# 🆕 VERIFICAR SE USUÁRIO TEM CACHE
-# ============================================
-def usuario_tem_cache(user_id):
-    """
-    Verifica se usuário já tem dados salvos.
-    NOTA: Não verifica expiração - cache é infinito!
-    Usuário decide quando atualizar clicando no botão.
-    """
-    try:
-        with get_db_connection_scraper() as conn:
-            c = conn.cursor()
-            c.execute('SELECT COUNT(*) FROM conteudos_ava WHERE usuario_id = ?', (user_id,))
-            count = c.fetchone()[0]
-
-            return count > 0
-
-    except Exception as e:
-        print(f"❌ Erro ao verificar cache: {e}")
-        return False
-
-
+# 🆕 VERIFICAR CACHE / ÚLTIMA SINCRONIZAÇÃO
 # ============================================
-# 🆕 OBTER ÚLTIMA SINCRONIZAÇÃO
-# ============================================
-def obter_ultima_sincronizacao(user_id):
-    """
-    Retorna data e hora da última sincronização do usuário.
-    Retorna None se nunca sincronizou.
-    """
-    try:
-        with get_db_connection_scraper() as conn:
-            c = conn.cursor()
-            c.execute("PRAGMA table_info(conteudos_ava)")
-            cols = {row[1] for row in c.fetchall()}
-            if 'ultima_atualizacao' not in cols:
-                return None
-            c.execute('''
-                SELECT MAX(ultima_atualizacao) as ultima_sync
-                FROM conteudos_ava 
-                WHERE usuario_id = ?
-            ''', (user_id,))
-            row = c.fetchone()
-            if row and row['ultima_sync']:
-                return datetime.fromisoformat(row['ultima_sync'])
-            return None
-    except Exception as e:
-        print(f"❌ Erro ao obter última sync: {e}")
-        return None
+# Implementadas em estado_sincronizacao (sem Selenium), reexportadas aqui
+from estado_sincronizacao import usuario_tem_cache, obter_ultima_sincronizacao
 
 
 # ============================================
@@ -135,6 +95,7 @@ def limpar_texto(texto):
 # ============================================
 # EXTRAÇÃO DE PDF
 # ============================================
+@fase('ava.pdf')
 def extrair_texto_pdf(pdf_url, session):
     if not PDF_LIBRARY:
         return "[PDF] PyPDF2 não instalado"
@@ -167,6 +128,7 @@ def extrair_texto_pdf(pdf_url, session):
 # ============================================
 # EXTRAÇÃO ULTRA PROFUNDA DE ATIVIDADE
 # ============================================
+@fase('ava.atividade')
 def extrair_atividade_ultra_profunda(link, nome, session):
     """Entra na atividade e extrai ABSOLUTAMENTE TUDO"""
     resultado = {
@@ -243,6 +205,7 @@ def extrair_atividade_ultra_profunda(link, nome, session):
 # ============================================
 # EXPANDIR E EXTRAIR SEÇÃO COMPLETA
 # ============================================
+@fase('ava.secao')
 def expandir_e_extrair_secao(secao_soup, nome_semana, session):
     """Expande seção e extrai TODO o conteúdo"""
 
@@ -252,7 +215,7 @@ def expandir_e_extrair_secao(secao_soup, nome_semana, session):
 
     nome_secao = titulo_secao.get_text(strip=True) if titulo_secao else "Seção"
 
-    print(f"\n      📂 {nome_secao}")
+    logger.debug(f"📂 {nome_secao}")
 
     resultado_secao = {
         'semana': nome_semana,
@@ -264,7 +227,7 @@ def expandir_e_extrair_secao(secao_soup, nome_semana, session):
     esta_colapsada = 'section-summary' in classes
 
     if esta_colapsada:
-        print(f"         🔐 Colapsada - expandindo...")
+        logger.debug(f"🔐 Colapsada - expandindo...")
         section_id = secao_soup.get('data-id')
 
         if section_id:
@@ -277,9 +240,9 @@ def expandir_e_extrair_secao(secao_soup, nome_semana, session):
                 if not secao_soup:
                     secao_soup = soup_expandido
 
-                print(f"         ✅ Expandida")
+                logger.debug(f"✅ Expandida")
             except Exception as e:
-                print(f"         ❌ Erro: {str(e)[:30]}")
+                logger.error(f"❌ Erro: {str(e)[:30]}")
                 return resultado_secao
 
     atividades = secao_soup.find_all("li", class_=re.compile(r"activity"))
@@ -289,10 +252,10 @@ def expandir_e_extrair_secao(secao_soup, nome_semana, session):
         atividades = [l.parent for l in links_mod if l.parent]
 
     if not atividades:
-        print(f"         ⚠️ Nenhuma atividade")
+        logger.warning(f"⚠️ Nenhuma atividade")
         return resultado_secao
 
-    print(f"         ✅ {len(atividades)} atividades")
+    logger.debug(f"✅ {len(atividades)} atividades")
 
     links_vistos = set()
 
@@ -314,7 +277,7 @@ def expandir_e_extrair_secao(secao_soup, nome_semana, session):
 
             nome_ativ = link_tag.get_text(strip=True) or "Atividade"
 
-            print(f"         [{len(links_vistos)}] {nome_ativ[:40]}...")
+            logger.debug(f"[{len(links_vistos)}] {nome_ativ[:40]}...")
 
             dados_atividade = extrair_atividade_ultra_profunda(href, nome_ativ, session)
             resultado_secao['atividades'].append(dados_atividade)
@@ -384,8 +347,9 @@ def formatar_conteudo_estruturado(dados_disciplina):
 # ============================================
 # COLETAR DISCIPLINAS (ANTI-STALE)
 # ============================================
+@fase('ava.cursos')
 def coletar_disciplinas_selenium(driver):
-    print("📋 Coletando disciplinas...")
+    logger.info("📋 Coletando disciplinas...")
     cursos = []
 
     try:
@@ -414,17 +378,18 @@ def coletar_disciplinas_selenium(driver):
                 urls_vistas.add(curso['url'])
                 cursos_unicos.append(curso)
 
-        print(f"✅ {len(cursos_unicos)} disciplinas coletadas")
+        logger.info(f"✅ {len(cursos_unicos)} disciplinas coletadas")
         return cursos_unicos
 
     except Exception as e:
-        print(f"❌ Erro: {e}")
+        logger.error(f"❌ Erro: {e}")
         return []
 
 
 # ============================================
 # 🆕 SINCRONIZAÇÃO V5.1 - CACHE INFINITO
 # ============================================
+@medir_sincronizacao('ava')
 def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
     """
     Sincroniza dados do AVA.
@@ -434,13 +399,8 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
     - forcar_atualizacao=True (botão clicado)
     """
 
-    print(f"\n{'=' * 80}")
-    print(f"🚀 SCRAPER V5.1 - CACHE INFINITO")
-    print(f"{'=' * 80}")
-    print(f"User ID: {user_id}")
-    print(f"PDF: {PDF_LIBRARY or 'Não instalado'}")
-    print(f"Forçar: {forcar_atualizacao}")
-    print(f"{'=' * 80}\n")
+    logger.info(f"🚀 [AVA] Sincronização V5.1 para user {user_id} "
+                f"(forçar: {forcar_atualizacao}, PDF: {PDF_LIBRARY or 'Não instalado'})")
 
     # 🆕 GARANTIR ESQUEMA
     garantir_esquema_conteudos_ava()
@@ -450,16 +410,12 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
         if usuario_tem_cache(user_id):
             ultima = obter_ultima_sincronizacao(user_id)
             if ultima:
-                print(f"✅ CACHE ENCONTRADO")
-                print(f"   Última sync: {ultima.strftime('%d/%m/%Y às %H:%M')}")
-                print(f"   Usando dados salvos (cache infinito)")
-                print(f"   Para atualizar: clique no botão 'Sincronizar'\n")
+                logger.info(f"✅ [AVA] Cache válido (última sync: {ultima.strftime('%d/%m/%Y às %H:%M')})")
                 return
             else:
-                print("⚠️ Dados existem mas sem timestamp")
-                print("   Fazendo novo scraping...\n")
+                logger.warning("⚠️ [AVA] Dados existem mas sem timestamp; fazendo novo scraping")
 
-    print("⚡ Iniciando scraping completo...\n")
+    logger.info("⚡ Iniciando scraping completo...")
 
     # CHROME CONFIG
     chrome_options = Options()
@@ -476,11 +432,13 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
 
     # FASE 1: SELENIUM
     try:
-        print("🔐 [FASE 1] Autenticando...")
+        logger.info("🔐 [FASE 1] Autenticando...")
         from typing import Any
         selenium_service: Any = Service(ChromeDriverManager().install())
         chrome_opts: Any = chrome_options
-        driver = webdriver.Chrome(service=selenium_service, options=chrome_opts)
+        with fase('ava.chrome'):
+            driver = webdriver.Chrome(service=selenium_service, options=chrome_opts)
+        definir_driver(driver)
         driver.set_page_load_timeout(90)
         driver.implicitly_wait(15)
         wait = WebDriverWait(driver, 40)
@@ -524,7 +482,8 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
             except Exception:
                 return False
 
-        ok = tentar_login(cpf_nove)
+        with fase('ava.login'):
+            ok = tentar_login(cpf_nove)
         if not ok:
             raise Exception("Falha ao autenticar no AVA com CPF (9 dígitos)")
 
@@ -543,21 +502,21 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
             except Exception:
                 pass
         cookies = driver.get_cookies()
+        definir_driver(None)
         driver.quit()
 
     except Exception as e:
-        print(f"❌ Erro Selenium: {e}")
+        logger.error(f"❌ Erro Selenium: {e}")
+        definir_driver(None)
         if driver: driver.quit()
         return
 
     if not cursos:
-        print("⚠️ Nenhuma disciplina")
+        logger.warning("⚠️ Nenhuma disciplina")
         return
 
     # FASE 2: EXTRAÇÃO ULTRA PROFUNDA
-    print(f"\n{'=' * 80}")
-    print("⚡ [FASE 2] Extração Ultra Profunda...")
-    print(f"{'=' * 80}\n")
+    logger.info("⚡ [FASE 2] Extração Ultra Profunda...")
 
     session = requests.Session()
     session.headers.update({"User-Agent": user_agent})
@@ -567,10 +526,11 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
     todas_disciplinas = []
 
     for i, curso in enumerate(cursos):
-        print(f"\n📚 [{i + 1}/{len(cursos)}] {curso['nome']}")
+        logger.info(f"📚 [{i + 1}/{len(cursos)}] {curso['nome']}")
 
         try:
-            r = session.get(curso['url'], timeout=30)
+            with fase('ava.curso'):
+                r = session.get(curso['url'], timeout=30)
             soup = BeautifulSoup(r.content, 'html.parser')
 
             dados_disciplina = {
@@ -581,10 +541,10 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
             secoes = soup.find_all("li", class_=re.compile(r"section.*course-section"))
 
             if not secoes:
-                print("   ⚠️ Sem seções")
+                logger.warning("⚠️ Sem seções")
                 continue
 
-            print(f"   ✅ {len(secoes)} seções encontradas")
+            logger.debug(f"✅ {len(secoes)} seções encontradas")
 
             for secao in secoes:
                 if "hidden" in secao.get("class", []):
@@ -602,16 +562,14 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
             todas_disciplinas.append(dados_disciplina)
 
         except Exception as e:
-            print(f"   ❌ Erro: {str(e)[:100]}")
+            logger.error(f"❌ Erro: {str(e)[:100]}")
 
     # FASE 3: SALVAR COM TIMESTAMP
-    print(f"\n{'=' * 80}")
-    print("💾 [FASE 3] Salvando com timestamp...")
-    print(f"{'=' * 80}\n")
+    logger.info("💾 [FASE 3] Salvando com timestamp...")
 
     if todas_disciplinas:
         try:
-            with get_db_connection_scraper() as conn:
+            with get_db_connection_scraper() as conn, fase('ava.salvar'):
                 conn.execute('DELETE FROM conteudos_ava WHERE usuario_id = ?', (user_id,))
 
                 timestamp = datetime.now().isoformat()
@@ -620,7 +578,7 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
                     texto_formatado = formatar_conteudo_estruturado(disc)
                     tamanho_kb = len(texto_formatado) / 1024
 
-                    print(f"   💾 {disc['nome']}: {tamanho_kb:.1f} KB")
+                    logger.debug(f"💾 {disc['nome']}: {tamanho_kb:.1f} KB")
 
                     conn.execute('''
                         INSERT INTO conteudos_ava 
@@ -630,15 +588,10 @@ def sincronizar_dados_ava(user_id, matricula, cpf, forcar_atualizacao=False):
 
                 conn.commit()
 
-            print(f"\n{'=' * 80}")
-            print(f"✅ SUCESSO!")
-            print(f"   • {len(todas_disciplinas)} disciplinas")
-            print(f"   • Sincronizado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}")
-            print(f"   • Cache: INFINITO (até próximo clique)")
-            print(f"{'=' * 80}\n")
+            logger.info(f"✅ [AVA] Sincronização concluída: {len(todas_disciplinas)} disciplinas")
 
         except Exception as e:
-            print(f"❌ Erro ao salvar: {e}")
+            logger.error(f"❌ Erro ao salvar: {e}")
 
 
 if __name__ == "__main__":
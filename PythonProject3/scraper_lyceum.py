@@ -1,9 +1,11 @@
+import json
+import logging
 import sqlite3
 import os
-import re
 import time
 from datetime import datetime, timedelta
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -14,11 +16,24 @@ from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
 
+from parsers_lyceum import (
+    limpar_texto, normalizar_disciplina,
+    parse_notas, parse_frequencia, parse_horarios, parse_aulas_por_dia,
+    MESES_NUM, mes_do_cabecalho, parse_calendario_mes, aulas_da_grade, deduplicar_eventos,
+    assinatura_mes, parse_celulas_calendario, reaproveitar_eventos_mes
+)
+from migrar_banco_lyceum_v8 import CHAVES_NATURAIS
+from alteracoes_lyceum import comparar_notas, comparar_frequencia, mensagem_alteracao
+from telemetria import fase, definir_driver, medir_sincronizacao
+from log_estruturado import amostrar_dump
+from matchers import RE_INICIA_MAIUSCULA, RE_SITUACAO, RE_PERIODO, RE_DOCENTE, RE_DATA_INICIAL
+
 # ============================================
 # CONFIGURAÇÕES
 # ============================================
 load_dotenv()
 DATABASE = os.getenv('DATABASE', 'unievangelica.db')
+logger = logging.getLogger(__name__)
 
 
 def get_db_connection_lyceum():
@@ -28,61 +43,18 @@ def get_db_connection_lyceum():
 
 
 # ============================================
-# VERIFICAR SE USUÁRIO TEM CACHE (LYCEUM)
-# ============================================
-def usuario_tem_cache_lyceum(user_id):
-    try:
-        with get_db_connection_lyceum() as conn:
-            c = conn.cursor()
-            c.execute('SELECT COUNT(*) FROM notas_aluno WHERE usuario_id = ?', (user_id,))
-            count_notas = c.fetchone()[0]
-            c.execute('SELECT COUNT(*) FROM faltas_aluno WHERE usuario_id = ?', (user_id,))
-            count_faltas = c.fetchone()[0]
-            return count_notas > 0 or count_faltas > 0
-    except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao verificar cache: {e}")
-        return False
-
-
-# ============================================
-# OBTER ÚLTIMA SINCRONIZAÇÃO (LYCEUM)
+# VERIFICAR CACHE / ÚLTIMA SINCRONIZAÇÃO (LYCEUM)
 # ============================================
-def obter_ultima_sincronizacao_lyceum(user_id):
-    try:
-        with get_db_connection_lyceum() as conn:
-            c = conn.cursor()
-            c.execute('SELECT ultima_atualizacao_lyceum FROM usuarios WHERE id = ?', (user_id,))
-            row = c.fetchone()
-            if row and row['ultima_atualizacao_lyceum']:
-                return datetime.fromisoformat(row['ultima_atualizacao_lyceum'])
-            return None
-    except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao obter última sync: {e}")
-        return None
-
-
-# ============================================
-# FUNÇÃO DE LIMPEZA
-# ============================================
-def limpar_texto(texto):
-    if not texto:
-        return ""
-    return re.sub(r'\s+', ' ', texto).strip()
-
-
-def normalizar_disciplina(nome):
-    if not nome:
-        return ""
-    nome = limpar_texto(nome).upper()
-    nome = re.sub(r'[.,;:]+$', '', nome)
-    return nome
+# Implementadas em estado_sincronizacao (sem Selenium), reexportadas aqui
+from estado_sincronizacao import usuario_tem_cache_lyceum, obter_ultima_sincronizacao_lyceum
 
 
 # ============================================
 # LOGIN NO LYCEUM (SELENIUM)
 # ============================================
+@fase('lyceum.login')
 def login_lyceum(driver, matricula, cpf):
-    print("🔐 [LYCEUM] Iniciando login...")
+    logger.info("🔐 [LYCEUM] Iniciando login...")
 
     try:
         driver.get("https://portal.unievangelica.edu.br/aluno/#/login")
@@ -93,17 +65,16 @@ def login_lyceum(driver, matricula, cpf):
         # Senha = 9 primeiros dígitos do CPF
         senha = ''.join(filter(str.isdigit, cpf))[:9]
 
-        print(f"   Matrícula: {matricula}")
-        print(f"   Senha (9 dígitos CPF): {senha}")
+        logger.debug(f"Matrícula: {matricula}")
 
         try:
             user_field = wait.until(EC.presence_of_element_located(
                 (By.CSS_SELECTOR, "input[type='text'], input[formcontrolname='usuario'], input[placeholder*='Aluno']")
             ))
             pass_field = driver.find_element(By.CSS_SELECTOR, "input[type='password']")
-            print("   ✓ Campos de login encontrados")
+            logger.debug("✓ Campos de login encontrados")
         except Exception as e:
-            print(f"   ❌ Erro ao encontrar campos: {e}")
+            logger.error(f"❌ Erro ao encontrar campos: {e}")
             return False
 
         user_field.clear()
@@ -114,38 +85,37 @@ def login_lyceum(driver, matricula, cpf):
         pass_field.send_keys(senha)
         time.sleep(0.5)
 
-        print("   ✓ Credenciais preenchidas")
+        logger.debug("✓ Credenciais preenchidas")
 
         try:
             btn_login = driver.find_element(By.CSS_SELECTOR,
                                             "button[type='submit'], button.btn-login, button[color='primary']")
             btn_login.click()
-            print("   ✓ Botão de login clicado")
+            logger.debug("✓ Botão de login clicado")
         except:
             btn_login = driver.find_element(By.XPATH, "//button[contains(text(), 'Entrar')]")
             btn_login.click()
-            print("   ✓ Botão de login clicado (por texto)")
+            logger.debug("✓ Botão de login clicado (por texto)")
 
         time.sleep(8)
 
         if "login" not in driver.current_url.lower() or "home" in driver.current_url.lower():
-            print("✅ [LYCEUM] Login realizado com sucesso!")
-            print(f"   URL atual: {driver.current_url}")
+            logger.info("✅ [LYCEUM] Login realizado com sucesso!")
+            logger.debug(f"URL atual: {driver.current_url}")
             return True
         else:
-            print("❌ [LYCEUM] Falha no login")
+            logger.error("❌ [LYCEUM] Falha no login")
             return False
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro no login: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro no login: {e}")
         return False
 
 
 # ============================================
 # EXTRAIR NOTAS - V12.0 COM SCROLL JAVASCRIPT
 # ============================================
+@fase('lyceum.notas')
 def extrair_notas(driver):
     """
     Extrai notas da página: Avaliação > Notas
@@ -155,14 +125,14 @@ def extrair_notas(driver):
     - Usa JavaScript para scroll agressivo
     - Média SEMPRE divide por 3
     """
-    print("\n📊 [LYCEUM] Extraindo NOTAS (V12.0)...")
-    dados_notas = {}
+    logger.info("📊 [LYCEUM] Extraindo NOTAS (V12.0)...")
+    resultado = []
 
     try:
         driver.get("https://portal.unievangelica.edu.br/aluno/#/home/boletim/notas")
         time.sleep(6)
 
-        print(f"   URL: {driver.current_url}")
+        logger.debug(f"URL: {driver.current_url}")
 
         # SCROLL AGRESSIVO com JavaScript
         for scroll_attempt in range(25):
@@ -189,262 +159,27 @@ def extrair_notas(driver):
 
         body_text = driver.find_element(By.TAG_NAME, "body").text
 
-        print(f"   Tamanho do texto: {len(body_text)} caracteres")
+        logger.debug(f"Tamanho do texto: {len(body_text)} caracteres")
 
         # Debug
-        print("   === CONTEÚDO DA PÁGINA DE NOTAS ===")
-        print(body_text[:4000])
-        print("   === FIM ===")
-
-        linhas = body_text.split('\n')
-        linhas = [l.strip() for l in linhas if l.strip()]
-
-        # Processar linha por linha - melhorar detecção de notas
-        i = 0
-        disciplina_atual = None
-
-        while i < len(linhas):
-            linha = linhas[i]
-
-            # Pular headers conhecidos
-            if linha in ['Notas', 'Notas e Faltas', 'Gráfico de notas', 'Boletim', 'Nota',
-                         'Situação do aluno', 'Em andamento', 'Aprovado', 'Reprovado']:
-                i += 1
-                continue
+        amostrar_dump(logger, 'página de notas', body_text)
 
-            # Verificar se parece uma disciplina (mais flexível)
-            # Disciplinas geralmente começam com maiúscula e têm mais de 10 caracteres
-            if (len(linha) > 10 and
-                re.match(r'^[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ][A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑa-záàâãéèêíïóôõöúçñ\s,\.\-À-ú]+$', linha)):
+        resultado = parse_notas(body_text)
 
-                disciplina = limpar_texto(linha)
-
-                # Pular menus e termos conhecidos
-                termos_ignorar = ['AVALIAÇÃO', 'DISCIPLINA', 'CALENDÁRIO', 'NOTAS',
-                                 'FREQUÊNCIA', 'CADASTRO', 'SECRETARIA VIRTUAL',
-                                 'FINANCEIRO', 'AVALIAÇÃO INSTITUCIONAL', 'BIBLIOTECA',
-                                 'IDIOMA', 'SAIR', 'AVISO', 'FELIPPE', 'ALMEIDA', 'RODRIGUES',
-                                 'INTELIGÊNCIA ARTIFICIAL', 'RA:', 'SÉRIE', 'PERÍODO', 'TURMA', 'STATUS']
-
-                if any(termo in disciplina.upper() for termo in termos_ignorar):
-                    i += 1
-                    continue
-
-                # Verificar se contém palavras-chave de disciplinas
-                palavras_chave = ['FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO',
-                                'ALGORITMOS', 'PROGRAMAÇÃO', 'MATEMÁTIC', 'CIDADANIA',
-                                'ÉTICA', 'ESPIRITUALIDADE', 'LEITURA', 'INTERPRETAÇÃO',
-                                'TEXTO', 'DADOS', 'INFRAESTRUTURA', 'SOLUÇÕES']
-
-                if any(palavra in disciplina.upper() for palavra in palavras_chave):
-                    disciplina_atual = disciplina
-                    disc_key = normalizar_disciplina(disciplina)
-
-                    if disc_key not in dados_notas:
-                        dados_notas[disc_key] = {
-                            'disciplina': disciplina,
-                            'va1': 0.0,
-                            'va2': 0.0,
-                            'va3': 0.0,
-                            'media': 0.0,
-                            'situacao': 'Cursando'
-                        }
-
-            # Procurar por padrão de verificação de aprendizagem
-            # Formato: "DD/MM/YYYY - Xª Verificação De Aprendizagem"
-            match_verificacao = re.search(r'(\d{1,2}/\d{1,2}/\d{4})\s*-\s*(\d)[ªa]\s*Verificação', linha, re.IGNORECASE)
-
-            if match_verificacao:
-                num_va = match_verificacao.group(2)
-                tipo_va = f"VA{num_va}"
-
-                # IMPORTANTE: Procurar a disciplina PARA TRÁS a partir desta linha
-                # No Lyceum, cada entrada de nota tem a disciplina logo acima da linha de VA
-                disciplina_encontrada = None
-                for k in range(i - 1, max(0, i - 5), -1):
-                    linha_anterior = linhas[k].strip()
-                    if any(p in linha_anterior.upper() for p in ['FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO', 'ALGORITMOS', 'CIDADANIA', 'LEITURA', 'MATEMÁTIC', 'ÉTICA', 'ESPIRITUALIDADE', 'INTERPRETAÇÃO', 'SOLUÇÕES', 'INFRAESTRUTURA', 'DADOS']):
-                        # Verificar que não é uma linha de VA ou outros headers
-                        if not re.search(r'\d{1,2}/\d{1,2}/\d{4}', linha_anterior) and 'verificação' not in linha_anterior.lower():
-                            disciplina_encontrada = limpar_texto(linha_anterior)
-                            break
-
-                # Se encontrou disciplina para trás, usar ela; senão usar a atual
-                if disciplina_encontrada:
-                    disciplina_atual = disciplina_encontrada
-
-                if not disciplina_atual:
-                    i += 1
-                    continue
-
-                # IMPORTANTE: NÃO extrair nota da mesma linha (contém data que confunde o regex)
-                # Procurar a nota nas PRÓXIMAS linhas apenas
-                nota_valor = None
-
-                # Procurar nas próximas linhas por um número standalone (a nota)
-                for j in range(1, 10):
-                    if i + j < len(linhas):
-                        linha_nota = linhas[i + j].strip()
-
-                        # Pular linhas que contêm texto irrelevante
-                        if any(skip in linha_nota.lower() for skip in ['verificação', 'gráfico', 'aprendizagem']):
-                            continue
-
-                        # Pular a linha "Nota" (é um label, não um número)
-                        if linha_nota.lower() == 'nota':
-                            continue
-
-                        # Se encontrar "/" significa que é uma data (nova entrada) - parar
-                        if '/' in linha_nota:
-                            break
-
-                        # Pular se a linha for uma disciplina (nova entrada)
-                        if any(p in linha_nota.upper() for p in ['FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO', 'ALGORITMOS', 'CIDADANIA', 'LEITURA', 'MATEMÁTIC', 'ÉTICA']):
-                            break
-
-                        # Procurar número standalone (a nota é geralmente um número sozinho na linha)
-                        # O número deve ser entre 0 e 100
-                        match_nota = re.match(r'^(\d{1,3}(?:[.,]\d+)?)$', linha_nota)
-                        if match_nota:
-                            val = float(match_nota.group(1).replace(',', '.'))
-                            # Validar que é um valor de nota plausível (0-100)
-                            if 0 <= val <= 100:
-                                nota_valor = val
-                                break
-
-                # Converter nota de escala 0-100 para 0-10
-                if nota_valor is not None:
-                    if nota_valor > 10:
-                        nota_valor = round(nota_valor / 10, 1)
-
-                if nota_valor is not None:
-                    disc_key = normalizar_disciplina(disciplina_atual)
-
-                    if disc_key not in dados_notas:
-                        dados_notas[disc_key] = {
-                            'disciplina': disciplina_atual,
-                            'va1': 0.0,
-                            'va2': 0.0,
-                            'va3': 0.0,
-                            'media': 0.0,
-                            'situacao': 'Cursando'
-                        }
-
-                    # Atualizar a nota correspondente (não sobrescrever se já existe)
-                    if tipo_va == 'VA1':
-                        if dados_notas[disc_key]['va1'] == 0.0 or nota_valor > dados_notas[disc_key]['va1']:
-                            dados_notas[disc_key]['va1'] = nota_valor
-                    elif tipo_va == 'VA2':
-                        if dados_notas[disc_key]['va2'] == 0.0 or nota_valor > dados_notas[disc_key]['va2']:
-                            dados_notas[disc_key]['va2'] = nota_valor
-                    elif tipo_va == 'VA3':
-                        if dados_notas[disc_key]['va3'] == 0.0 or nota_valor > dados_notas[disc_key]['va3']:
-                            dados_notas[disc_key]['va3'] = nota_valor
-
-                    print(f"      ✓ {disciplina_atual} - {tipo_va}: {nota_valor}")
-
-            # Detecção adicional de VA sem data completa (apenas "VA1", "VA2", etc.)
-            # Este bloco é um fallback para formatos alternativos
-            if disciplina_atual and not match_verificacao:
-                va_match = re.search(r'\bVA\s*([123])\b', linha, re.IGNORECASE)
-                if va_match:
-                    num_va2 = va_match.group(1)
-                    tipo_va2 = f"VA{num_va2}"
-                    nota_valor2 = None
-
-                    # Procurar nota nas próximas linhas (não na mesma linha)
-                    for j in range(1, 10):
-                        if i + j < len(linhas):
-                            ln = linhas[i + j].strip()
-
-                            # Pular linhas não-numéricas ou que contêm texto irrelevante
-                            if any(skip in ln.lower() for skip in ['verificação', 'nota', 'gráfico', 'aprendizagem', '/']):
-                                continue
-
-                            # Pular se encontrar nova disciplina
-                            if any(p in ln.upper() for p in ['FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO', 'ALGORITMOS', 'CIDADANIA', 'LEITURA']):
-                                break
-
-                            # Procurar número standalone
-                            m2 = re.match(r'^(\d{1,3}(?:[.,]\d+)?)$', ln)
-                            if m2:
-                                val = float(m2.group(1).replace(',', '.'))
-                                if 0 <= val <= 100:
-                                    nota_valor2 = val
-                                    break
-
-                    if nota_valor2 is not None and nota_valor2 > 10:
-                        nota_valor2 = round(nota_valor2 / 10, 1)
-
-                    if nota_valor2 is not None:
-                        disc_key2 = normalizar_disciplina(disciplina_atual)
-                        if disc_key2 not in dados_notas:
-                            dados_notas[disc_key2] = {
-                                'disciplina': disciplina_atual,
-                                'va1': 0.0,
-                                'va2': 0.0,
-                                'va3': 0.0,
-                                'media': 0.0,
-                                'situacao': 'Cursando'
-                            }
-                        if tipo_va2 == 'VA1':
-                            if dados_notas[disc_key2]['va1'] == 0.0 or nota_valor2 > dados_notas[disc_key2]['va1']:
-                                dados_notas[disc_key2]['va1'] = nota_valor2
-                        elif tipo_va2 == 'VA2':
-                            if dados_notas[disc_key2]['va2'] == 0.0 or nota_valor2 > dados_notas[disc_key2]['va2']:
-                                dados_notas[disc_key2]['va2'] = nota_valor2
-                        elif tipo_va2 == 'VA3':
-                            if dados_notas[disc_key2]['va3'] == 0.0 or nota_valor2 > dados_notas[disc_key2]['va3']:
-                                dados_notas[disc_key2]['va3'] = nota_valor2
-
-            i += 1
-
-        # Calcular médias - SEMPRE dividir por 3
-        for disc_key, dados in dados_notas.items():
-            soma = dados['va1'] + dados['va2'] + dados['va3']
-            dados['media'] = round(soma / 3, 1)
-
-            notas_preenchidas = sum(1 for n in [dados['va1'], dados['va2'], dados['va3']] if n > 0)
-
-            if notas_preenchidas >= 3:
-                dados['situacao'] = 'Aprovado' if dados['media'] >= 6.0 else 'Reprovado'
-            else:
-                dados['situacao'] = 'Cursando'
-
-        resultado = list(dados_notas.values())
-
-        # VALIDAÇÃO: Verificar se os dados fazem sentido
-        print(f"\n   📊 VALIDAÇÃO DOS DADOS EXTRAÍDOS:")
-        for nota in resultado:
-            # Notas devem estar entre 0 e 10
-            for va in ['va1', 'va2', 'va3']:
-                if nota[va] < 0 or nota[va] > 10:
-                    print(f"      ⚠️ ALERTA: {nota['disciplina']} tem {va.upper()}={nota[va]} fora do range 0-10")
-                    # Corrigir valores fora do range
-                    nota[va] = max(0, min(10, nota[va]))
-
-            # Média deve ser coerente
-            soma_calc = nota['va1'] + nota['va2'] + nota['va3']
-            media_calc = round(soma_calc / 3, 1)
-            if nota['media'] != media_calc:
-                print(f"      ⚠️ ALERTA: Média inconsistente para {nota['disciplina']}: {nota['media']} vs calculado {media_calc}")
-                nota['media'] = media_calc
-
-        print(f"\n   📊 Total de disciplinas com notas: {len(resultado)}")
+        logger.debug(f"📊 Total de disciplinas com notas: {len(resultado)}")
         for nota in resultado:
-            print(f"      • {nota['disciplina']}: VA1={nota['va1']}, VA2={nota['va2']}, VA3={nota['va3']}, Média={nota['media']}, {nota['situacao']}")
+            logger.debug(f"• {nota['disciplina']}: VA1={nota['va1']}, VA2={nota['va2']}, VA3={nota['va3']}, Média={nota['media']}, {nota['situacao']}")
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair notas: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair notas: {e}")
 
-    return list(dados_notas.values()) if dados_notas else []
+    return resultado
 
 
 # ============================================
 # EXTRAIR FREQUÊNCIA - V13.0 COM PARSING ROBUSTO
 # ============================================
+@fase('lyceum.frequencia')
 def extrair_frequencia(driver):
     """
     Extrai frequência da página: Avaliação > Frequência
@@ -457,33 +192,14 @@ def extrair_frequencia(driver):
 
     IMPORTANTE: Parsing line-by-line para evitar confusão de valores
     """
-    print("\n📅 [LYCEUM] Extraindo FREQUÊNCIA (V13.0)...")
-    dados_faltas = {}
-
-    # Termos do menu/header que NÃO são disciplinas
-    IGNORAR_TERMOS = [
-        'AVALIAÇÃO', 'FREQUÊNCIA (%)', 'FALTAS', 'DISCIPLINA',
-        'INTELIGÊNCIA ARTIFICIAL', 'RA:', 'SÉRIE', 'PERÍODO',
-        'TURMA', 'STATUS', 'CALENDÁRIO', 'CADASTRO', 'SECRETARIA',
-        'FINANCEIRO', 'BIBLIOTECA', 'IDIOMA', 'SAIR', 'AVISO',
-        'NOTAS', 'AVALIAÇÃO INSTITUCIONAL', 'UNIEVANGELICA',
-        'UNIVERSIDADE EVANGÉLICA', 'FELIPPE', 'ALMEIDA', 'RODRIGUES'
-    ]
-
-    # Palavras-chave que identificam disciplinas reais
-    PALAVRAS_DISCIPLINA = [
-        'FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO',
-        'ALGORITMOS', 'PROGRAMAÇÃO', 'MATEMÁTIC', 'CIDADANIA',
-        'ÉTICA', 'ESPIRITUALIDADE', 'LEITURA', 'INTERPRETAÇÃO',
-        'TEXTO', 'DADOS', 'INFRAESTRUTURA', 'SOLUÇÕES', 'ON-LINE',
-        'ONLINE', 'MATEMÁTICA'
-    ]
+    logger.info("📅 [LYCEUM] Extraindo FREQUÊNCIA (V13.0)...")
+    resultado = []
 
     try:
         driver.get("https://portal.unievangelica.edu.br/aluno/#/home/frequencia")
         time.sleep(6)
 
-        print(f"   URL: {driver.current_url}")
+        logger.debug(f"URL: {driver.current_url}")
 
         # SCROLL agressivo para carregar todo o conteúdo
         for scroll_attempt in range(15):
@@ -507,189 +223,127 @@ def extrair_frequencia(driver):
 
         body_text = driver.find_element(By.TAG_NAME, "body").text
 
-        print(f"   Tamanho do texto: {len(body_text)} caracteres")
+        logger.debug(f"Tamanho do texto: {len(body_text)} caracteres")
 
         # Debug - mostrar conteúdo
-        print("   === CONTEÚDO DA PÁGINA DE FREQUÊNCIA ===")
-        print(body_text[:5000])
-        print("   === FIM ===")
+        amostrar_dump(logger, 'página de frequência', body_text, limite=5000)
 
-        def is_disciplina_valida(texto):
-            """Verifica se o texto é um nome de disciplina válido"""
-            texto_upper = texto.upper().strip()
+        resultado = parse_frequencia(body_text)
 
-            # Muito curto não é disciplina
-            if len(texto_upper) < 10:
-                return False
+        logger.debug(f"📅 Total de disciplinas com frequência: {len(resultado)}")
+        for f in resultado:
+            logger.debug(f"• {f['disciplina']}: {f['total_faltas']} faltas, {f['percentual']}%")
 
-            # Verificar se contém termos do menu/header
-            for termo in IGNORAR_TERMOS:
-                if termo in texto_upper and not any(p in texto_upper for p in PALAVRAS_DISCIPLINA):
-                    return False
+    except Exception as e:
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair frequência: {e}")
 
-            # Linhas que começam com código numérico não são disciplinas
-            if re.match(r'^\d{4}\s*-', texto_upper):
-                return False
+    return resultado
 
-            # Deve conter pelo menos uma palavra-chave de disciplina
-            return any(p in texto_upper for p in PALAVRAS_DISCIPLINA)
 
-        linhas = body_text.split('\n')
-        linhas = [l.strip() for l in linhas if l.strip()]
+# ============================================
+# EXTRAIR HORÁRIOS - V10.0 LEITURA ESTRUTURADA DO DOM
+# ============================================
+URL_HORARIOS = "https://portal.unievangelica.edu.br/aluno/#/home/aulas"
+TEMPO_MAXIMO_HORARIOS = 30  # segundos para o script percorrer todos os dias
+
+# Script assíncrono (uma ida ao navegador): lê cada aula como a lista de linhas
+# do bloco que contém um único "HH:MM - HH:MM" (disciplina, local, horário),
+# agrupada pelo cabeçalho de dia mais próximo acima. Se a lista não tiver
+# cabeçalhos de dia (filtro num dia só), seleciona cada dia no "Dia da Semana"
+# dentro da própria página, esperando o DOM estabilizar em vez de dormir.
+# Devolve {modo, dias: {"Segunda-feira": [[linha, ...], ...]}}.
+JS_AULAS_POR_DIA = """
+    var pronto = arguments[arguments.length - 1];
+    var RE_HORA = /^\\d{1,2}:\\d{2}\\s*[-–]\\s*\\d{1,2}:\\d{2}$/;
+    var RE_HORAS = /\\d{1,2}:\\d{2}\\s*[-–]\\s*\\d{1,2}:\\d{2}/g;
+    var RE_DIA = /^(segunda|terça|terca|quarta|quinta|sexta|sábado|sabado)(-feira)?$/i;
+
+    function textoProprio(el) {
+        var t = '';
+        for (var n = el.firstChild; n; n = n.nextSibling) {
+            if (n.nodeType === 3) t += n.nodeValue;
+        }
+        return t.trim();
+    }
 
-        # Estratégia: Procurar padrões "Faltas" seguido de número na próxima linha
-        # e associar com a disciplina mais próxima acima
-        i = 0
-        disciplina_atual = None
+    function linhasDaAula(el) {
+        var bloco = el;
+        while (bloco.parentElement && bloco.parentElement !== document.body &&
+               (bloco.parentElement.textContent.match(RE_HORAS) || []).length === 1) {
+            bloco = bloco.parentElement;
+        }
+        return bloco.innerText.split('\\n').map(function (l) { return l.trim(); }).filter(Boolean);
+    }
 
-        while i < len(linhas):
-            linha = linhas[i]
-            linha_upper = linha.upper().strip()
+    function lerAulas(diaFixo) {
+        var dias = {};
+        var dia = diaFixo;
+        var elementos = document.body.getElementsByTagName('*');
+        for (var i = 0; i < elementos.length; i++) {
+            var el = elementos[i];
+            if (el.closest('mat-option, .cdk-overlay-container')) continue;
+            var t = textoProprio(el);
+            if (!t) continue;
+            if (!diaFixo && RE_DIA.test(t)) { dia = t; continue; }
+            if (dia && RE_HORA.test(t)) (dias[dia] = dias[dia] || []).push(linhasDaAula(el));
+        }
+        return dias;
+    }
 
-            # Detectar header de disciplina
-            if is_disciplina_valida(linha) or linha_upper == 'TOTAL':
-                disciplina_atual = limpar_texto(linha)
-                i += 1
-                continue
+    function esperar(condicao, limiteMs, depois) {
+        var inicio = Date.now();
+        (function checar() {
+            var r = condicao();
+            if (r || Date.now() - inicio > limiteMs) return depois(r);
+            setTimeout(checar, 50);
+        })();
+    }
 
-            # Detectar linha "Faltas"
-            if linha_upper == 'FALTAS' and disciplina_atual:
-                # A próxima linha deve ser o número de faltas
-                faltas = 0
-                freq = 100.0
-
-                # Procurar número de faltas nas próximas linhas
-                for j in range(1, 5):
-                    if i + j < len(linhas):
-                        prox = linhas[i + j].strip()
-
-                        # Se encontrar um número standalone, é o número de faltas
-                        if re.match(r'^\d+$', prox):
-                            faltas = int(prox)
-                            break
-
-                        # Se encontrar "Frequência", próximo valor é a frequência
-                        if prox.upper().startswith('FREQUÊNCIA'):
-                            # Buscar o valor na próxima linha ou mesma linha
-                            freq_match = re.search(r'(\d+(?:[.,]\d+)?)', prox)
-                            if freq_match:
-                                freq = float(freq_match.group(1).replace(',', '.'))
-                            elif i + j + 1 < len(linhas):
-                                freq_line = linhas[i + j + 1].strip()
-                                freq_match2 = re.match(r'^(\d+(?:[.,]\d+)?)$', freq_line)
-                                if freq_match2:
-                                    freq = float(freq_match2.group(1).replace(',', '.'))
-                            break
-
-                # Buscar frequência se ainda não encontrou
-                for j in range(1, 8):
-                    if i + j < len(linhas):
-                        prox = linhas[i + j].strip()
-                        if 'FREQUÊNCIA' in prox.upper() or prox.upper().startswith('FREQUÊNCIA'):
-                            # Procurar número na mesma linha ou próxima
-                            freq_match = re.search(r'(\d+(?:[.,]\d+)?)', prox)
-                            if freq_match:
-                                freq = float(freq_match.group(1).replace(',', '.'))
-                            elif i + j + 1 < len(linhas):
-                                freq_line = linhas[i + j + 1].strip()
-                                freq_match2 = re.match(r'^(\d+(?:[.,]\d+)?)$', freq_line)
-                                if freq_match2:
-                                    freq = float(freq_match2.group(1).replace(',', '.'))
-                            break
-
-                # Sanitização
-                if freq > 100:
-                    freq = 100.0
-                if freq < 0:
-                    freq = 0.0
-                if faltas < 0:
-                    faltas = 0
-
-                # Validação: faltas muito altas (>60) são provavelmente erros de parsing
-                if faltas > 60:
-                    print(f"   ⚠️ Faltas suspeitas para {disciplina_atual}: {faltas} (ignorando)")
-                    # Se faltas > 60 e frequência está perto de 100%, provavelmente foi erro de parse
-                    if freq >= 90:
-                        faltas = 0
-
-                disc_key = normalizar_disciplina(disciplina_atual)
-
-                # Evitar sobrescrever com valores piores
-                prev = dados_faltas.get(disc_key)
-                if not prev or faltas <= prev.get('total_faltas', 999):
-                    dados_faltas[disc_key] = {
-                        'disciplina': disciplina_atual,
-                        'total_faltas': faltas,
-                        'percentual': freq
-                    }
-                    print(f"   📚 {disciplina_atual}: {faltas} faltas, {freq}%")
-
-            i += 1
-
-        # Fallback: Se não encontrou dados, tentar parsing alternativo
-        if not dados_faltas:
-            print("   ⚠️ Parsing primário falhou, tentando método alternativo...")
-
-            # Método 2: Procurar padrões "DISCIPLINA Faltas X Frequência Y%"
-            for i, linha in enumerate(linhas):
-                if is_disciplina_valida(linha):
-                    disciplina = limpar_texto(linha)
-                    disc_key = normalizar_disciplina(disciplina)
-
-                    # Procurar Faltas e Frequência nas próximas linhas
-                    bloco = "\n".join(linhas[i:i+10])
-
-                    faltas = 0
-                    freq = 100.0
-
-                    # Extrair faltas - procurar "Faltas" seguido de número
-                    m_faltas = re.search(r'Faltas\s*\n?\s*(\d+)', bloco, re.IGNORECASE)
-                    if m_faltas:
-                        val = int(m_faltas.group(1))
-                        # Validar que não é porcentagem
-                        if val <= 60:
-                            faltas = val
-
-                    # Extrair frequência
-                    m_freq = re.search(r'Frequência.*?(\d+(?:[.,]\d+)?)', bloco, re.IGNORECASE)
-                    if m_freq:
-                        freq = float(m_freq.group(1).replace(',', '.'))
-                        if freq > 100:
-                            freq = 100.0
-
-                    if disc_key not in dados_faltas:
-                        dados_faltas[disc_key] = {
-                            'disciplina': disciplina,
-                            'total_faltas': faltas,
-                            'percentual': freq
-                        }
-                        print(f"   📚 (alt) {disciplina}: {faltas} faltas, {freq}%")
-
-        # Remover entrada TOTAL se existir (não é uma disciplina)
-        total_key = normalizar_disciplina('TOTAL')
-        if total_key in dados_faltas:
-            total_info = dados_faltas.pop(total_key)
-            # Usar TOTAL para validação
-            soma_faltas = sum(v['total_faltas'] for v in dados_faltas.values())
-            print(f"   📊 Validação TOTAL: extraído {total_info['total_faltas']} vs soma {soma_faltas}")
-
-        resultado = list(dados_faltas.values())
-
-        print(f"\n   📅 Total de disciplinas com frequência: {len(resultado)}")
-        for f in resultado:
-            print(f"      • {f['disciplina']}: {f['total_faltas']} faltas, {f['percentual']}%")
+    function esperarDomParar(limiteMs, depois) {
+        var ultima = 0;
+        var observador = new MutationObserver(function () { ultima = Date.now(); });
+        observador.observe(document.body, {childList: true, subtree: true, characterData: true});
+        esperar(function () { return ultima && Date.now() - ultima > 200; }, limiteMs, function () {
+            observador.disconnect();
+            depois();
+        });
+    }
 
-    except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair frequência: {e}")
-        import traceback
-        traceback.print_exc()
+    var dias = lerAulas(null);
+    var seletor = document.querySelector('mat-select, [role="combobox"]');
+    if (Object.keys(dias).length > 1 || !seletor) return pronto({modo: 'lista', dias: dias});
 
-    return list(dados_faltas.values()) if dados_faltas else []
+    function opcoes() {
+        return Array.prototype.filter.call(document.querySelectorAll('mat-option, [role="option"]'), function (o) {
+            return RE_DIA.test(o.innerText.trim());
+        });
+    }
 
+    var porDia = {};
+    (function proximo(k, rotulos) {
+        seletor.click();
+        esperar(function () { return opcoes().length; }, 3000, function () {
+            var lista = opcoes();
+            rotulos = rotulos || lista.map(function (o) { return o.innerText.trim(); });
+            if (k >= rotulos.length || !lista[k]) {
+                document.body.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', bubbles: true}));
+                return pronto({modo: 'por_dia', dias: porDia});
+            }
+            lista[k].click();
+            esperarDomParar(3000, function () {
+                var lidas = lerAulas(rotulos[k]);
+                porDia[rotulos[k]] = lidas[rotulos[k]] || [];
+                proximo(k + 1, rotulos);
+            });
+        });
+    })(0, null);
+"""
 
-# ============================================
-# EXTRAIR HORÁRIOS - V9.0 COM NAVEGAÇÃO POR DIAS
-# ============================================
+# Alguma aula já renderizada na lista (substitui os sleeps fixos antes da leitura)
+JS_TEM_HORARIO = r"return /\d{1,2}:\d{2}\s*[-–]\s*\d{1,2}:\d{2}/.test(document.body.innerText);"
+
+
+@fase('lyceum.horarios')
 def extrair_horarios(driver):
     """
     Extrai horários da página: Calendário > Horário de Aulas
@@ -699,697 +353,264 @@ def extrair_horarios(driver):
     - Dropdown "Dia da Semana" para selecionar o dia
     - Lista por dia: Disciplina | Local (BLOCO X - Yº PISO - SALA Z) | Horário
 
-    IMPORTANTE: Precisa navegar pelo dropdown para pegar TODOS os dias!
+    As aulas de todos os dias são lidas por um único script (JS_AULAS_POR_DIA);
+    o texto da página só é usado se o script não devolver nada.
     """
-    print("\n🕐 [LYCEUM] Extraindo HORÁRIOS (V9.0)...")
+    logger.info("🕐 [LYCEUM] Extraindo HORÁRIOS (V10.0)...")
     dados_horarios = []
-
-    # Mapear dias
-    dias_map = {
-        'segunda': {'num': 1, 'nome': 'Segunda-feira'},
-        'terça': {'num': 2, 'nome': 'Terça-feira'},
-        'terca': {'num': 2, 'nome': 'Terça-feira'},
-        'quarta': {'num': 3, 'nome': 'Quarta-feira'},
-        'quinta': {'num': 4, 'nome': 'Quinta-feira'},
-        'sexta': {'num': 5, 'nome': 'Sexta-feira'},
-        'sábado': {'num': 6, 'nome': 'Sábado'},
-        'sabado': {'num': 6, 'nome': 'Sábado'},
-    }
-
-    # Termos que NÃO são disciplinas
-    IGNORAR_TERMOS = [
-        'DIA DA SEMANA', 'TODOS', 'HORÁRIO DE AULAS',
-        'INTELIGÊNCIA ARTIFICIAL', 'RA:', 'SÉRIE', 'PERÍODO', 'TURMA',
-        'CALENDÁRIO', 'AVALIAÇÃO', 'DISCIPLINA', 'CADASTRO',
-        'SECRETARIA', 'FINANCEIRO', 'BIBLIOTECA', 'SAIR', 'AVISO'
-    ]
+    inicio = time.time()
 
     try:
-        driver.get("https://portal.unievangelica.edu.br/aluno/#/home/aulas")
-        time.sleep(5)
-
-        print(f"   URL: {driver.current_url}")
+        driver.get(URL_HORARIOS)
+        logger.debug(f"URL: {driver.current_url}")
 
-        wait = WebDriverWait(driver, 10)
+        try:
+            WebDriverWait(driver, 15, poll_frequency=0.2).until(lambda d: d.execute_script(JS_TEM_HORARIO))
+        except Exception:
+            logger.warning("⚠️ Nenhum horário visível após 15s")
 
-        # Tentar clicar no dropdown "Dia da Semana" e selecionar "Todos"
         try:
-            # Procurar dropdown
-            dropdown = None
-
-            # Tentar encontrar por diferentes seletores
-            selectors = [
-                "mat-select",
-                "[role='listbox']",
-                "select",
-                "div[class*='dropdown']",
-                "button[class*='dropdown']"
-            ]
-
-            for sel in selectors:
-                try:
-                    dropdown = driver.find_element(By.CSS_SELECTOR, sel)
-                    if dropdown:
-                        break
-                except:
-                    continue
-
-            if dropdown:
-                print("   📋 Dropdown encontrado, tentando selecionar 'Todos'...")
-                dropdown.click()
-                time.sleep(1)
-
-                # Tentar clicar em "Todos"
-                try:
-                    todos_option = driver.find_element(By.XPATH, "//*[contains(text(), 'Todos')]")
-                    todos_option.click()
-                    time.sleep(2)
-                    print("   ✓ Selecionado 'Todos' no dropdown")
-                except:
-                    print("   ⚠️ Opção 'Todos' não encontrada")
+            driver.set_script_timeout(TEMPO_MAXIMO_HORARIOS)
+            resultado = driver.execute_async_script(JS_AULAS_POR_DIA) or {}
+            dados_horarios = parse_aulas_por_dia(resultado.get('dias') or {})
+            logger.debug(f"📋 Leitura do DOM ({resultado.get('modo')}): {len(dados_horarios)} aulas")
         except Exception as e:
-            print(f"   ⚠️ Dropdown não encontrado: {e}")
-
-        time.sleep(3)
-
-        # Fazer scroll para garantir que toda a página carregue
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
-
-        body_text = driver.find_element(By.TAG_NAME, "body").text
-
-        print(f"   Tamanho do texto: {len(body_text)} caracteres")
-
-        # Debug
-        print("   === CONTEÚDO DA PÁGINA DE HORÁRIOS ===")
-        print(body_text[:5000])
-        print("   === FIM ===")
-
-        # Função para verificar se é disciplina válida
-        def is_disciplina_valida(texto):
-            texto_upper = texto.upper().strip()
-
-            if len(texto_upper) < 10:
-                return False
-
-            for termo in IGNORAR_TERMOS:
-                if termo in texto_upper:
-                    return False
-
-            # Ignorar se começa com código numérico
-            if re.match(r'^\d{4}\s*-', texto_upper):
-                return False
-
-            # Disciplinas válidas contêm palavras-chave
-            palavras_disciplina = [
-                'FUNDAMENTOS', 'COMPUTAÇÃO', 'ENGENHARIA', 'INTRODUÇÃO',
-                'ALGORITMOS', 'PROGRAMAÇÃO', 'MATEMÁTIC', 'CIDADANIA',
-                'ÉTICA', 'ESPIRITUALIDADE', 'LEITURA', 'INTERPRETAÇÃO',
-                'TEXTO', 'DADOS', 'INFRAESTRUTURA', 'SOLUÇÕES'
-            ]
-
-            for palavra in palavras_disciplina:
-                if palavra in texto_upper:
-                    return True
-
-            return False
-
-        linhas = body_text.split('\n')
-
-        dia_atual = None
-        dia_num = 0
-
-        i = 0
-        while i < len(linhas):
-            linha = linhas[i].strip()
-
-            if not linha:
-                i += 1
-                continue
-
-            linha_lower = linha.lower()
+            logger.warning(f"⚠️ Leitura estruturada falhou: {e}")
 
-            # Detectar dia da semana
-            dia_encontrado = False
-            for dia_key, dia_info in dias_map.items():
-                if dia_key in linha_lower and ('feira' in linha_lower or linha_lower.endswith(dia_key)):
-                    dia_atual = dia_info['nome']
-                    dia_num = dia_info['num']
-                    print(f"   📆 {dia_atual}")
-                    dia_encontrado = True
-                    break
+        if not dados_horarios:
+            logger.warning("⚠️ Usando o texto da página como alternativa...")
+            dados_horarios = parse_horarios(driver.find_element(By.TAG_NAME, "body").text)
 
-            if dia_encontrado:
-                i += 1
-                continue
+        for aula in dados_horarios:
+            logger.debug(f"✓ [{aula['dia_nome']}] {aula['disciplina']} ({aula['horario_inicio']} - {aula['horario_fim']}) {aula['local']}")
 
-            # Se temos um dia atual, procurar aulas
-            if dia_atual and is_disciplina_valida(linha):
-                disciplina = limpar_texto(linha)
-                local = ""
-                horario_inicio = ""
-                horario_fim = ""
-
-                # Próximas linhas: local e horário
-                for j in range(1, 6):
-                    if i + j < len(linhas):
-                        prox = linhas[i + j].strip()
-
-                        # Local (BLOCO...)
-                        if 'BLOCO' in prox.upper() or ('PISO' in prox.upper() and 'SALA' in prox.upper()):
-                            local = prox
-
-                        # Horário (XX:XX - XX:XX)
-                        match_hora = re.match(r'^(\d{1,2}:\d{2})\s*[-–]\s*(\d{1,2}:\d{2})$', prox)
-                        if match_hora:
-                            horario_inicio = match_hora.group(1)
-                            horario_fim = match_hora.group(2)
-                            break
-
-                if disciplina and horario_inicio:
-                    # Verificar se já existe (evitar duplicados)
-                    existe = False
-                    for aula in dados_horarios:
-                        if (aula['dia_semana'] == dia_num and
-                            aula['horario_inicio'] == horario_inicio and
-                            aula['disciplina'] == disciplina):
-                            existe = True
-                            break
-
-                    if not existe:
-                        aula = {
-                            'dia_semana': dia_num,
-                            'dia_nome': dia_atual,
-                            'disciplina': disciplina,
-                            'horario_inicio': horario_inicio,
-                            'horario_fim': horario_fim,
-                            'local': local,
-                            'professor': ''
-                        }
-
-                        dados_horarios.append(aula)
-                        print(f"      ✓ {disciplina}")
-                        print(f"        📍 {local}")
-                        print(f"        ⏰ {horario_inicio} - {horario_fim}")
-
-            i += 1
-
-        # Se não encontrou muito, tentar estratégia 2: navegar por cada dia
-        if len(dados_horarios) < 5:
-            print("\n   ⚠️ Poucos horários encontrados, tentando navegar por cada dia...")
-
-            dias_para_navegar = [
-                ('Segunda', 1, 'Segunda-feira'),
-                ('Terça', 2, 'Terça-feira'),
-                ('Quarta', 3, 'Quarta-feira'),
-                ('Quinta', 4, 'Quinta-feira'),
-                ('Sexta', 5, 'Sexta-feira'),
-            ]
-
-            for dia_texto, dia_num, dia_nome in dias_para_navegar:
-                try:
-                    # Tentar clicar no dropdown e selecionar o dia
-                    dropdown = driver.find_element(By.CSS_SELECTOR, "mat-select, select, [role='listbox']")
-                    dropdown.click()
-                    time.sleep(1)
-
-                    # Selecionar o dia
-                    opcao = driver.find_element(By.XPATH, f"//*[contains(text(), '{dia_texto}')]")
-                    opcao.click()
-                    time.sleep(2)
-
-                    # Pegar o texto da página
-                    body_text = driver.find_element(By.TAG_NAME, "body").text
-                    linhas = body_text.split('\n')
-
-                    # Processar as aulas deste dia
-                    for idx, linha in enumerate(linhas):
-                        linha = linha.strip()
-                        if is_disciplina_valida(linha):
-                            disciplina = limpar_texto(linha)
-                            local = ""
-                            horario_inicio = ""
-                            horario_fim = ""
-
-                            for j in range(1, 6):
-                                if idx + j < len(linhas):
-                                    prox = linhas[idx + j].strip()
-
-                                    if 'BLOCO' in prox.upper():
-                                        local = prox
-
-                                    match_hora = re.match(r'^(\d{1,2}:\d{2})\s*[-–]\s*(\d{1,2}:\d{2})$', prox)
-                                    if match_hora:
-                                        horario_inicio = match_hora.group(1)
-                                        horario_fim = match_hora.group(2)
-                                        break
-
-                            if disciplina and horario_inicio:
-                                existe = any(
-                                    a['dia_semana'] == dia_num and
-                                    a['horario_inicio'] == horario_inicio and
-                                    a['disciplina'] == disciplina
-                                    for a in dados_horarios
-                                )
-
-                                if not existe:
-                                    aula = {
-                                        'dia_semana': dia_num,
-                                        'dia_nome': dia_nome,
-                                        'disciplina': disciplina,
-                                        'horario_inicio': horario_inicio,
-                                        'horario_fim': horario_fim,
-                                        'local': local,
-                                        'professor': ''
-                                    }
-                                    dados_horarios.append(aula)
-                                    print(f"      ✓ [{dia_nome}] {disciplina} ({horario_inicio})")
-
-                except Exception as e:
-                    print(f"      ⚠️ Erro ao navegar para {dia_texto}: {e}")
-                    continue
-
-        # Ordenar por dia e horário
-        dados_horarios.sort(key=lambda x: (x['dia_semana'], x['horario_inicio']))
-
-        print(f"\n   🕐 Total de aulas: {len(dados_horarios)}")
+        logger.debug(f"🕐 Total de aulas: {len(dados_horarios)} em {time.time() - inicio:.1f}s")
 
         # Resumo por dia
         dias_resumo = {}
         for aula in dados_horarios:
-            dia = aula['dia_nome']
-            if dia not in dias_resumo:
-                dias_resumo[dia] = 0
-            dias_resumo[dia] += 1
+            dias_resumo[aula['dia_nome']] = dias_resumo.get(aula['dia_nome'], 0) + 1
 
         for dia, count in dias_resumo.items():
-            print(f"      • {dia}: {count} aulas")
+            logger.debug(f"• {dia}: {count} aulas")
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair horários: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair horários: {e}")
 
     return dados_horarios
 
 
 # ============================================
-# EXTRAIR CALENDÁRIO - V13.0 COM NAVEGAÇÃO COMPLETA
+# EXTRAIR CALENDÁRIO - V14.0 SNAPSHOT POR MÊS
 # ============================================
-def extrair_calendario(driver, horarios=None):
+URL_AGENDA = "https://portal.unievangelica.edu.br/aluno/#/home/agenda"
+
+# Texto do cabeçalho do mês ("outubro de 2025"), ou null
+JS_CABECALHO_MES = """
+    var RE_MES = /^(janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)(\\s+de)?\\s+\\d{4}$/i;
+    var elementos = document.body.getElementsByTagName('*');
+    for (var i = 0; i < elementos.length; i++) {
+        var t = '';
+        for (var n = elementos[i].firstChild; n; n = n.nextSibling) {
+            if (n.nodeType === 3) t += n.nodeValue;
+        }
+        t = t.trim();
+        if (t && RE_MES.test(t)) return t;
+    }
+    return null;
+"""
+
+# Snapshot do mês em uma chamada: cabeçalho, células do grid (dia + linhas) e
+# linhas com data completa fora do grid (lista "Eventos do mês"). Sem grid
+# reconhecível, devolve o innerText da página em 'texto'.
+JS_MES_AGENDA = """
+    var RE_DATA = /\\d{1,2}\\/\\d{1,2}\\/\\d{4}/;
+    var RE_FORA = /other|outside|adjacent|disabled|inactive/i;
+    function linhasDe(el) {
+        return el.innerText.split('\\n').map(function (l) { return l.trim(); }).filter(Boolean);
+    }
+    var celulas = [];
+    var usadas = new Set();
+    var candidatas = document.querySelectorAll(
+        '[role="gridcell"], td, mat-calendar-body-cell, .mat-calendar-body-cell, [class*="day"]');
+    for (var i = 0; i < candidatas.length; i++) {
+        var el = candidatas[i];
+        var dentro = false;
+        for (var p = el.parentElement; p && !dentro; p = p.parentElement) dentro = usadas.has(p);
+        if (dentro) continue;
+        var linhas = linhasDe(el);
+        if (!linhas.length || !/^\\d{1,2}$/.test(linhas[0])) continue;
+        usadas.add(el);
+        celulas.push({dia: parseInt(linhas[0], 10), linhas: linhas.slice(1),
+                      fora: RE_FORA.test(el.getAttribute('class') || '')});
+    }
+    var datados = [];
+    if (celulas.length) {
+        var elementos = document.body.getElementsByTagName('*');
+        for (var j = 0; j < elementos.length; j++) {
+            var alvo = elementos[j];
+            if (alvo.children.length || !RE_DATA.test(alvo.textContent)) continue;
+            var noGrid = false;
+            for (var q = alvo; q && !noGrid; q = q.parentElement) noGrid = usadas.has(q);
+            if (!noGrid) datados.push((alvo.parentElement || alvo).innerText.replace(/\\s+/g, ' ').trim());
+        }
+    }
+    return {cabecalho: (function () { %s })(), celulas: celulas, datados: datados,
+            texto: celulas.length ? null : document.body.innerText};
+""" % JS_CABECALHO_MES
+
+# Clica no botão de mês anterior/próximo (arguments[0] = 'anterior' | 'proximo')
+JS_NAVEGAR_MES = """
+    var anterior = arguments[0] === 'anterior';
+    var seletores = anterior
+        ? ["button[aria-label*='prev' i]", "button[aria-label*='anterior' i]", ".mat-calendar-previous-button",
+           "button[class*='prev']", "[class*='calendar-prev']"]
+        : ["button[aria-label*='next' i]", "button[aria-label*='próximo' i]", ".mat-calendar-next-button",
+           "button[class*='next']", "button[class*='forward']", "[class*='calendar-next']"];
+    for (var i = 0; i < seletores.length; i++) {
+        var btn = document.querySelector(seletores[i]);
+        if (btn && btn.offsetParent !== null && !btn.disabled) { btn.click(); return true; }
+    }
+    var simbolo = anterior ? '<' : '>';
+    var botoes = Array.from(document.querySelectorAll('button')).filter(function (b) {
+        return b.offsetParent !== null && (b.textContent || '').trim() === simbolo;
+    });
+    if (botoes.length) { botoes[0].click(); return true; }
+    return false;
+"""
+
+
+def navegar_mes(driver, direcao, cabecalho_atual):
+    """Clica em anterior/próximo e espera o cabeçalho do mês mudar (sem cabeçalho visível, espera 2s)"""
+    if not driver.execute_script(JS_NAVEGAR_MES, direcao):
+        return False
+    if not cabecalho_atual:
+        time.sleep(2)
+        return True
+    try:
+        WebDriverWait(driver, 10, poll_frequency=0.1).until(
+            lambda d: d.execute_script(JS_CABECALHO_MES) not in (None, cabecalho_atual))
+        return True
+    except TimeoutException:
+        return False
+
+
+def carregar_meses_calendario(user_id):
+    """{(ano, mes): {'hash', 'eventos'}} da última sincronização do calendário"""
+    try:
+        with get_db_connection_lyceum() as conn:
+            rows = conn.execute('SELECT ano, mes, hash, eventos FROM calendario_lyceum_meses WHERE usuario_id = ?',
+                                (user_id,)).fetchall()
+        return {(r['ano'], r['mes']): {'hash': r['hash'], 'eventos': json.loads(r['eventos'])} for r in rows}
+    except sqlite3.OperationalError:
+        return {}  # banco sem a migração v8
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao carregar meses salvos: {e}")
+        return {}
+
+
+def salvar_meses_calendario(user_id, meses):
+    """meses: [(ano, mes, hash, eventos_do_mes)] lidos (e não reaproveitados) nesta sincronização"""
+    if not meses:
+        return
+    try:
+        with get_db_connection_lyceum() as conn:
+            agora = datetime.now().isoformat()
+            conn.executemany('''
+                INSERT INTO calendario_lyceum_meses (usuario_id, ano, mes, hash, eventos, atualizado_em)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (usuario_id, ano, mes) DO UPDATE SET
+                    hash = excluded.hash, eventos = excluded.eventos, atualizado_em = excluded.atualizado_em
+            ''', [(user_id, ano, mes, hash_mes, json.dumps(eventos_mes, ensure_ascii=False), agora)
+                  for ano, mes, hash_mes, eventos_mes in meses])
+            conn.commit()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao salvar meses do calendário: {e}")
+
+
+@fase('lyceum.calendario')
+def extrair_calendario(driver, horarios=None, user_id=None):
     """
     Extrai calendário da página: Calendário > Calendário
     URL: https://portal.unievangelica.edu.br/aluno/#/home/agenda
 
-    IMPORTANTE:
-    - Navegar por TODOS os meses do ano
-    - Capturar FERIADOS e AULAS corretamente
-    - Usar seletores mais robustos para navegação
+    - Volta 12 meses e percorre o ano mês a mês, esperando o cabeçalho mudar
+    - Cada mês é lido com um único script (JS_MES_AGENDA)
+    - Com user_id, meses cujo conteúdo não mudou desde a última sincronização
+      reaproveitam os eventos salvos (calendario_lyceum_meses)
     """
-    print("\n📆 [LYCEUM] Extraindo CALENDÁRIO (V13.0)...")
+    logger.info("📆 [LYCEUM] Extraindo CALENDÁRIO (V14.0)...")
     eventos = []
     feriados_encontrados = set()
     aulas_encontradas = set()
+    meses_salvos = carregar_meses_calendario(user_id) if user_id else {}
+    meses_lidos = []
+    inicio = time.time()
 
     try:
-        driver.get("https://portal.unievangelica.edu.br/aluno/#/home/agenda")
-        time.sleep(6)
-
-        print(f"   URL: {driver.current_url}")
-
-        meses_num_map = {
-            'janeiro': 1, 'fevereiro': 2, 'março': 3, 'abril': 4,
-            'maio': 5, 'junho': 6, 'julho': 7, 'agosto': 8,
-            'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12
-        }
-
-        wait = WebDriverWait(driver, 10)
+        driver.get(URL_AGENDA)
+        logger.debug(f"URL: {driver.current_url}")
 
         try:
-            for _ in range(12):
-                btn_prev = None
-                selectors_prev = [
-                    "button[aria-label*='prev']",
-                    "button[aria-label*='anterior']",
-                    "button[aria-label*='Previous']",
-                    "button.mat-icon-button:first-of-type",
-                    "button[class*='prev']",
-                    ".mat-calendar-previous-button",
-                    "[class*='calendar-prev']"
-                ]
-                for sel in selectors_prev:
-                    try:
-                        btn_prev = driver.find_element(By.CSS_SELECTOR, sel)
-                        if btn_prev.is_displayed() and btn_prev.is_enabled():
-                            btn_prev.click()
-                            time.sleep(2)
-                            break
-                    except:
-                        continue
-                if not btn_prev:
-                    try:
-                        result = driver.execute_script("""
-                            var buttons = document.querySelectorAll('button');
-                            for (var btn of buttons) {
-                                var text = btn.textContent || '';
-                                var ariaLabel = (btn.getAttribute('aria-label') || '').toLowerCase();
-                                var className = (btn.className || '').toLowerCase();
-                                if (text.includes('<') || ariaLabel.includes('prev') || ariaLabel.includes('anterior') || className.includes('prev')) {
-                                    if (btn.offsetParent !== null) { btn.click(); return true; }
-                                }
-                            }
-                            return false;
-                        """)
-                        if not result:
-                            break
-                        time.sleep(2)
-                    except:
-                        break
-        except:
-            pass
+            cabecalho = WebDriverWait(driver, 15, poll_frequency=0.2).until(
+                lambda d: d.execute_script(JS_CABECALHO_MES))
+        except TimeoutException:
+            logger.warning("⚠️ Cabeçalho do mês não encontrado; navegando por tempo")
+            cabecalho = None
+
+        for _ in range(12):
+            if not navegar_mes(driver, 'anterior', cabecalho):
+                break
+            cabecalho = driver.execute_script(JS_CABECALHO_MES)
 
         # Processar 12 meses (ano completo)
         for mes_idx in range(12):
-            time.sleep(2)
-
-            # Scroll agressivo para garantir carregamento
-            for _ in range(3):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(0.5)
-                driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(0.5)
-
-            # Aguardar carregamento do calendário
-            time.sleep(2)
-
-            # Tentar obter texto do calendário usando diferentes métodos
-            body_text = ""
-            try:
-                # Método 1: Texto do body
-                body_text = driver.find_element(By.TAG_NAME, "body").text
-            except:
-                try:
-                    # Método 2: Texto de elementos específicos do calendário
-                    calendario_elem = driver.find_element(By.CSS_SELECTOR, "mat-calendar, .mat-calendar, [class*='calendar']")
-                    body_text = calendario_elem.text
-                except:
-                    body_text = driver.find_element(By.TAG_NAME, "body").text
-
-            # Detectar mês e ano atual
-            match_mes = re.search(r'(janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)\s+de?\s*(\d{4})', body_text.lower())
-
-            if match_mes:
-                mes_nome = match_mes.group(1)
-                ano = int(match_mes.group(2))
-                mes_num = meses_num_map.get(mes_nome, 12)
-                print(f"\n   📅 Processando: {mes_nome.capitalize()} {ano}")
+            foto = driver.execute_script(JS_MES_AGENDA) or {}
+            cabecalho = foto.get('cabecalho')
+            mes_num, ano, estimado = mes_do_cabecalho(cabecalho or foto.get('texto') or '', mes_idx)
+            mes_nome = list(MESES_NUM.keys())[mes_num - 1]
+            assinatura = assinatura_mes(foto)
+            salvo = meses_salvos.get((ano, mes_num))
+
+            if salvo and not estimado and salvo['hash'] == assinatura:
+                eventos_mes = reaproveitar_eventos_mes(salvo['eventos'], feriados_encontrados, aulas_encontradas)
+                logger.debug(f"📅 {mes_nome.capitalize()} {ano}: sem mudanças ({len(eventos_mes)} eventos)")
             else:
-                # Tentar usar data atual
-                hoje = datetime.now()
-                mes_num = (hoje.month + mes_idx - 1) % 12 + 1
-                if mes_num == 0:
-                    mes_num = 12
-                ano = hoje.year + ((hoje.month + mes_idx - 1) // 12)
-                mes_nome = list(meses_num_map.keys())[mes_num - 1]
-                print(f"\n   📅 Processando (estimado): {mes_nome.capitalize()} {ano}")
-
-            linhas = body_text.split('\n')
-            linhas = [l.strip() for l in linhas if l.strip()]
-
-            # Mapear dias do calendário - criar um dicionário para rastrear dias
-            dias_calendario = {}
-            ultimo_dia = None
-            dia_atual = None
-
-            # Primeiro, identificar todos os dias no calendário
-            for i, linha in enumerate(linhas):
-                # Verificar se é um número de dia (1-31)
-                if linha.isdigit() and 1 <= int(linha) <= 31:
-                    dia_num = int(linha)
-                    ultimo_dia = dia_num
-                    dia_atual = dia_num
-                    try:
-                        data_obj = datetime(ano, mes_num, dia_num)
-                        dias_calendario[dia_num] = data_obj
-                    except:
-                        pass
-
-            # Preparar contexto de datas por texto (modo lista)
-            ultima_data_textual = None
-            tem_aula_no_mes = False
-            has_aula_word = ('aula' in body_text.lower())
-
-            # Agora processar eventos
-            for i, linha in enumerate(linhas):
-                linha_lower = linha.lower().strip()
-
-                # Capturar data textual (dd/mm/aaaa)
-                mdata = re.search(r'(\d{1,2}/\d{1,2}/\d{4})', linha)
-                if mdata:
-                    try:
-                        dt = datetime.strptime(mdata.group(1), '%d/%m/%Y')
-                        ultima_data_textual = dt
-                    except:
-                        pass
+                logger.debug(f"📅 Processando{' (estimado)' if estimado else ''}: {mes_nome.capitalize()} {ano}")
+                if foto.get('celulas'):
+                    eventos_mes = parse_celulas_calendario(foto, mes_num, ano, feriados_encontrados, aulas_encontradas)
                 else:
-                    mdata2 = re.search(r'(\d{1,2}/\d{1,2})', linha)
-                    if mdata2:
-                        try:
-                            dt2 = datetime.strptime(f"{mdata2.group(1)}/{ano}", '%d/%m/%Y')
-                            ultima_data_textual = dt2
-                        except:
-                            pass
-
-                # Capturar FERIADOS - pode aparecer como "Feriado" ou em bloco vermelho
-                if 'feriado' in linha_lower:
-                    try:
-                        data_obj = None
-                        # 1) Tentar vincular ao número de dia mais próximo no grid
-                        dia_feriado = None
-                        for j in range(max(0, i-6), min(len(linhas), i+6)):
-                            if linhas[j].isdigit() and 1 <= int(linhas[j]) <= 31:
-                                dia_feriado = int(linhas[j])
-                                break
-                        if dia_feriado and dia_feriado in dias_calendario:
-                            data_obj = dias_calendario[dia_feriado]
-
-                        # 2) Tentar data textual completa próxima
-                        if not data_obj:
-                            for k in range(max(0, i-4), min(len(linhas), i+5)):
-                                mm = re.search(r'(\d{1,2}/\d{1,2}/\d{4})', linhas[k])
-                                if mm:
-                                    try:
-                                        dt = datetime.strptime(mm.group(1), '%d/%m/%Y')
-                                        data_obj = dt
-                                        break
-                                    except:
-                                        pass
-
-                        # 3) Tentar dd/mm assumindo ano corrente do cabeçalho
-                        if not data_obj:
-                            for k in range(max(0, i-4), min(len(linhas), i+5)):
-                                mm2 = re.search(r'(\d{1,2}/\d{1,2})', linhas[k])
-                                if mm2:
-                                    try:
-                                        data_obj = datetime.strptime(f"{mm2.group(1)}/{ano}", '%d/%m/%Y')
-                                        break
-                                    except:
-                                        pass
-
-                        # 4) Último recurso: usar última_data_textual
-                        if not data_obj and ultima_data_textual:
-                            data_obj = ultima_data_textual
-
-                        if not data_obj:
-                            continue
-
-                        if data_obj.month == mes_num and data_obj.year == ano:
-                            data_iso = data_obj.strftime('%Y-%m-%d')
-                            if data_iso not in feriados_encontrados:
-                                feriados_encontrados.add(data_iso)
-                                eventos.append({
-                                    'titulo': 'Feriado',
-                                    'data': data_iso,
-                                    'tipo': 'feriado',
-                                    'cor': '#e74c3c',
-                                    'descricao': 'Feriado'
-                                })
-                                print(f"      🎉 Feriado: {data_iso}")
-                    except Exception:
-                        pass
-
-                # Capturar AULAS - formato "HH:MM-HH:MM" ou "Aula HH:MM-HH:MM"
-                match_aula = re.search(r'(\d{1,2}:\d{2})\s*[-–]\s*(\d{1,2}:\d{2})', linha)
-                if match_aula:
-                    hora_inicio = match_aula.group(1)
-                    hora_fim = match_aula.group(2)
-
-                    # Verificar se é uma aula (pode ter "aula" na linha ou próxima)
-                    is_aula = 'aula' in linha_lower
-                    if not is_aula and i + 1 < len(linhas):
-                        is_aula = 'aula' in linhas[i + 1].lower()
-
-                    if is_aula:
-                        try:
-                            data_obj = None
-                            if ultima_data_textual:
-                                data_obj = ultima_data_textual
-                            else:
-                                dia_aula = ultimo_dia
-                                for j in range(max(0, i-5), min(len(linhas), i+5)):
-                                    if linhas[j].isdigit() and 1 <= int(linhas[j]) <= 31:
-                                        dia_aula = int(linhas[j])
-                                        break
-                                if dia_aula in dias_calendario:
-                                    data_obj = dias_calendario[dia_aula]
-
-                            if data_obj is not None and data_obj.month == mes_num and data_obj.year == ano:
-                                data_iso = data_obj.strftime('%Y-%m-%d')
-
-                                chave = f"aula|{data_iso}|{hora_inicio}"
-                                if chave not in aulas_encontradas:
-                                    aulas_encontradas.add(chave)
-                                    eventos.append({
-                                        'titulo': f"Aula {hora_inicio}-{hora_fim}",
-                                        'data': data_iso,
-                                        'tipo': 'aula',
-                                        'cor': '#4a90e2',
-                                        'descricao': f'{hora_inicio} - {hora_fim}'
-                                    })
-                                    print(f"      📚 Aula: {data_iso} às {hora_inicio}")
-                                    tem_aula_no_mes = True
-                        except Exception as e:
-                            pass
+                    eventos_mes = parse_calendario_mes(foto.get('texto') or '', mes_num, ano,
+                                                       feriados_encontrados, aulas_encontradas)
+                for ev in eventos_mes:
+                    logger.debug(f"{'🎉' if ev['tipo'] == 'feriado' else '📚'} {ev['titulo']}: {ev['data']}")
+                if not estimado:
+                    meses_lidos.append((ano, mes_num, assinatura, eventos_mes))
+            eventos.extend(eventos_mes)
 
             # Gerar aulas a partir da grade semanal, se disponível
             # Sempre gerar para evitar meses em branco e replicar a visão do Lyceum
             if horarios:
-                try:
-                    mapa = {}
-                    for h in horarios:
-                        ds = h.get('dia_semana')
-                        if not ds:
-                            continue
-                        mapa.setdefault(ds, []).append((h.get('horario_inicio'), h.get('horario_fim')))
-                    for dia in range(1, 32):
-                        try:
-                            d = datetime(ano, mes_num, dia)
-                        except:
-                            continue
-                        dow = d.weekday() + 1
-                        data_iso = d.strftime('%Y-%m-%d')
-                        if data_iso in feriados_encontrados:
-                            continue
-                        if dow in mapa:
-                            for inicio, fim in mapa[dow]:
-                                if not inicio or not fim:
-                                    continue
-                                chave = f"aula|{data_iso}|{inicio}"
-                                if chave in aulas_encontradas:
-                                    continue
-                                aulas_encontradas.add(chave)
-                                eventos.append({
-                                    'titulo': f"Aula {inicio}-{fim}",
-                                    'data': data_iso,
-                                    'tipo': 'aula',
-                                    'cor': '#4a90e2',
-                                    'descricao': f"{inicio} - {fim}"
-                                })
-                except Exception as e:
-                    pass
+                eventos.extend(aulas_da_grade(mes_num, ano, horarios, feriados_encontrados, aulas_encontradas))
 
             # Avançar para próximo mês
-            if mes_idx < 11:
-                try:
-                    clicou = False
-
-                    # Método 1: Procurar botão de próximo mês por vários seletores
-                    selectors = [
-                        "button[aria-label*='next']",
-                        "button[aria-label*='próximo']",
-                        "button[aria-label*='Next']",
-                        "button.mat-icon-button:last-of-type",
-                        "button[class*='next']",
-                        "button[class*='forward']",
-                        ".mat-calendar-next-button",
-                        "[class*='calendar-next']"
-                    ]
-
-                    for selector in selectors:
-                        try:
-                            btn = driver.find_element(By.CSS_SELECTOR, selector)
-                            if btn.is_displayed() and btn.is_enabled():
-                                btn.click()
-                                clicou = True
-                                break
-                        except:
-                            continue
-
-                    # Método 2: JavaScript para encontrar e clicar no botão
-                    if not clicou:
-                        try:
-                            result = driver.execute_script("""
-                                var buttons = document.querySelectorAll('button');
-                                for (var btn of buttons) {
-                                    var text = btn.textContent || '';
-                                    var ariaLabel = btn.getAttribute('aria-label') || '';
-                                    var className = btn.className || '';
-                                    
-                                    if ((text.includes('>') || text.includes('next') || text.includes('próximo')) ||
-                                        (ariaLabel.toLowerCase().includes('next') || ariaLabel.toLowerCase().includes('próximo')) ||
-                                        (className.toLowerCase().includes('next') || className.toLowerCase().includes('forward'))) {
-                                        if (btn.offsetParent !== null) {
-                                            btn.click();
-                                            return true;
-                                        }
-                                    }
-                                }
-                                
-                                // Tentar encontrar botão pela posição (direita)
-                                var allButtons = Array.from(document.querySelectorAll('button'));
-                                var rightButtons = allButtons.filter(b => {
-                                    var rect = b.getBoundingClientRect();
-                                    return rect.x > window.innerWidth / 2 && b.offsetParent !== null;
-                                });
-                                if (rightButtons.length > 0) {
-                                    rightButtons[0].click();
-                                    return true;
-                                }
-                                
-                                return false;
-                            """)
-                            if result:
-                                clicou = True
-                        except:
-                            pass
-
-                    if clicou:
-                        print(f"   ➡️ Avançando para próximo mês...")
-                        time.sleep(3)  # Aguardar carregamento do próximo mês
-                    else:
-                        print(f"   ⚠️ Não foi possível avançar para próximo mês")
-
-                except Exception as e:
-                    print(f"   ⚠️ Erro ao navegar: {e}")
-
-        # Remover duplicados e filtrar por ano do Lyceum quando disponível
-        eventos_unicos = {}
-        for ev in eventos:
-            chave = (ev['titulo'], ev['data'])
-            if chave not in eventos_unicos:
-                eventos_unicos[chave] = ev
-        eventos = list(eventos_unicos.values())
-
-        print(f"\n   📆 Total de eventos: {len(eventos)}")
-        print(f"   🎉 Feriados: {len(feriados_encontrados)}")
-        print(f"   📚 Aulas: {len(aulas_encontradas)}")
+            if mes_idx < 11 and not navegar_mes(driver, 'proximo', cabecalho):
+                logger.warning(f"⚠️ Não foi possível avançar para próximo mês")
+                break
+
+        if user_id:
+            salvar_meses_calendario(user_id, meses_lidos)
+
+        # Remover duplicados
+        eventos = deduplicar_eventos(eventos)
+
+        logger.debug(f"📆 Total de eventos: {len(eventos)} em {time.time() - inicio:.1f}s "
+                     f"({len(meses_lidos)} meses lidos)")
+        logger.debug(f"🎉 Feriados: {len(feriados_encontrados)}")
+        logger.debug(f"📚 Aulas: {len(aulas_encontradas)}")
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair calendário: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair calendário: {e}")
 
     return eventos
 
@@ -1397,8 +618,9 @@ def extrair_calendario(driver, horarios=None):
 # ============================================
 # EXTRAIR DISCIPLINAS MATRICULADAS
 # ============================================
+@fase('lyceum.disciplinas')
 def extrair_disciplinas(driver):
-    print("\n📚 [LYCEUM] Extraindo DISCIPLINAS...")
+    logger.info("📚 [LYCEUM] Extraindo DISCIPLINAS...")
     dados_disciplinas = []
 
     try:
@@ -1407,7 +629,7 @@ def extrair_disciplinas(driver):
 
         body_text = driver.find_element(By.TAG_NAME, "body").text
 
-        print(f"   Tamanho do texto: {len(body_text)} caracteres")
+        logger.debug(f"Tamanho do texto: {len(body_text)} caracteres")
 
         # Procurar disciplinas no texto
         linhas = body_text.split('\n')
@@ -1416,7 +638,7 @@ def extrair_disciplinas(driver):
             linha = linha.strip()
 
             # Disciplinas geralmente são em maiúsculas ou título
-            if (re.match(r'^[A-ZÁÀÂÃÉÈÊÍÏÓÔÕÖÚÇÑ]', linha) and
+            if (RE_INICIA_MAIUSCULA.match(linha) and
                 len(linha) > 15 and
                 linha not in ['Disciplina', 'Disciplinas', 'DISCIPLINAS']):
 
@@ -1433,14 +655,12 @@ def extrair_disciplinas(driver):
                             'docente': '',
                             'data_inicial': ''
                         })
-                        print(f"      ✓ {disciplina}")
+                        logger.debug(f"✓ {disciplina}")
 
-        print(f"\n   📚 Total de disciplinas: {len(dados_disciplinas)}")
+        logger.debug(f"📚 Total de disciplinas: {len(dados_disciplinas)}")
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair disciplinas: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair disciplinas: {e}")
 
     return dados_disciplinas
 
@@ -1448,145 +668,158 @@ def extrair_disciplinas(driver):
 # ============================================
 # SALVAR DADOS NO BANCO
 # ============================================
+# Cada tabela é gravada com UPSERT pela chave natural (índices únicos criados
+# em migrar_banco_lyceum_v8): só linhas novas ou com valores diferentes são
+# escritas, e as que sumiram do portal são apagadas.
+
+# tabela -> colunas de valor (a chave vem de CHAVES_NATURAIS)
+COLUNAS_VALOR = {
+    'notas_aluno': ('va1', 'va2', 'va3', 'media', 'situacao'),
+    'faltas_aluno': ('total_faltas', 'total_aulas', 'percentual_presenca'),
+    'horarios_aluno': ('dia_nome', 'horario_fim', 'local', 'professor'),
+    'disciplinas_aluno': ('situacao', 'periodo', 'docente', 'data_inicial'),
+    'calendario_lyceum': ('tipo', 'cor', 'descricao'),
+}
+
+
+def gravar_tabela_lyceum(c, tabela, user_id, linhas):
+    """
+    linhas: dicts com as colunas da tabela.
+    Retorna {'adicionados', 'atualizados', 'removidos'} comparando com o que estava salvo.
+    """
+    chave, valores = CHAVES_NATURAIS[tabela], COLUNAS_VALOR[tabela]
+    c.execute(f"SELECT {', '.join(chave + valores)} FROM {tabela} WHERE usuario_id = ?", (user_id,))
+    atuais = {tuple(row[:len(chave)]): tuple(row[len(chave):]) for row in c.fetchall()}
+    novas = {tuple(l[col] for col in chave): tuple(l[col] for col in valores) for l in linhas}
+
+    alteradas = [k for k, v in novas.items() if atuais.get(k) != v]
+    removidas = [k for k in atuais if k not in novas]
+
+    if alteradas:
+        c.executemany(f'''
+            INSERT INTO {tabela} (usuario_id, {', '.join(chave + valores)})
+            VALUES (?, {', '.join('?' * len(chave + valores))})
+            ON CONFLICT (usuario_id, {', '.join(chave)}) DO UPDATE SET
+                {', '.join(f'{col} = excluded.{col}' for col in valores)}
+        ''', [(user_id,) + k + novas[k] for k in alteradas])
+    if removidas:
+        c.executemany(f"DELETE FROM {tabela} WHERE usuario_id = ? AND {' AND '.join(f'{col} = ?' for col in chave)}",
+                      [(user_id,) + k for k in removidas])
+
+    adicionados = sum(1 for k in alteradas if k not in atuais)
+    return {'adicionados': adicionados, 'atualizados': len(alteradas) - adicionados, 'removidos': len(removidas)}
+
+
+@fase('lyceum.salvar')
 def salvar_dados_lyceum(user_id, notas, faltas, horarios, disciplinas, calendario=None):
-    print(f"\n💾 [LYCEUM] Salvando dados no banco...")
+    """
+    Grava os dados extraídos e retorna o resumo das mudanças por tipo, ex.:
+    {'notas': {'adicionados': 1, 'atualizados': 2, 'removidos': 0}, ...,
+     'alteracoes': [{'disciplina', 'tipo', 'campo', 'anterior', 'novo', 'mensagem'}, ...]}
+    (None se a gravação falhar)
+    """
+    logger.info(f"💾 [LYCEUM] Salvando dados no banco...")
 
     try:
         timestamp = datetime.now().isoformat()
-
+        tabelas = [
+            ('notas', 'notas_aluno', [
+                {'disciplina': n['disciplina'], 'va1': n['va1'], 'va2': n['va2'], 'va3': n['va3'],
+                 'media': n['media'], 'situacao': n['situacao']}
+                for n in notas]),
+            ('faltas', 'faltas_aluno', [
+                {'disciplina': f['disciplina'], 'total_faltas': f['total_faltas'],
+                 'total_aulas': f.get('total_aulas', 60), 'percentual_presenca': f['percentual']}
+                for f in faltas]),
+            ('horarios', 'horarios_aluno', [
+                {'dia_semana': h['dia_semana'], 'horario_inicio': h['horario_inicio'], 'disciplina': h['disciplina'],
+                 'dia_nome': h['dia_nome'], 'horario_fim': h['horario_fim'], 'local': h['local'],
+                 'professor': h.get('professor', '')}
+                for h in horarios]),
+            ('disciplinas', 'disciplinas_aluno', [
+                {'disciplina': d['disciplina'], 'situacao': d['situacao'], 'periodo': d['periodo'],
+                 'docente': d['docente'], 'data_inicial': d['data_inicial']}
+                for d in disciplinas]),
+        ]
+        if calendario:
+            tabelas.append(('calendario', 'calendario_lyceum', [
+                {'data_evento': ev['data'], 'titulo': ev['titulo'], 'tipo': ev['tipo'],
+                 'cor': ev['cor'], 'descricao': ev.get('descricao', '')}
+                for ev in calendario]))
+
+        resumo = {}
         with get_db_connection_lyceum() as conn:
             c = conn.cursor()
 
-            # NOTAS
-            c.execute('DELETE FROM notas_aluno WHERE usuario_id = ?', (user_id,))
-            for n in notas:
-                c.execute('''
-                    INSERT INTO notas_aluno (usuario_id, disciplina, va1, va2, va3, media, situacao)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, n['disciplina'], n['va1'], n['va2'], n['va3'], n['media'], n['situacao']))
-            print(f"   ✓ {len(notas)} notas salvas")
-
-            # FALTAS
-            c.execute('DELETE FROM faltas_aluno WHERE usuario_id = ?', (user_id,))
-            for f in faltas:
-                c.execute('''
-                    INSERT INTO faltas_aluno (usuario_id, disciplina, total_faltas, total_aulas, percentual_presenca)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (user_id, f['disciplina'], f['total_faltas'], f.get('total_aulas', 60), f['percentual']))
-            print(f"   ✓ {len(faltas)} registros de frequência salvos")
-
-            # HORÁRIOS
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS horarios_aluno (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    usuario_id INTEGER NOT NULL,
-                    dia_semana INTEGER NOT NULL,
-                    dia_nome TEXT,
-                    disciplina TEXT NOT NULL,
-                    horario_inicio TEXT,
-                    horario_fim TEXT,
-                    local TEXT,
-                    professor TEXT,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-                )
-            ''')
-
-            c.execute('DELETE FROM horarios_aluno WHERE usuario_id = ?', (user_id,))
-            for h in horarios:
-                c.execute('''
-                    INSERT INTO horarios_aluno (usuario_id, dia_semana, dia_nome, disciplina, horario_inicio, horario_fim, local, professor)
+            # DIFF com a sincronização anterior. Sem ultima_atualizacao_lyceum, o que está no
+            # banco não veio do portal (ex.: gerar_notas_ficticias) e não há o que comparar
+            sincronizado = c.execute('SELECT ultima_atualizacao_lyceum FROM usuarios WHERE id = ?',
+                                     (user_id,)).fetchone()
+            notas_salvas, faltas_salvas = [], []
+            if sincronizado and sincronizado['ultima_atualizacao_lyceum']:
+                notas_salvas = c.execute('SELECT disciplina, va1, va2, va3 FROM notas_aluno WHERE usuario_id = ?',
+                                         (user_id,)).fetchall()
+                faltas_salvas = c.execute('SELECT disciplina, percentual_presenca FROM faltas_aluno '
+                                          'WHERE usuario_id = ?', (user_id,)).fetchall()
+            alteracoes = []
+            if notas_salvas:
+                alteracoes += comparar_notas([dict(r) for r in notas_salvas], tabelas[0][2])
+            if faltas_salvas:
+                alteracoes += comparar_frequencia([dict(r) for r in faltas_salvas], tabelas[1][2])
+            for alteracao in alteracoes:
+                alteracao['mensagem'] = mensagem_alteracao(alteracao)
+            if alteracoes:
+                c.executemany('''
+                    INSERT INTO alteracoes_lyceum
+                        (usuario_id, disciplina, tipo, campo, valor_anterior, valor_novo, mensagem, criado_em)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, h['dia_semana'], h['dia_nome'], h['disciplina'],
-                      h['horario_inicio'], h['horario_fim'], h['local'], h.get('professor', '')))
-            print(f"   ✓ {len(horarios)} horários salvos")
-
-            # DISCIPLINAS
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS disciplinas_aluno (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    usuario_id INTEGER NOT NULL,
-                    disciplina TEXT NOT NULL,
-                    situacao TEXT,
-                    periodo TEXT,
-                    docente TEXT,
-                    data_inicial TEXT,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-                )
-            ''')
-
-            c.execute('DELETE FROM disciplinas_aluno WHERE usuario_id = ?', (user_id,))
-            for d in disciplinas:
-                c.execute('''
-                    INSERT INTO disciplinas_aluno (usuario_id, disciplina, situacao, periodo, docente, data_inicial)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (user_id, d['disciplina'], d['situacao'], d['periodo'],
-                      d['docente'], d['data_inicial']))
-            print(f"   ✓ {len(disciplinas)} disciplinas salvas")
-
-            # CALENDÁRIO
-            if calendario:
-                c.execute('''
-                    CREATE TABLE IF NOT EXISTS calendario_lyceum (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        usuario_id INTEGER NOT NULL,
-                        titulo TEXT NOT NULL,
-                        data_evento DATE NOT NULL,
-                        tipo TEXT,
-                        cor TEXT,
-                        descricao TEXT,
-                        FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-                    )
-                ''')
-
-                c.execute('DELETE FROM calendario_lyceum WHERE usuario_id = ?', (user_id,))
-                for evento in calendario:
-                    c.execute('''
-                        INSERT INTO calendario_lyceum (usuario_id, titulo, data_evento, tipo, cor, descricao)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (user_id, evento['titulo'], evento['data'], evento['tipo'],
-                          evento['cor'], evento.get('descricao', '')))
-                print(f"   ✓ {len(calendario)} eventos do calendário salvos")
-
-            # TIMESTAMP
+                ''', [(user_id, a['disciplina'], a['tipo'], a['campo'], a['anterior'], a['novo'],
+                       a['mensagem'], timestamp) for a in alteracoes])
+                logger.debug(f"🔔 {len(alteracoes)} alterações desde a última sincronização")
+
+            for nome, tabela, linhas in tabelas:
+                resumo[nome] = gravar_tabela_lyceum(c, tabela, user_id, linhas)
+                r = resumo[nome]
+                logger.debug(f"✓ {nome}: {len(linhas)} registros "
+                             f"(+{r['adicionados']} ~{r['atualizados']} -{r['removidos']})")
+
+            # TIMESTAMP + VERSÃO (a versão só muda com dados novos e invalida os relatórios em cache)
+            houve_mudanca = any(sum(r.values()) for r in resumo.values())
             c.execute('''
                 UPDATE usuarios 
-                SET ultima_atualizacao_lyceum = ? 
+                SET ultima_atualizacao_lyceum = ?,
+                    versao_dados_lyceum = COALESCE(versao_dados_lyceum, 0) + ?
                 WHERE id = ?
-            ''', (timestamp, user_id))
+            ''', (timestamp, 1 if houve_mudanca else 0, user_id))
 
             conn.commit()
 
-            print(f"\n✅ [LYCEUM] Todos os dados salvos!")
-            print(f"   Timestamp: {timestamp}")
+            logger.info(f"✅ [LYCEUM] Todos os dados salvos!")
+            logger.debug(f"Timestamp: {timestamp}")
+        resumo['alteracoes'] = alteracoes
+        return resumo
 
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao salvar: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao salvar: {e}")
+        return None
 
 
 # ============================================
 # SINCRONIZAÇÃO PRINCIPAL
 # ============================================
+@medir_sincronizacao('lyceum')
 def sincronizar_dados_lyceum(user_id, matricula, cpf, forcar_atualizacao=False):
-    print(f"\n{'=' * 80}")
-    print(f"🚀 LYCEUM SCRAPER V8.0 - BASEADO NOS PRINTS REAIS")
-    print(f"{'=' * 80}")
-    print(f"User ID: {user_id}")
-    print(f"Matrícula: {matricula}")
-    print(f"Forçar: {forcar_atualizacao}")
-    print(f"{'=' * 80}\n")
+    logger.info(f"🚀 [LYCEUM] Sincronização V8.0 para user {user_id} (forçar: {forcar_atualizacao})")
 
     # Verificar cache
     if not forcar_atualizacao:
         if usuario_tem_cache_lyceum(user_id):
             ultima = obter_ultima_sincronizacao_lyceum(user_id)
             if ultima:
-                print(f"✅ CACHE ENCONTRADO")
-                print(f"   Última sync: {ultima.strftime('%d/%m/%Y às %H:%M')}")
+                logger.info(f"✅ [LYCEUM] Cache válido (última sync: {ultima.strftime('%d/%m/%Y às %H:%M')})")
                 return
 
-    print("⚡ Iniciando scraping...\n")
+    logger.info("⚡ Iniciando scraping...")
 
     # Configurar Chrome
     chrome_options = webdriver.ChromeOptions()
@@ -1605,10 +838,12 @@ def sincronizar_dados_lyceum(user_id, matricula, cpf, forcar_atualizacao=False):
         from typing import Any
         selenium_service: Any = Service(ChromeDriverManager().install())
         chrome_opts: Any = chrome_options
-        driver = webdriver.Chrome(
-            service=selenium_service,
-            options=chrome_opts
-        )
+        with fase('lyceum.chrome'):
+            driver = webdriver.Chrome(
+                service=selenium_service,
+                options=chrome_opts
+            )
+        definir_driver(driver)
 
         # Configurar timeouts maiores para evitar timeout
         driver.set_page_load_timeout(90)
@@ -1616,7 +851,7 @@ def sincronizar_dados_lyceum(user_id, matricula, cpf, forcar_atualizacao=False):
 
         # Login
         if not login_lyceum(driver, matricula, cpf):
-            print("❌ [LYCEUM] Falha no login.")
+            logger.error("❌ [LYCEUM] Falha no login.")
             return
 
         # Extrair dados
@@ -1633,32 +868,27 @@ def sincronizar_dados_lyceum(user_id, matricula, cpf, forcar_atualizacao=False):
                     (faltas or []).append({'disciplina': d['disciplina'], 'total_faltas': 0, 'percentual': 100.0, 'total_aulas': 60})
         except:
             pass
-        calendario = extrair_calendario(driver, horarios)
+        calendario = extrair_calendario(driver, horarios, user_id)
 
         # Salvar
         if notas or faltas or horarios or disciplinas:
-            salvar_dados_lyceum(user_id, notas, faltas, horarios, disciplinas, calendario)
-
-            print(f"\n{'=' * 80}")
-            print(f"✅ SINCRONIZAÇÃO CONCLUÍDA!")
-            print(f"   • {len(notas)} disciplinas com notas")
-            print(f"   • {len(faltas)} disciplinas com frequência")
-            print(f"   • {len(horarios)} aulas no horário")
-            print(f"   • {len(calendario)} eventos")
-            print(f"   • {len(disciplinas)} disciplinas")
-            print(f"{'=' * 80}\n")
+            resumo = salvar_dados_lyceum(user_id, notas, faltas, horarios, disciplinas, calendario)
+
+            logger.info(f"✅ [LYCEUM] Sincronização concluída: {len(notas)} disciplinas com notas, "
+                        f"{len(faltas)} com frequência, {len(horarios)} aulas, {len(calendario)} eventos, "
+                        f"{len(disciplinas)} disciplinas")
+            return resumo
         else:
-            print("⚠️ Nenhum dado extraído.")
+            logger.warning("⚠️ Nenhum dado extraído.")
 
     except Exception as e:
-        print(f"❌ Erro fatal: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Erro fatal: {e}")
 
     finally:
+        definir_driver(None)
         if driver:
             driver.quit()
-            print("🏁 Driver encerrado.\n")
+            logger.info("🏁 Driver encerrado.")
 
 
 if __name__ == "__main__":
@@ -1677,8 +907,9 @@ def auto_scroll(driver, vezes=12, pausa=1.2):
     except Exception:
         pass
 
+@fase('lyceum.disciplinas')
 def extrair_disciplinas_v2(driver):
-    print("\n📚 [LYCEUM] Extraindo DISCIPLINAS V2...")
+    logger.info("📚 [LYCEUM] Extraindo DISCIPLINAS V2...")
     dados = []
     try:
         driver.get("https://portal.unievangelica.edu.br/aluno/#/home/disciplinas")
@@ -1703,16 +934,16 @@ def extrair_disciplinas_v2(driver):
             per = None
             doc = None
             data = None
-            m = re.search(r"Situação\s*\n\s*([A-Za-zÁ-ú\s]+)", bloco, re.IGNORECASE)
+            m = RE_SITUACAO.search(bloco)
             if m:
                 sit = limpar_texto(m.group(1))
-            m = re.search(r"Período\s*\n\s*([\w\sºª\-\/]+)", bloco, re.IGNORECASE)
+            m = RE_PERIODO.search(bloco)
             if m:
                 per = limpar_texto(m.group(1))
-            m = re.search(r"Docente\s*\n\s*([A-Za-zÁ-ú\s\.]+)", bloco, re.IGNORECASE)
+            m = RE_DOCENTE.search(bloco)
             if m:
                 doc = limpar_texto(m.group(1))
-            m = re.search(r"Data\s*Inicial\s*\n\s*(\d{2}/\d{2}/\d{4})", bloco, re.IGNORECASE)
+            m = RE_DATA_INICIAL.search(bloco)
             if m:
                 data = m.group(1)
             registro = {
@@ -1723,22 +954,16 @@ def extrair_disciplinas_v2(driver):
                 'data_inicial': data or ''
             }
             dados.append(registro)
-            print(f"      ✓ {registro['disciplina']}")
+            logger.debug(f"✓ {registro['disciplina']}")
             i = j
-        print(f"\n   📚 Total de disciplinas: {len(dados)}")
+        logger.debug(f"📚 Total de disciplinas: {len(dados)}")
     except Exception as e:
-        print(f"❌ [LYCEUM] Erro ao extrair disciplinas v2: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ [LYCEUM] Erro ao extrair disciplinas v2: {e}")
     return dados
 
+@medir_sincronizacao('lyceum')
 def sincronizar_dados_lyceum_v2(user_id, matricula, cpf, forcar_atualizacao=False):
-    print(f"\n{'=' * 80}")
-    print("🚀 LYCEUM SCRAPER V2")
-    print(f"{'=' * 80}")
-    print(f"User ID: {user_id}")
-    print(f"Forçar: {forcar_atualizacao}")
-    print(f"{'=' * 80}\n")
+    logger.info(f"🚀 [LYCEUM] Sincronização V2 para user {user_id} (forçar: {forcar_atualizacao})")
     driver = None
     try:
         chrome_options = webdriver.ChromeOptions()
@@ -1750,7 +975,9 @@ def sincronizar_dados_lyceum_v2(user_id, matricula, cpf, forcar_atualizacao=Fals
         chrome_options.add_argument("--log-level=3")
         from typing import Any
         service: Any = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        with fase('lyceum.chrome'):
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+        definir_driver(driver)
         driver.set_page_load_timeout(120)
         driver.implicitly_wait(20)
         wait = WebDriverWait(driver, 30)
@@ -1767,19 +994,19 @@ def sincronizar_dados_lyceum_v2(user_id, matricula, cpf, forcar_atualizacao=Fals
             except Exception:
                 pass
         if not ok:
-            print("❌ Login Lyceum falhou")
+            logger.error("❌ Login Lyceum falhou")
             return
         disciplinas = extrair_disciplinas_v2(driver)
         notas = extrair_notas(driver)
         faltas = extrair_frequencia(driver)
         horarios = extrair_horarios(driver)
-        calendario = extrair_calendario(driver, horarios)
-        salvar_dados_lyceum(user_id, notas, faltas, horarios, disciplinas, calendario)
-        print("✅ LYCEUM V2 concluído")
+        calendario = extrair_calendario(driver, horarios, user_id)
+        resumo = salvar_dados_lyceum(user_id, notas, faltas, horarios, disciplinas, calendario)
+        logger.info("✅ LYCEUM V2 concluído")
+        return resumo
     except Exception as e:
-        print(f"❌ Erro V2: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Erro V2: {e}")
     finally:
+        definir_driver(None)
         if driver:
             driver.quit()
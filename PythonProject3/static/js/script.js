@@ -135,7 +135,7 @@ function renderNotificacoes() {
         const div = document.createElement('div');
         div.className = `notif-item ${notif.lida ? '' : 'notif-unread'}`;
         div.innerHTML = `
-            <div class="notif-icon">${notif.tipo === 'curtida' ? '❤️' : '💬'}</div>
+            <div class="notif-icon">${ICONES_NOTIFICACAO[notif.tipo] || '💬'}</div>
             <div class="notif-content">
                 <p>${notif.mensagem}</p>
                 <span class="notif-time">${notif.data}</span>
@@ -176,8 +176,38 @@ async function marcarTodasLidas() {
     }
 }
 
-// Carregar notificações a cada 30 segundos
-setInterval(carregarNotificacoes, 30000);
+// Notificações em tempo real (SSE); o polling fica como reserva
+const ICONES_NOTIFICACAO = { curtida: '❤️', lembrete: '⏰', nota: '📝', frequencia: '⚠️' };
+let pollingNotificacoes = null;
+
+function iniciarPollingNotificacoes() {
+    if (!pollingNotificacoes) {
+        pollingNotificacoes = setInterval(carregarNotificacoes, 30000);
+    }
+}
+
+function pararPollingNotificacoes() {
+    clearInterval(pollingNotificacoes);
+    pollingNotificacoes = null;
+}
+
+if (window.EventSource) {
+    const streamNotificacoes = new EventSource('/api/notificacoes/stream');
+    streamNotificacoes.onopen = pararPollingNotificacoes;
+    streamNotificacoes.onmessage = (event) => {
+        const notif = JSON.parse(event.data);
+        carregarNotificacoes();
+        if (notif.tipo === 'lembrete' || notif.tipo === 'nota') {
+            showToastMessage(notif.mensagem, 'success');
+        } else if (notif.tipo === 'frequencia') {
+            showToastMessage(notif.mensagem, 'warning');
+        }
+    };
+    // O navegador reconecta sozinho; enquanto isso, volta a consultar a cada 30s
+    streamNotificacoes.onerror = iniciarPollingNotificacoes;
+} else {
+    iniciarPollingNotificacoes();
+}
 
 // ============================================
 // BUSCA E FILTROS DE POSTS
@@ -824,7 +854,7 @@ document.getElementById('chatForm')?.addEventListener('submit', async (e) => {
     try {
         let response;
 
-        // Escolher endpoint baseado no tipo de anexo
+        // Escolher endpoint baseado no tipo de anexo (todos respondem em streaming)
         if (attachmentType === 'file') {
             // Enviar com arquivo
             response = await sendMessageWithFile(message || 'Resuma este documento', currentAttachment);
@@ -833,22 +863,28 @@ document.getElementById('chatForm')?.addEventListener('submit', async (e) => {
             response = await sendMessageWithYouTube(message || 'Resuma este vídeo', currentAttachment);
         } else {
             // Mensagem normal
-            response = await fetch('/chat', {
+            response = await fetch('/chat/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ message })
             });
         }
 
-        const data = await response.json();
-
-        removeLoadingMessage(loadingId);
-
         // Limpar anexo após envio
         if (currentAttachment) {
             removeAttachment();
         }
 
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.includes('text/event-stream')) {
+            await lerRespostaStream(response, loadingId);
+            return;
+        }
+
+        const data = await response.json();
+
+        removeLoadingMessage(loadingId);
+
         // Verificar rate limit
         if (data.rate_limited && data.wait_time > 0) {
             addMessage(data.response, 'bot');
@@ -869,7 +905,7 @@ document.getElementById('chatForm')?.addEventListener('submit', async (e) => {
             return;
         }
 
-        addMessage(data.response, 'bot');
+        addMessage(data.response || ('❌ ' + (data.error || 'Erro ao processar.')), 'bot');
 
     } catch (error) {
         removeLoadingMessage(loadingId);
@@ -878,6 +914,57 @@ document.getElementById('chatForm')?.addEventListener('submit', async (e) => {
     }
 });
 
+/**
+ * Lê a resposta SSE do servidor e renderiza o texto conforme os trechos chegam
+ */
+async function lerRespostaStream(response, loadingId) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let texto = '';
+    let messageDiv = null;
+    let renderPendente = false;
+
+    const renderizar = () => {
+        renderPendente = false;
+        atualizarMensagem(messageDiv, texto);
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Cada evento SSE termina com uma linha em branco
+        let fim;
+        while ((fim = buffer.indexOf('\n\n')) !== -1) {
+            const bloco = buffer.slice(0, fim);
+            buffer = buffer.slice(fim + 2);
+            if (!bloco.startsWith('data: ')) continue;
+
+            const evento = JSON.parse(bloco.slice(6));
+            if (evento.chunk) {
+                if (!messageDiv) {
+                    removeLoadingMessage(loadingId);
+                    messageDiv = addMessage('', 'bot');
+                }
+                texto += evento.chunk;
+                if (!renderPendente) {
+                    renderPendente = true;
+                    requestAnimationFrame(renderizar);
+                }
+            }
+        }
+    }
+
+    if (!messageDiv) {
+        removeLoadingMessage(loadingId);
+        messageDiv = addMessage(texto || 'Não consegui gerar resposta.', 'bot');
+        return;
+    }
+    atualizarMensagem(messageDiv, texto);
+}
+
 function addLoadingMessage(id) {
     const messagesContainer = document.getElementById('chatMessages');
     const messageDiv = document.createElement('div');
@@ -913,6 +1000,14 @@ function addMessage(text, type) {
     messageDiv.innerHTML = `<div class="message-content">${contentHtml}</div>`;
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return messageDiv;
+}
+
+function atualizarMensagem(messageDiv, text) {
+    const content = messageDiv.querySelector('.message-content');
+    content.innerHTML = typeof marked !== 'undefined' ? marked.parse(text) : `<p>${text}</p>`;
+    const messagesContainer = document.getElementById('chatMessages');
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
 }
 
 // ============================================
@@ -1042,8 +1137,10 @@ document.addEventListener('DOMContentLoaded', function() {
                 week: 'Semana',
                 list: 'Lista'
             },
+            // Busca só o intervalo visível (o FullCalendar chama de novo ao trocar de mês)
             events: function(info, successCallback, failureCallback) {
-                fetch('/api/eventos_calendario')
+                const params = new URLSearchParams({ start: info.startStr, end: info.endStr });
+                fetch(`/api/eventos_calendario?${params}`)
                     .then(response => {
                         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
                         return response.json();
@@ -2011,7 +2108,7 @@ async function sendMessageWithFile(message, file) {
     formData.append('message', message);
     formData.append('file', file);
 
-    return fetch('/chat/with-file', {
+    return fetch('/chat/with-file/stream', {
         method: 'POST',
         body: formData
     });
@@ -2021,7 +2118,7 @@ async function sendMessageWithFile(message, file) {
  * Envia mensagem com YouTube
  */
 async function sendMessageWithYouTube(message, youtubeData) {
-    return fetch('/chat/with-youtube', {
+    return fetch('/chat/with-youtube/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
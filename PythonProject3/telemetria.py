@@ -0,0 +1,170 @@
+import contextvars
+import functools
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from carregamento_tardio import modulo_disponivel
+from log_estruturado import CORRELACAO, correlacao
+
+logger = logging.getLogger(__name__)
+
+PSUTIL_DISPONIVEL = modulo_disponivel('psutil')
+
+# Telemetria da sincronização em andamento nesta thread (None fora de uma sync)
+SYNC_ATUAL: contextvars.ContextVar[Optional['TelemetriaSync']] = contextvars.ContextVar('telemetria_sync', default=None)
+
+
+# ============================================
+# TELEMETRIA DAS SINCRONIZAÇÕES (AVA / LYCEUM)
+# ============================================
+# Cada sincronização ganha um sync_id; cada fase (login, extrair_*, curso,
+# seção, atividade, PDF, gravação) vira uma linha em metricas_sync com a
+# duração e, se houver navegador aberto, a memória do Chrome ao final da
+# fase e o CPU gasto por ele durante a fase. As funções dos scrapers usam
+# `fase(nome)` sem receber nada a mais: fora de uma sync ela não faz nada.
+def recursos_chrome(driver):
+    """(memória em MB, CPU acumulado em s) do Chrome; psutil se instalado, senão métricas do DevTools"""
+    if driver is None:
+        return None, None
+    try:
+        if PSUTIL_DISPONIVEL:
+            import psutil
+            raiz = psutil.Process(driver.service.process.pid)
+            processos = [raiz] + raiz.children(recursive=True)
+            memoria = sum(p.memory_info().rss for p in processos)
+            cpu = sum(p.cpu_times().user + p.cpu_times().system for p in processos)
+            return memoria / 1024 / 1024, cpu
+        driver.execute_cdp_cmd('Performance.enable', {})
+        metricas = {m['name']: m['value'] for m in driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        return metricas.get('JSHeapUsedSize', 0) / 1024 / 1024, metricas.get('TaskDuration')
+    except Exception:
+        return None, None
+
+
+class TelemetriaSync:
+    def __init__(self, usuario_id, fonte, sync_id=None):
+        self.sync_id = sync_id or uuid.uuid4().hex
+        self.usuario_id = usuario_id
+        self.fonte = fonte
+        self.driver = None
+        self.registros = []
+
+    @contextmanager
+    def fase(self, nome):
+        _, cpu_inicio = recursos_chrome(self.driver)
+        inicio = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            memoria, cpu_fim = recursos_chrome(self.driver)
+            cpu = cpu_fim - cpu_inicio if cpu_fim is not None and cpu_inicio is not None else None
+            self.registros.append((nome, duracao_ms, ok, memoria, cpu))
+
+    def gravar(self):
+        if not self.registros:
+            return
+        agora = datetime.now().isoformat()
+        try:
+            with sqlite3.connect(os.getenv('DATABASE', 'unievangelica.db')) as conn:
+                conn.executemany('''
+                    INSERT INTO metricas_sync
+                        (sync_id, usuario_id, fonte, fase, duracao_ms, ok, memoria_mb, cpu_s, criado_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(self.sync_id, self.usuario_id, self.fonte, nome, duracao, int(ok), memoria, cpu, agora)
+                      for nome, duracao, ok, memoria, cpu in self.registros])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"[TELEMETRIA] Erro ao gravar métricas: {e}")
+
+    def resumo(self):
+        """Tempo total por fase nesta sync (fases repetidas, como 'ava.pdf', são somadas)"""
+        por_fase = {}
+        for nome, duracao, _, _, _ in self.registros:
+            total, vezes = por_fase.get(nome, (0.0, 0))
+            por_fase[nome] = (total + duracao, vezes + 1)
+        return por_fase
+
+
+@contextmanager
+def fase(nome):
+    """Mede um trecho da sincronização atual; também serve como decorador (@fase('ava.pdf'))"""
+    telemetria = SYNC_ATUAL.get()
+    if telemetria is None:
+        yield
+        return
+    with telemetria.fase(nome):
+        yield
+
+
+def definir_driver(driver):
+    """Navegador cujos recursos são amostrados nas próximas fases (None depois do quit)"""
+    telemetria = SYNC_ATUAL.get()
+    if telemetria is not None:
+        telemetria.driver = driver
+
+
+def medir_sincronizacao(fonte):
+    """
+    Decorador da função de sync (primeiro argumento = user_id): mede o total e grava as fases.
+    O sync_id é o id de correlação dos logs (o da thread, se já houver um).
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def executar(user_id, *args, **kwargs):
+            id_atual = CORRELACAO.get()
+            telemetria = TelemetriaSync(user_id, fonte, sync_id=None if id_atual == '-' else id_atual)
+            token = SYNC_ATUAL.set(telemetria)
+            try:
+                with correlacao(telemetria.sync_id), telemetria.fase(f'{fonte}.total'):
+                    return funcao(user_id, *args, **kwargs)
+            finally:
+                SYNC_ATUAL.reset(token)
+                # Só o total (ex.: cache válido, nada foi raspado): não entra nas estatísticas
+                if len(telemetria.registros) > 1:
+                    telemetria.gravar()
+                    logger.info(f"[TELEMETRIA] {fonte} usuário {user_id}: " + ", ".join(
+                        f"{nome.split('.', 1)[-1]} {total / 1000:.1f}s" + (f" ({vezes}x)" if vezes > 1 else "")
+                        for nome, (total, vezes) in telemetria.resumo().items()),
+                        extra={'sync_id': telemetria.sync_id})
+        return executar
+    return decorador
+
+
+# ============================================
+# RESUMO PARA O PAINEL DE ADMINISTRAÇÃO
+# ============================================
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank (valores já ordenados, lista não vazia)"""
+    indice = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1))
+    return valores_ordenados[indice]
+
+
+def resumir_fases(linhas):
+    """linhas: dicts de metricas_sync -> {fase: {n, falhas, p50_ms, p95_ms, memoria_p95_mb, cpu_p50_s}}"""
+    por_fase = {}
+    for linha in linhas:
+        por_fase.setdefault(linha['fase'], []).append(linha)
+
+    resumo = {}
+    for nome, registros in sorted(por_fase.items()):
+        duracoes = sorted(r['duracao_ms'] for r in registros)
+        memorias = sorted(r['memoria_mb'] for r in registros if r['memoria_mb'] is not None)
+        cpus = sorted(r['cpu_s'] for r in registros if r['cpu_s'] is not None)
+        resumo[nome] = {
+            'n': len(registros),
+            'falhas': sum(1 for r in registros if not r['ok']),
+            'p50_ms': round(percentil(duracoes, 50), 1),
+            'p95_ms': round(percentil(duracoes, 95), 1),
+            'memoria_p95_mb': round(percentil(memorias, 95), 1) if memorias else None,
+            'cpu_p50_s': round(percentil(cpus, 50), 2) if cpus else None,
+        }
+    return resumo
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import pytest
+
+from atualizacao_agendada import AtualizacaoAgendada, ler_janela
+
+
+def agendada(janela):
+    return AtualizacaoAgendada(lambda: [], lambda candidato, fonte: None, janela=janela)
+
+
+@pytest.mark.parametrize('janela, agora, esperado', [
+    # janela no mesmo dia
+    ((2, 6), datetime(2025, 10, 1, 1, 0), (datetime(2025, 10, 1, 2), datetime(2025, 10, 1, 6))),
+    ((2, 6), datetime(2025, 10, 1, 3, 0), (datetime(2025, 10, 1, 2), datetime(2025, 10, 1, 6))),
+    ((2, 6), datetime(2025, 10, 1, 6, 0), (datetime(2025, 10, 2, 2), datetime(2025, 10, 2, 6))),
+    # passa da meia-noite
+    ((23, 5), datetime(2025, 10, 1, 22, 0), (datetime(2025, 10, 1, 23), datetime(2025, 10, 2, 5))),
+    ((23, 5), datetime(2025, 10, 1, 23, 30), (datetime(2025, 10, 1, 23), datetime(2025, 10, 2, 5))),
+    ((23, 5), datetime(2025, 10, 2, 3, 0), (datetime(2025, 10, 1, 23), datetime(2025, 10, 2, 5))),
+    ((23, 5), datetime(2025, 10, 2, 5, 0), (datetime(2025, 10, 2, 23), datetime(2025, 10, 3, 5))),
+    # termina à meia-noite
+    ((22, 24), datetime(2025, 10, 1, 23, 0), (datetime(2025, 10, 1, 22), datetime(2025, 10, 2, 0))),
+])
+def test_janela_de(janela, agora, esperado):
+    assert agendada(janela).janela_de(agora) == esperado
+
+
+def test_proxima_janela_dentro_da_janela_e_agora():
+    agora = datetime(2025, 10, 2, 1, 0)
+    assert agendada((23, 5)).proxima_janela(agora) == agora
+
+
+@pytest.mark.parametrize('texto, esperado', [('2-6', (2, 6)), ('23-5', (23, 5)), ('22-24', (22, 24))])
+def test_ler_janela(texto, esperado):
+    assert ler_janela(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', ['2', '2-6-8', 'a-b', '25-3', '4-4', '0-24', '-1-3'])
+def test_ler_janela_invalida(texto):
+    with pytest.raises(ValueError):
+        ler_janela(texto)
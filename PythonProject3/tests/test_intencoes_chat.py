@@ -0,0 +1,39 @@
+"""
+Roteador de intenções do chat: o que é respondido direto (sem Gemini) e o
+que precisa seguir para a IA. Só classifica, não consulta o banco.
+"""
+import pytest
+
+from app import classificar_intencao
+
+
+@pytest.mark.parametrize('mensagem, esperado', [
+    ("qual minha aula de hoje?", ('aula', 'hoje')),
+    ("tenho aula segunda?", ('aula', 'segunda')),
+    ("quais aulas na segunda-feira", ('aula', 'segunda')),
+    ("matérias de amanhã", ('aula', 'amanha')),
+    ("quando é a 2ª VA?", ('va', '2')),
+    ("quando é a VA2?", ('va', '2')),
+    ("qual a data da va 3", ('va', '3')),
+    ("que dia começa a 1a va", ('va', '1')),
+    ("quando é a substitutiva?", ('substitutiva', None)),
+    ("qual a data da substitutiva da 2ª VA", ('substitutiva', '2')),
+    ("qual o próximo feriado?", ('feriado', None)),
+])
+def test_perguntas_roteadas(mensagem, esperado):
+    assert classificar_intencao(mensagem) == esperado
+
+
+@pytest.mark.parametrize('mensagem', [
+    "qual minha nota da 2ª VA?",
+    "qual a média necessária na 3ª VA pra passar?",
+    "o que foi visto na aula de hoje?",
+    "resume o conteúdo da aula de hoje",
+    "qual disciplina da segunda va",
+    "aula da segunda chamada",
+    "fiz a substitutiva",
+    "qual a VA2 mais difícil?",
+    "criar evento: estudar para a substitutiva | 2025-11-10",
+])
+def test_perguntas_abertas_seguem_para_ia(mensagem):
+    assert classificar_intencao(mensagem) is None
@@ -0,0 +1,31 @@
+"""
+Parsers do Lyceum contra as fixtures anonimizadas (fixtures/lyceum).
+
+Os resultados esperados são os mesmos conferidos pelo benchmark_parsers.py;
+para regravá-los depois de uma mudança intencional:
+    python benchmark_parsers.py --atualizar
+"""
+import json
+
+import pytest
+
+from benchmark_parsers import CASOS, caminho_esperado, ler_fixture, parse_notas_legado, variantes_pagina
+from parsers_lyceum import parse_notas
+
+
+@pytest.mark.parametrize('nome', list(CASOS))
+def test_parser_confere_com_esperado(nome):
+    fixture, parser = CASOS[nome]
+    with open(caminho_esperado(nome), encoding='utf-8') as f:
+        esperado = json.load(f)
+
+    assert parser(ler_fixture(fixture)) == esperado
+
+
+def test_parse_notas_equivale_ao_legado():
+    """parse_notas (uma passada) devolve o mesmo que o parser anterior, também em páginas embaralhadas"""
+    texto = ler_fixture('notas.txt')
+    assert parse_notas(texto) == parse_notas_legado(texto)
+
+    divergentes = [v for v in variantes_pagina(texto, 500) if parse_notas(v) != parse_notas_legado(v)]
+    assert not divergentes, f"{len(divergentes)} de 500 variantes diferem; primeira:\n{divergentes[0]}"
@@ -0,0 +1,16 @@
+"""
+`import app` com -X importtime, num processo novo: nenhum módulo pesado
+(selenium, reportlab, google.generativeai, PyPDF2, docx...) pode ser
+importado no boot; eles são carregados sob demanda (carregamento_tardio.py).
+"""
+from perfil_importacao import MODULOS_PESADOS, medir_importacao
+
+
+def test_import_do_app_nao_carrega_modulos_pesados():
+    medicoes, processo = medir_importacao('app')
+    assert processo.returncode == 0, processo.stderr[-2000:]
+
+    importados = {nome.strip() for _, _, nome in medicoes}
+    pesados = sorted(m for m in MODULOS_PESADOS
+                     if any(nome == m or nome.startswith(m + '.') for nome in importados))
+    assert not pesados, f"importados no boot: {', '.join(pesados)}"